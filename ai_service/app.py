@@ -1,5 +1,13 @@
-from flask import Flask, request, jsonify
 import os
+from utils.import_timer import ImportTimer
+
+# Time imports from here on; summarized at start-up and once the models have loaded
+import_timer = ImportTimer()
+if os.getenv('IMPORT_TIME_REPORT', 'True').lower() == 'true':
+    import_timer.install()
+
+from flask import Flask, Request, request, jsonify, g, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 import logging
 
 # Optional/extra imports: guard them so the app can run in a minimal dev environment
@@ -17,23 +25,56 @@ except Exception as e:
     logging.warning("Optional dependency 'python-dotenv' not available: %s. Environment variables from .env will not be loaded.", e)
     def load_dotenv(*args, **kwargs):
         return False
+import hmac
+import importlib
 import time
 import traceback
+from werkzeug.formparser import parse_form_data
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import get_input_stream
 import sys
 import io
 
 # Load environment variables
 load_dotenv()
 
-# Import AI models
-from models.crowd_detection import CrowdDetectionModel
-from models.anomaly_detection import AnomalyDetectionModel
-from models.risk_prediction import RiskPredictionModel
-from models.chatbot import ChatbotModel
+# Model modules (and their OpenCV / scikit-learn dependencies) are imported lazily by
+# the model loader; the chatbot module is plain Python and cheap to import here
+from models.chatbot import is_emergency_message
+from utils.model_loader import ModelLoader
+from utils.micro_batcher import MicroBatcher
+from utils.metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from utils.timing import start_timing, stop_timing, current_timings, phase
+from utils.profiling import ProfileStore, CProfileSession, SamplingSession, ContinuousSampler, MODE_CPROFILE, PROFILE_MODES
+from utils.risk_feed import RiskFeed, FeedFull
+from utils.admission import AdmissionLimiter, AdmissionRejected, PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_NAMES
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that attributes response serialization to the 'serialize' phase"""
+
+    def dumps(self, obj, **kwargs):
+        with phase('serialize'):
+            return super().dumps(obj, **kwargs)
+
+class InMemoryUploadRequest(Request):
+    """
+    Request whose multipart file parts stay in memory
+
+    Werkzeug spools parts of bodies over 500 KB to temporary files, which covers
+    most 1080p and 4K camera frames. Crowd images are decoded straight from
+    memory, so they never touch the disk; MAX_CONTENT_LENGTH bounds the buffers.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.max_content_length is None:
+            # No body limit: keep spooling large parts to disk
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return io.BytesIO()
 
 # Initialize Flask app
 app = Flask(__name__)
+app.request_class = InMemoryUploadRequest
+app.json = TimedJSONProvider(app)
 CORS(app)
 
 # Configure logging
@@ -52,60 +93,561 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Prometheus metrics (exposed on /metrics)
+metrics = MetricsRegistry()
+REQUEST_COUNT = metrics.counter(
+    'ai_http_requests_total', 'HTTP requests by endpoint, method and status', ('endpoint', 'method', 'status'))
+REQUEST_LATENCY = metrics.histogram(
+    'ai_http_request_duration_seconds', 'HTTP request latency by endpoint', ('endpoint',))
+REQUESTS_IN_FLIGHT = metrics.gauge(
+    'ai_http_requests_in_flight', 'Requests currently being served', ('endpoint',))
+REQUEST_ERRORS = metrics.counter(
+    'ai_http_errors_total', 'Responses with an error status', ('endpoint', 'status'))
+MODEL_LATENCY = metrics.histogram(
+    'ai_model_inference_seconds', 'Model call latency per backend (amortized per item for batch calls)', ('model', 'backend'))
+MODEL_PREDICTIONS = metrics.counter(
+    'ai_model_predictions_total', 'Predictions served per model backend', ('model', 'backend'))
+MODEL_FALLBACKS = metrics.counter(
+    'ai_model_fallback_total', 'Predictions served by a fallback or mock backend', ('model', 'backend'))
+MODEL_MOCK_RESPONSES = metrics.counter(
+    'ai_model_mock_responses_total', 'Predictions served from generated mock data', ('model',))
+MODEL_UNAVAILABLE = metrics.counter(
+    'ai_model_unavailable_total', 'Requests answered with fallback values because the model is not loaded', ('model',))
+MODEL_CACHE_LOOKUPS = metrics.counter(
+    'ai_model_cache_lookups_total', 'Result cache lookups per outcome (exact, perceptual or miss)', ('model', 'result'))
+MODEL_READY = metrics.gauge(
+    'ai_model_ready', '1 when the model is loaded and serving', ('model',))
+MODEL_LOAD_SECONDS = metrics.gauge(
+    'ai_model_load_seconds', 'Time the last model load took', ('model',))
+REQUEST_PHASE_LATENCY = metrics.histogram(
+    'ai_request_phase_seconds', 'Time spent per request phase (parse, decode, features, scaling, inference, ...)',
+    ('endpoint', 'phase'),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+ADMISSION_REJECTED = metrics.counter(
+    'ai_admission_rejected_total', 'Requests shed by admission control', ('group', 'reason', 'priority'))
+ADMISSION_ACTIVE = metrics.gauge(
+    'ai_admission_active', 'Requests holding an admission slot', ('group',))
+ADMISSION_QUEUED = metrics.gauge(
+    'ai_admission_queued', 'Requests waiting for an admission slot', ('group',))
+ADMISSION_SERVICE_SECONDS = metrics.gauge(
+    'ai_admission_service_seconds', 'EWMA of the time requests hold an admission slot', ('group',))
+
+# Backends (the `model_used` field) that mean the primary model did not serve the request
+FALLBACK_BACKENDS = {'OpenCV_Fallback', 'OpenCV_Heuristic', 'Statistical', 'Mock_Data'}
+MOCK_BACKEND = 'Mock_Data'
+
+def observe_prediction(model_name, result, duration, default_backend='default'):
+    """Record latency and backend counters for one model result"""
+    backend = result.get('model_used', default_backend) if isinstance(result, dict) else default_backend
+    if isinstance(result, dict) and 'cached' in result:
+        MODEL_CACHE_LOOKUPS.inc(model=model_name, result=result.get('cache_match') or 'miss')
+        if result['cached']:
+            # Cache hits would drag the backend's latency histogram down
+            backend = 'cache'
+    MODEL_LATENCY.observe(duration, model=model_name, backend=backend)
+    MODEL_PREDICTIONS.inc(model=model_name, backend=backend)
+    if backend in FALLBACK_BACKENDS:
+        MODEL_FALLBACKS.inc(model=model_name, backend=backend)
+    if backend == MOCK_BACKEND:
+        MODEL_MOCK_RESPONSES.inc(model=model_name)
+
+def observe_batch(model_name, results, duration):
+    """Record metrics for a batch call, amortizing its latency over the items"""
+    scored = [result for result in results if isinstance(result, dict) and 'error' not in result]
+    for result in scored:
+        observe_prediction(model_name, result, duration / len(scored))
+
+def timed_prediction(model_name, predict, default_backend='default'):
+    """Run a model call and record its metrics"""
+    model_start = time.time()
+    result = predict()
+    observe_prediction(model_name, result, time.time() - model_start, default_backend)
+    return result
+
 # Global model instances
 models = {}
 
-def initialize_models():
-    """Initialize all AI models"""
-    try:
-        logger.info("Initializing AI models...")
-        
-        # Initialize models with error handling
-        try:
-            models['crowd_detection'] = CrowdDetectionModel()
-            logger.info("✅ Crowd Detection model initialized")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize Crowd Detection: {e}")
-            models['crowd_detection'] = None
+# Model name -> (module, class); the module is only imported when the model is loaded
+MODEL_CLASSES = {
+    'crowd_detection': ('models.crowd_detection', 'CrowdDetectionModel'),
+    'anomaly_detection': ('models.anomaly_detection', 'AnomalyDetectionModel'),
+    'risk_prediction': ('models.risk_prediction', 'RiskPredictionModel'),
+    'chatbot': ('models.chatbot', 'ChatbotModel')
+}
 
-        try:
-            models['anomaly_detection'] = AnomalyDetectionModel()
-            logger.info("✅ Anomaly Detection model initialized")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize Anomaly Detection: {e}")
-            models['anomaly_detection'] = None
+def _model_factory(module_name, class_name):
+    """Zero-argument factory that imports the model module on first use"""
+    def factory():
+        return getattr(importlib.import_module(module_name), class_name)()
+    return factory
 
-        try:
-            models['risk_prediction'] = RiskPredictionModel()
-            logger.info("✅ Risk Prediction model initialized")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize Risk Prediction: {e}")
-            models['risk_prediction'] = None
+def _enabled_models():
+    """Models to load in this process (ENABLED_MODELS, comma separated; default all)"""
+    names = [name.strip() for name in os.getenv('ENABLED_MODELS', '').split(',') if name.strip()]
+    if not names:
+        return list(MODEL_CLASSES)
+    unknown = [name for name in names if name not in MODEL_CLASSES]
+    if unknown:
+        logger.warning(f"⚠️ Ignoring unknown ENABLED_MODELS entries: {', '.join(unknown)}")
+    return [name for name in MODEL_CLASSES if name in names]
 
-        try:
-            models['chatbot'] = ChatbotModel()
-            logger.info("✅ Chatbot model initialized")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize Chatbot: {e}")
-            models['chatbot'] = None
+ENABLED_MODELS = _enabled_models()
+
+def _required_models():
+    """Models /ready requires (REQUIRED_MODELS, comma separated; default all enabled models)"""
+    names = [name.strip() for name in os.getenv('REQUIRED_MODELS', '').split(',') if name.strip()]
+    if not names:
+        return list(ENABLED_MODELS)
+    ignored = [name for name in names if name not in ENABLED_MODELS]
+    if ignored:
+        logger.warning(f"⚠️ Ignoring REQUIRED_MODELS entries that are not enabled: {', '.join(ignored)}")
+    return [name for name in ENABLED_MODELS if name in names]
+
+REQUIRED_MODELS = _required_models()
+
+# Model factories, loaded concurrently by the model loader
+MODEL_FACTORIES = {name: _model_factory(*MODEL_CLASSES[name]) for name in ENABLED_MODELS}
+
+model_loader = ModelLoader(models, max_workers=int(os.getenv('MODEL_LOADER_WORKERS', 4)))
+
+# Start-up import budget; heavy packages imported before any model loads are reported
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', 500))
+HEAVY_MODULES = ('cv2', 'sklearn', 'pandas', 'scipy', 'torch', 'ultralytics', 'onnxruntime', 'tensorflow')
+import_report = {}
+
+def report_startup_imports():
+    """Log the start-up import summary and warn when it exceeds IMPORT_BUDGET_MS"""
+    if not import_timer.records:
+        return
+    summary = import_timer.summary()
+    import_report['startup'] = summary
+    total_ms = summary['total_seconds'] * 1000
+    logger.info(f"📦 Start-up imports: {import_timer.format_summary()}")
+
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+    if heavy:
+        logger.warning(f"⚠️ Heavy modules imported at start-up: {', '.join(heavy)}")
+    if total_ms > IMPORT_BUDGET_MS:
+        logger.warning(f"⚠️ Start-up imports took {total_ms:.0f}ms, over the {IMPORT_BUDGET_MS:.0f}ms budget (IMPORT_BUDGET_MS)")
 
-        logger.info("Model initialization completed")
+def report_model_imports():
+    """Log what loading the enabled models imported, then stop timing imports"""
+    if not import_timer.records:
+        return
+    since = import_report.get('startup', {}).get('modules', 0)  # Records before this are start-up imports
+    import_report['models'] = import_timer.summary(since=since)
+    logger.info(f"📦 Model imports: {import_timer.format_summary(since=since)}")
+    import_timer.uninstall()
+
+def initialize_models(wait=False):
+    """Initialize all AI models concurrently in a worker pool
+    
+    Args:
+        wait (bool): Block until every model has finished loading
+    """
+    try:
+        logger.info(f"Initializing AI models: {', '.join(MODEL_FACTORIES) or 'none'}")
+        model_loader.start(MODEL_FACTORIES)
+        model_loader.on_idle(report_model_imports)
+
+        if wait:
+            model_loader.wait()
+            logger.info("Model initialization completed")
         
     except Exception as e:
         logger.error(f"Failed to initialize models: {e}")
         raise
 
+def model_loading_response(model_name):
+    """Fast 503 for a model that is still being initialized"""
+    status = model_loader.status().get(model_name, {})
+    response = jsonify({
+        'error': f'{model_name} model is still loading',
+        'state': status.get('state', 'loading'),
+        'elapsed': status.get('elapsed'),
+        'note': 'Retry once /ready reports the model as ready'
+    })
+    response.headers['Retry-After'] = os.getenv('MODEL_LOADING_RETRY_AFTER', '5')
+    return response, 503
+
+# Micro-batching: coalesce concurrent single-item requests into batched model calls
+MICRO_BATCHING_ENABLED = os.getenv('MICRO_BATCHING_ENABLED', 'False').lower() == 'true'
+MICRO_BATCH_SETTINGS = {
+    'min_window': float(os.getenv('MICRO_BATCH_MIN_WINDOW_MS', 2)) / 1000,
+    'max_window': float(os.getenv('MICRO_BATCH_MAX_WINDOW_MS', 10)) / 1000,
+    'max_batch_size': int(os.getenv('MICRO_BATCH_MAX_SIZE', 32)),
+    'latency_budget': float(os.getenv('MICRO_BATCH_LATENCY_BUDGET_MS', 100)) / 1000
+}
+MICRO_BATCH_TIMEOUT = float(os.getenv('MICRO_BATCH_TIMEOUT', 30))
+
+batchers = {}
+if MICRO_BATCHING_ENABLED:
+    batchers = {
+        'crowd_detection': MicroBatcher(
+            'crowd_detection',
+            lambda items: models['crowd_detection'].predict_batch(items),
+            **MICRO_BATCH_SETTINGS
+        ),
+        'anomaly_detection': MicroBatcher(
+            'anomaly_detection',
+            lambda items: models['anomaly_detection'].predict_batch(items),
+            **MICRO_BATCH_SETTINGS
+        ),
+        'risk_prediction': MicroBatcher(
+            'risk_prediction',
+            lambda items: models['risk_prediction'].predict_batch(items),
+            **MICRO_BATCH_SETTINGS
+        )
+    }
+
+def _compute_zone_risk(entries):
+    """Risk feed recompute: one batch model call for every zone that needs a new score"""
+    if not models.get('risk_prediction'):
+        raise RuntimeError('Risk prediction model not available')
+    model_start = time.time()
+    results = models['risk_prediction'].predict_batch(entries)
+    observe_batch('risk_prediction', results, time.time() - model_start)
+    return results
+
+# Live zone risk feed: inputs published per zone, scores pushed to SSE subscribers on change.
+# State lives in this process, so the feed needs a single serving process (launcher.py turns
+# it off when it starts more than one worker)
+RISK_FEED_ENABLED = os.getenv('RISK_FEED_ENABLED', 'True').lower() == 'true'
+risk_feed = RiskFeed(
+    _compute_zone_risk,
+    delta=float(os.getenv('RISK_FEED_DELTA', 0.05)),
+    refresh_interval=float(os.getenv('RISK_FEED_REFRESH_SECONDS', 60)),
+    max_zones=int(os.getenv('RISK_FEED_MAX_ZONES', 10000)),
+    max_subscribers=int(os.getenv('RISK_FEED_MAX_SUBSCRIBERS', 256))
+)
+RISK_FEED_KEEPALIVE = float(os.getenv('RISK_FEED_KEEPALIVE_SECONDS', 15))
+
+def predict_single(model_name, item, predict):
+    """Run a single-item prediction, through the model's micro-batcher when enabled
+    
+    Args:
+        model_name (str): Model key in `models`
+        item: Input accepted by the model's predict_batch
+        predict (callable): Direct single-item call, used without batching or
+            when the batch rejects the item
+    """
+    batcher = batchers.get(model_name)
+    if batcher is None:
+        return predict()
+
+    # Model phases run on the batcher thread; the whole batched call counts as inference here
+    with phase('inference'):
+        result = batcher.submit(item, timeout=MICRO_BATCH_TIMEOUT)
+    if 'error' in result:
+        # Batch APIs isolate bad items; the single-item contract falls back instead
+        return predict()
+    return result
+
 # Configure upload settings
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', 16)) * 1024 * 1024  # 16MB max request size
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
+# Routes that read their request body incrementally; nothing may buffer it before the view
+# (asgi.py also hands these bodies to Flask as they arrive)
+STREAMING_INPUT_ROUTES = {'/predict/anomaly-detection/stream', '/predict/crowd-detection/video'}
+ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm', 'mjpeg', 'mjpg'}
+
+# Crowd video: uploaded files go through cv2.VideoCapture, raw MJPEG bodies are read incrementally;
+# the body limit replaces MAX_UPLOAD_MB for this route
+CROWD_VIDEO_MAX_MB = int(os.getenv('CROWD_VIDEO_MAX_MB', 512))
+CROWD_VIDEO_READ_BYTES = int(os.getenv('CROWD_VIDEO_READ_BYTES', 64 * 1024))
+
+MAX_BATCH_IMAGES = int(os.getenv('MAX_BATCH_IMAGES', 256))
+MAX_BATCH_ENTRIES = int(os.getenv('MAX_BATCH_ENTRIES', 1000))
+
+# Streaming anomaly scoring (NDJSON in, NDJSON out); the body limit replaces MAX_UPLOAD_MB for this route
+ANOMALY_STREAM_MAX_MB = int(os.getenv('ANOMALY_STREAM_MAX_MB', 1024))
+ANOMALY_STREAM_MAX_LINE_BYTES = int(os.getenv('ANOMALY_STREAM_MAX_LINE_BYTES', 64 * 1024))
+ANOMALY_STREAM_READ_BYTES = int(os.getenv('ANOMALY_STREAM_READ_BYTES', 8 * 1024))  # Read block size (chunked bodies fill whole blocks)
+ANOMALY_STREAM_BATCH_WINDOWS = int(os.getenv('ANOMALY_STREAM_BATCH_WINDOWS', 16))
+ANOMALY_STREAM_MAX_DELAY_MS = float(os.getenv('ANOMALY_STREAM_MAX_DELAY_MS', 250))
+
+# Per-phase timings: returned in a `timings` object when a request asks for them
+# (?timings=1 or an X-Timings: 1 header); recorded into metrics for every /predict request
+PHASE_TIMINGS_METRICS = os.getenv('PHASE_TIMINGS_METRICS', 'True').lower() == 'true'
+
+def _timings_requested():
+    flag = request.args.get('timings') or request.headers.get('X-Timings')
+    return bool(flag) and flag.lower() in ('1', 'true', 'yes')
+
+# Uploads are decoded in memory; set to keep the temp-file path for debugging
+DEBUG_SAVE_UPLOADS = os.getenv('CROWD_DEBUG_SAVE_UPLOADS', 'False').lower() == 'true'
+
+# Admission control: per-endpoint-group concurrency limits with bounded wait queues.
+# Routes outside these groups (/health, /ready, /metrics, ...) are never limited.
+ADMISSION_CONTROL_ENABLED = os.getenv('ADMISSION_CONTROL_ENABLED', 'True').lower() == 'true'
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 2))
+
+# Route prefix -> (group, default concurrency, default queue length)
+ADMISSION_ROUTES = {
+    # Video streams hold their slot for the whole stream (listed before the crowd prefix)
+    '/predict/crowd-detection/video': ('crowd_video', 2, 2),
+    '/predict/crowd-detection': ('crowd_detection', 2, 8),
+    # Streams hold their slot for the whole upload, so they get their own group (listed before its prefix)
+    '/predict/anomaly-detection/stream': ('anomaly_stream', 4, 4),
+    '/predict/anomaly-detection': ('anomaly_detection', 8, 32),
+    '/predict/risk-prediction': ('risk_prediction', 4, 16),
+    '/predict/chatbot': ('chatbot', 16, 64)
+}
+
+admission_limiters = {}
+if ADMISSION_CONTROL_ENABLED:
+    for group, default_concurrency, default_queue in ADMISSION_ROUTES.values():
+        admission_limiters[group] = AdmissionLimiter(
+            group,
+            max_concurrent=int(os.getenv(f'ADMISSION_{group.upper()}_CONCURRENCY', default_concurrency)),
+            max_queue=int(os.getenv(f'ADMISSION_{group.upper()}_QUEUE', default_queue)),
+            queue_timeout=ADMISSION_QUEUE_TIMEOUT
+        )
+
+def _admission_group(path):
+    """Limiter group for a request path, or None for unlimited routes"""
+    for prefix, (group, _, _) in ADMISSION_ROUTES.items():
+        if path == prefix or path.startswith(prefix + '/'):
+            return group
+    return None
+
+def _request_priority(group):
+    """Priority class of the current request"""
+    if group == 'chatbot':
+        data = request.get_json(silent=True) or {}
+        if is_emergency_message(data.get('message')):
+            return PRIORITY_CRITICAL
+        return PRIORITY_HIGH
+    return PRIORITY_NORMAL
+
+# On-demand profiling: a request with `X-Profile: cprofile|sample` (or ?profile=...) and a
+# matching `X-Profile-Token` runs under the profiler; output goes to a rotating PROFILE_DIR
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+PROFILING_ADMIN_TOKEN = os.getenv('PROFILING_ADMIN_TOKEN', '')
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 1)) / 1000
+profile_store = ProfileStore(
+    os.getenv('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.profiles')),
+    max_profiles=int(os.getenv('PROFILE_MAX_FILES', 50))
+)
+
+# Continuous low-rate sampling of every /predict request, aggregated per endpoint
+PROFILING_CONTINUOUS_HZ = float(os.getenv('PROFILING_CONTINUOUS_HZ', 0))
+continuous_sampler = ContinuousSampler(1.0 / PROFILING_CONTINUOUS_HZ) if PROFILING_CONTINUOUS_HZ > 0 else None
+
+if PROFILING_ENABLED and not PROFILING_ADMIN_TOKEN:
+    logger.warning("PROFILING_ENABLED is set but PROFILING_ADMIN_TOKEN is empty; on-demand profiling stays off")
+
+def _profile_token_valid():
+    token = request.headers.get('X-Profile-Token', '')
+    return bool(PROFILING_ADMIN_TOKEN) and hmac.compare_digest(token.encode(), PROFILING_ADMIN_TOKEN.encode())
+
+def _profile_mode():
+    """Profiler mode requested (and authorized) for this request, or None"""
+    if not PROFILING_ENABLED:
+        return None
+    mode = (request.headers.get('X-Profile') or request.args.get('profile') or '').lower()
+    if not mode:
+        return None
+    if mode in ('1', 'true'):
+        mode = MODE_CPROFILE
+    if mode not in PROFILE_MODES:
+        return None
+    if not _profile_token_valid():
+        logger.warning(f"Rejected profiling request for {request.path}: invalid token")
+        return None
+    return mode
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _endpoint_label():
+    """Route template for metric labels (keeps label cardinality bounded)"""
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.time()
+    g.metrics_endpoint = _endpoint_label()
+    REQUESTS_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+    g.timings_requested = _timings_requested()
+    if g.timings_requested or (PHASE_TIMINGS_METRICS and request.path.startswith('/predict/')):
+        g.timing_token = start_timing()
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = g.get('metrics_endpoint', _endpoint_label())
+    REQUEST_COUNT.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+    if 'request_start' in g:
+        REQUEST_LATENCY.observe(time.time() - g.request_start, endpoint=endpoint)
+    if response.status_code >= 400:
+        REQUEST_ERRORS.inc(endpoint=endpoint, status=str(response.status_code))
+
+    timings = current_timings()
+    if timings is not None:
+        for name, seconds in timings.phases.items():
+            REQUEST_PHASE_LATENCY.observe(seconds, endpoint=endpoint, phase=name)
+        if g.get('timings_requested'):
+            attach_timings(response, timings.as_dict())
+    return response
+
+def attach_timings(response, timings):
+    """Add the phase breakdown to a JSON response body and a Server-Timing header"""
+    response.headers['Server-Timing'] = ', '.join(f'{name};dur={duration}' for name, duration in timings.items())
+    if response.is_json and not response.is_streamed:
+        data = response.get_json(silent=True)
+        if isinstance(data, dict):
+            data['timings'] = timings
+            response.set_data(app.json.dumps(data))
+
+@app.before_request
+def admit_request():
+    """Shed load before the request body is read when an endpoint group is saturated"""
+    group = _admission_group(request.path)
+    limiter = admission_limiters.get(group)
+    if limiter is None:
+        return None
+
+    with phase('parse'):
+        priority = _request_priority(group)
+    try:
+        with phase('queue'):
+            limiter.acquire(priority)
+    except AdmissionRejected as e:
+        ADMISSION_REJECTED.inc(group=group, reason=e.reason, priority=PRIORITY_NAMES[priority])
+        logger.warning(f"Shedding {request.path}: {e} (retry after {e.retry_after}s)")
+        response = jsonify({
+            'error': 'Service overloaded',
+            'details': f'{group} is at capacity ({e.reason})',
+            'retry_after': e.retry_after
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+
+    g.admission_limiter = limiter
+    g.admission_start = time.time()
+    return None
+
+@app.before_request
+def start_profiling():
+    """Start the on-demand profiler and/or register with the continuous sampler"""
+    if continuous_sampler is not None and request.path.startswith('/predict/'):
+        continuous_sampler.register(g.metrics_endpoint)
+        g.continuous_sampled = True
+
+    mode = _profile_mode()
+    if mode is None:
+        return None
+    session = CProfileSession() if mode == MODE_CPROFILE else SamplingSession(PROFILE_SAMPLE_INTERVAL)
+    g.profile_session = session
+    g.profile_start = time.perf_counter()
+    session.start()
+    return None
+
+@app.after_request
+def finish_profiling(response):
+    """Stop the on-demand profiler and write its output"""
+    session = g.pop('profile_session', None)
+    if session is None:
+        return response
+
+    session.stop()
+    duration = time.perf_counter() - g.profile_start
+    endpoint = g.get('metrics_endpoint', _endpoint_label())
+    timings = current_timings()
+    try:
+        basename = profile_store.basename(endpoint, duration)
+        paths = profile_store.write(basename, session.outputs(), {
+            'endpoint': endpoint,
+            'path': request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'mode': session.mode,
+            'duration_ms': round(duration * 1000, 3),
+            'timings': timings.as_dict() if timings is not None else None,
+            'timestamp': time.time()
+        })
+        response.headers['X-Profile-File'] = os.path.basename(paths[0])
+        logger.info(f"🔬 Profiled {request.method} {request.path} ({session.mode}, {duration * 1000:.1f}ms) -> {paths[0]}")
+    except Exception as e:
+        logger.error(f"Failed to write profile: {e}")
+    return response
+
+@app.before_request
+def parse_request_body():
+    """Parse the body up front when timing, so parsing shows up as its own phase"""
+    if current_timings() is None or request.method != 'POST':
+        return None
+    if request.path in STREAMING_INPUT_ROUTES:
+        return None  # Read incrementally by the view
+    with phase('parse'):
+        if request.is_json:
+            request.get_json(silent=True)
+        elif request.mimetype == 'multipart/form-data':
+            request.files
+    return None
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'metrics_endpoint' in g:
+        REQUESTS_IN_FLIGHT.dec(endpoint=g.metrics_endpoint)
+    if 'timing_token' in g:
+        stop_timing(g.pop('timing_token'))
+    if 'admission_limiter' in g:
+        g.admission_limiter.release(time.time() - g.admission_start)
+    if 'profile_session' in g:
+        # after_request did not run (unhandled error)
+        g.pop('profile_session').stop()
+    if g.get('continuous_sampled'):
+        continuous_sampler.unregister()
+
+def collect_model_metrics():
+    """Refresh model state gauges before each scrape"""
+    for name, status in model_loader.status().items():
+        MODEL_READY.set(1 if models.get(name) is not None else 0, model=name)
+        if status.get('load_time') is not None:
+            MODEL_LOAD_SECONDS.set(status['load_time'], model=name)
+
+def collect_admission_metrics():
+    """Refresh admission control gauges before each scrape"""
+    for group, limiter in admission_limiters.items():
+        stats = limiter.stats()
+        ADMISSION_ACTIVE.set(stats['active'], group=group)
+        ADMISSION_QUEUED.set(stats['queued'], group=group)
+        if stats['service_time_ms'] is not None:
+            ADMISSION_SERVICE_SECONDS.set(stats['service_time_ms'] / 1000, group=group)
+
+metrics.add_collector(collect_model_metrics)
+metrics.add_collector(collect_admission_metrics)
+
+# Metrics endpoint
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics in text exposition format"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+# Continuous profiling stacks
+@app.route('/debug/profile/stacks', methods=['GET'])
+def profile_stacks():
+    """Aggregated collapsed stacks per endpoint (flamegraph.pl / speedscope input)"""
+    if continuous_sampler is None:
+        return jsonify({'error': 'Continuous profiling is disabled', 'details': 'Set PROFILING_CONTINUOUS_HZ'}), 404
+    if not _profile_token_valid():
+        return jsonify({'error': 'Invalid profiling token'}), 403
+
+    if request.args.get('format') == 'json':
+        return jsonify(continuous_sampler.stats())
+
+    folded = continuous_sampler.folded(request.args.get('endpoint'))
+    if request.args.get('reset', '').lower() in ('1', 'true'):
+        continuous_sampler.reset()
+    return Response(folded, content_type='text/plain; charset=utf-8')
+
 # Health check endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -117,13 +659,40 @@ def health_check():
         'chatbot': models.get('chatbot') is not None
     }
     
-    return jsonify({
+    response = {
         'status': 'healthy',
         'timestamp': time.time(),
         'models': model_status,
         'total_models': len([m for m in model_status.values() if m]),
+        'enabled_models': ENABLED_MODELS,
         'version': '1.0.0'
-    })
+    }
+    if batchers:
+        response['micro_batching'] = {name: batcher.stats() for name, batcher in batchers.items()}
+    if admission_limiters:
+        response['admission'] = {name: limiter.stats() for name, limiter in admission_limiters.items()}
+    if RISK_FEED_ENABLED:
+        response['risk_feed'] = risk_feed.stats()
+    crowd_cache = getattr(models.get('crowd_detection'), 'result_cache', None)
+    if crowd_cache is not None:
+        response['crowd_cache'] = crowd_cache.stats()
+
+    return jsonify(response)
+
+# Readiness endpoint
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint with per-model load state and timings; 503 while loading or when a required model failed"""
+    ready = model_loader.is_ready(required=REQUIRED_MODELS)
+    
+    return jsonify({
+        'ready': ready,
+        'timestamp': time.time(),
+        'models': model_loader.status(),
+        'required': REQUIRED_MODELS,
+        'failed': [name for name in model_loader.failed() if name in REQUIRED_MODELS],
+        'imports': import_report
+    }), 200 if ready else 503
 
 # Root endpoint
 @app.route('/', methods=['GET'])
@@ -134,15 +703,39 @@ def root():
         'version': '1.0.0',
         'endpoints': {
             '/health': 'Health check',
+            '/ready': 'Per-model readiness and load timings',
+            '/metrics': 'Prometheus metrics',
             '/predict/crowd-detection': 'Analyze crowd in image',
+            '/predict/crowd-detection/batch': 'Analyze crowd in many images at once',
+            '/predict/crowd-detection/video': 'Stream a smoothed crowd time series for a video or MJPEG stream',
             '/predict/anomaly-detection': 'Detect behavioral anomalies',
+            '/predict/anomaly-detection/batch': 'Detect anomalies in many named streams at once',
+            '/predict/anomaly-detection/stream': 'Stream per-window anomaly scores for an NDJSON series',
             '/predict/risk-prediction': 'Predict risk levels',
+            '/predict/risk-prediction/batch': 'Predict risk levels for many zones at once',
+            '/predict/risk-prediction/zones': 'Publish zone risk inputs to the live feed',
+            '/stream/risk-prediction': 'Live zone risk updates (Server-Sent Events)',
             '/predict/chatbot': 'Chatbot conversation'
         },
         'status': 'running',
         'timestamp': time.time()
     })
 
+def _predict_crowd_from_temp_file(file):
+    """Save the upload to UPLOAD_FOLDER and predict from disk (debug mode only)"""
+    filename = secure_filename(file.filename)
+    timestamp = str(int(time.time()))
+    filename = f"{timestamp}_{filename}"
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    file.save(filepath)
+
+    try:
+        return models['crowd_detection'].predict(filepath)
+    finally:
+        # Clean up uploaded file
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
 # Crowd Detection Endpoint
 @app.route('/predict/crowd-detection', methods=['POST'])
 def predict_crowd():
@@ -150,8 +743,13 @@ def predict_crowd():
     start_time = time.time()
     
     try:
+        # Fast 503 while the model is still loading
+        if model_loader.is_loading('crowd_detection'):
+            return model_loading_response('crowd_detection')
+
         # Check if model is available
         if not models.get('crowd_detection'):
+            MODEL_UNAVAILABLE.inc(model='crowd_detection')
             return jsonify({
                 'error': 'Crowd detection model not available',
                 'crowd_density': 0.5,  # Fallback value
@@ -171,37 +769,30 @@ def predict_crowd():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file type'}), 400
 
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        timestamp = str(int(time.time()))
-        filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-
-        try:
-            # Perform crowd detection
-            result = models['crowd_detection'].predict(filepath)
-            
-            # Clean up uploaded file
-            os.remove(filepath)
-            
-            processing_time = time.time() - start_time
-            
-            return jsonify({
-                'crowd_density': result.get('crowd_density', 0.5),
-                'crowd_count': result.get('crowd_count', 0),
-                'detected_objects': result.get('detected_objects', []),
-                'confidence': result.get('confidence', 0.8),
-                'risk_score': result.get('risk_score', 0.3),
-                'processing_time': processing_time,
-                'timestamp': time.time()
-            })
-
-        except Exception as e:
-            # Clean up file on error
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            raise e
+        if DEBUG_SAVE_UPLOADS:
+            # Debug mode: keep the legacy temp-file round trip
+            result = timed_prediction('crowd_detection', lambda: _predict_crowd_from_temp_file(file))
+        else:
+            # Decode straight from the request stream, no filesystem round trip
+            image_bytes = memoryview(file.stream.read())
+            result = timed_prediction('crowd_detection', lambda: predict_single(
+                'crowd_detection',
+                image_bytes,
+                lambda: models['crowd_detection'].predict(image_bytes)
+            ))
+        
+        processing_time = time.time() - start_time
+        
+        return jsonify({
+            'crowd_density': result.get('crowd_density', 0.5),
+            'crowd_count': result.get('crowd_count', 0),
+            'detected_objects': result.get('detected_objects', []),
+            'confidence': result.get('confidence', 0.8),
+            'risk_score': result.get('risk_score', 0.3),
+            'cached': result.get('cached', False),
+            'processing_time': processing_time,
+            'timestamp': time.time()
+        })
 
     except Exception as e:
         logger.error(f"Crowd detection error: {e}")
@@ -214,6 +805,166 @@ def predict_crowd():
             'confidence': 0.2
         }), 500
 
+# Batch Crowd Detection Endpoint
+@app.route('/predict/crowd-detection/batch', methods=['POST'])
+def predict_crowd_batch():
+    """Analyze crowd density and count for many uploaded images in one call"""
+    start_time = time.time()
+    
+    try:
+        # Fast 503 while the model is still loading
+        if model_loader.is_loading('crowd_detection'):
+            return model_loading_response('crowd_detection')
+
+        # Check if model is available
+        if not models.get('crowd_detection'):
+            MODEL_UNAVAILABLE.inc(model='crowd_detection')
+            return jsonify({
+                'error': 'Crowd detection model not available',
+                'note': 'Using fallback values'
+            }), 503
+
+        files = request.files.getlist('images') or request.files.getlist('image')
+        if not files:
+            return jsonify({'error': 'No image files provided'}), 400
+
+        if len(files) > MAX_BATCH_IMAGES:
+            return jsonify({'error': f'Too many images (max {MAX_BATCH_IMAGES})'}), 400
+
+        # Reject bad uploads per image instead of failing the whole batch
+        results = [None] * len(files)
+        sources = []
+        source_indices = []
+        for index, file in enumerate(files):
+            if file.filename == '' or not allowed_file(file.filename):
+                results[index] = {'error': 'Invalid file type'}
+                continue
+            sources.append(memoryview(file.stream.read()))
+            source_indices.append(index)
+
+        model_start = time.time()
+        batch_results = models['crowd_detection'].predict_batch(sources) if sources else []
+        observe_batch('crowd_detection', batch_results, time.time() - model_start)
+        for index, result in zip(source_indices, batch_results):
+            results[index] = result
+
+        images = []
+        for index, (file, result) in enumerate(zip(files, results)):
+            entry = {'index': index, 'filename': file.filename}
+            if 'error' in result:
+                entry.update({'error': result['error'], 'details': result.get('details')})
+            else:
+                entry.update({
+                    'crowd_density': result.get('crowd_density', 0.5),
+                    'crowd_count': result.get('crowd_count', 0),
+                    'detected_objects': result.get('detected_objects', []),
+                    'confidence': result.get('confidence', 0.8),
+                    'risk_score': result.get('risk_score', 0.3),
+                    'model_used': result.get('model_used'),
+                    'cached': result.get('cached', False)
+                })
+            images.append(entry)
+
+        processing_time = time.time() - start_time
+        
+        return jsonify({
+            'results': images,
+            'total_images': len(images),
+            'failed_images': len([entry for entry in images if 'error' in entry]),
+            'processing_time': processing_time,
+            'timestamp': time.time()
+        })
+
+    except Exception as e:
+        logger.error(f"Batch crowd detection error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            'error': 'Failed to analyze crowd batch',
+            'details': str(e)
+        }), 500
+
+def _video_option(name, cast, default=None):
+    value = request.args.get(name)
+    return default if value in (None, '') else cast(value)
+
+# Crowd Video Endpoint
+@app.route('/predict/crowd-detection/video', methods=['POST'])
+def predict_crowd_video():
+    """Analyze a video upload or a raw MJPEG stream, streaming one NDJSON sample per inferred frame"""
+    # Fast 503 while the model is still loading
+    if model_loader.is_loading('crowd_detection'):
+        return model_loading_response('crowd_detection')
+
+    if not models.get('crowd_detection'):
+        MODEL_UNAVAILABLE.inc(model='crowd_detection')
+        return jsonify({'error': 'Crowd detection model not available'}), 503
+
+    try:
+        options = {
+            'every_n': _video_option('every_n', int),
+            'motion_threshold': _video_option('motion_threshold', float),
+            'smoothing': _video_option('smoothing', str),
+            'fps': _video_option('fps', float),
+            'max_frames': _video_option('max_frames', int)
+        }
+    except ValueError:
+        return jsonify({'error': 'Invalid video options', 'details': 'every_n and max_frames must be integers, motion_threshold and fps numbers'}), 400
+    if options['smoothing'] not in (None, 'ewma', 'kalman'):
+        return jsonify({'error': 'Invalid video options', 'details': "smoothing must be 'ewma' or 'kalman'"}), 400
+
+    filepath = None
+    if request.mimetype == 'multipart/form-data':
+        # Video file: cv2.VideoCapture needs a path, so the upload goes to UPLOAD_FOLDER.
+        # Parsed here rather than via request.files so CROWD_VIDEO_MAX_MB replaces MAX_UPLOAD_MB
+        _, _, files = parse_form_data(request.environ, max_content_length=CROWD_VIDEO_MAX_MB * 1024 * 1024)
+        file = files.get('video')
+        if file is None or file.filename == '':
+            return jsonify({'error': 'No video file provided'}), 400
+        extension = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+        if extension not in ALLOWED_VIDEO_EXTENSIONS:
+            return jsonify({'error': 'Invalid file type'}), 400
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{int(time.time())}_{secure_filename(file.filename)}")
+        file.save(filepath)
+        source = filepath
+    else:
+        # Raw MJPEG body (multipart/x-mixed-replace or concatenated JPEGs), read as it arrives
+        source = get_input_stream(request.environ, max_content_length=CROWD_VIDEO_MAX_MB * 1024 * 1024)
+
+    model = models['crowd_detection']
+    stats = {}
+
+    def generate():
+        start_time = time.time()
+        summary = {}
+        try:
+            for sample in model.predict_video(source, read_size=CROWD_VIDEO_READ_BYTES, stats=stats, **options):
+                observe_prediction('crowd_detection', sample, sample['inference_time'])
+                yield app.json.dumps(sample) + '\n'
+        except Exception as e:
+            logger.error(f"Crowd video error: {e}")
+            logger.error(traceback.format_exc())
+            summary.update({'error': 'Failed to analyze video', 'details': str(e)})
+        finally:
+            if filepath and os.path.exists(filepath):
+                os.remove(filepath)
+
+        frames = stats.get('frames', 0)
+        summary.update({
+            'frames': frames,
+            'inferred_frames': stats.get('inferred', 0),
+            'inference_ratio': round(stats.get('inferred', 0) / frames, 3) if frames else None,
+            'triggers': stats.get('triggers', {}),
+            'processing_time': time.time() - start_time,
+            'timestamp': time.time()
+        })
+        yield app.json.dumps({'summary': summary}) + '\n'
+
+    response = Response(stream_with_context(generate()), content_type='application/x-ndjson')
+    if filepath:
+        # Also runs when the client disconnects before the stream starts
+        response.call_on_close(lambda: os.path.exists(filepath) and os.remove(filepath))
+    return response
+
 # Anomaly Detection Endpoint
 @app.route('/predict/anomaly-detection', methods=['POST'])
 def predict_anomaly():
@@ -221,8 +972,13 @@ def predict_anomaly():
     start_time = time.time()
     
     try:
+        # Fast 503 while the model is still loading
+        if model_loader.is_loading('anomaly_detection'):
+            return model_loading_response('anomaly_detection')
+
         # Check if model is available
         if not models.get('anomaly_detection'):
+            MODEL_UNAVAILABLE.inc(model='anomaly_detection')
             return jsonify({
                 'error': 'Anomaly detection model not available',
                 'anomaly_detected': False,
@@ -242,7 +998,11 @@ def predict_anomaly():
             return jsonify({'error': 'No data array provided'}), 400
 
         # Perform anomaly detection
-        result = models['anomaly_detection'].predict(input_data, time_window)
+        result = timed_prediction('anomaly_detection', lambda: predict_single(
+            'anomaly_detection',
+            {'data': input_data, 'time_window': time_window},
+            lambda: models['anomaly_detection'].predict(input_data, time_window)
+        ))
         
         processing_time = time.time() - start_time
         
@@ -267,6 +1027,186 @@ def predict_anomaly():
             'confidence': 0.2
         }), 500
 
+# Batch Anomaly Detection Endpoint
+@app.route('/predict/anomaly-detection/batch', methods=['POST'])
+def predict_anomaly_batch():
+    """Detect behavioral anomalies for many named streams in one call"""
+    start_time = time.time()
+    
+    try:
+        # Fast 503 while the model is still loading
+        if model_loader.is_loading('anomaly_detection'):
+            return model_loading_response('anomaly_detection')
+
+        # Check if model is available
+        if not models.get('anomaly_detection'):
+            MODEL_UNAVAILABLE.inc(model='anomaly_detection')
+            return jsonify({
+                'error': 'Anomaly detection model not available',
+                'note': 'Using fallback values'
+            }), 503
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        streams = data.get('streams', [])
+        time_window = data.get('time_window', 60)
+
+        if not streams or not isinstance(streams, list):
+            return jsonify({'error': 'No streams array provided'}), 400
+
+        if len(streams) > MAX_BATCH_ENTRIES:
+            return jsonify({'error': f'Too many streams (max {MAX_BATCH_ENTRIES})'}), 400
+
+        if not all(isinstance(stream, dict) for stream in streams):
+            return jsonify({'error': 'Each stream must be an object'}), 400
+
+        # Score every stream in one scaler/PCA/forest pass
+        model_start = time.time()
+        results = models['anomaly_detection'].predict_batch(streams, time_window)
+        observe_batch('anomaly_detection', results, time.time() - model_start)
+
+        stream_results = []
+        for index, (stream, result) in enumerate(zip(streams, results)):
+            entry = {'index': index, 'name': stream.get('name')}
+            if 'error' in result:
+                entry['error'] = result['error']
+            else:
+                entry.update({
+                    'anomaly_detected': result.get('anomaly_detected', False),
+                    'anomaly_score': result.get('anomaly_score', 0.0),
+                    'confidence': result.get('confidence', 0.8),
+                    'patterns': result.get('patterns', []),
+                    'recommendations': result.get('recommendations', []),
+                    'data_points_analyzed': result.get('data_points_analyzed', 0)
+                })
+            stream_results.append(entry)
+        
+        processing_time = time.time() - start_time
+        
+        return jsonify({
+            'results': stream_results,
+            'total_streams': len(stream_results),
+            'anomalous_streams': len([entry for entry in stream_results if entry.get('anomaly_detected')]),
+            'processing_time': processing_time,
+            'timestamp': time.time()
+        })
+
+    except Exception as e:
+        logger.error(f"Batch anomaly detection error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            'error': 'Failed to detect anomalies in batch',
+            'details': str(e)
+        }), 500
+
+def _ndjson_points(stream, counters):
+    """
+    Read data points from an NDJSON body one line at a time
+
+    Every point must be of the same kind as the first (number, feature list or
+    feature object); blank lines are ignored, invalid or mismatched lines are
+    counted in counters['skipped']. An over-long line stops reading and is
+    reported in counters['error'].
+    """
+    kind = None
+    while True:
+        line = stream.readline(ANOMALY_STREAM_MAX_LINE_BYTES + 1)
+        if not line:
+            return
+        counters['lines'] += 1
+        if len(line) > ANOMALY_STREAM_MAX_LINE_BYTES:
+            # End the input here; windows read so far are still scored
+            counters['error'] = f"Line {counters['lines']} is longer than {ANOMALY_STREAM_MAX_LINE_BYTES} bytes"
+            return
+
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            point = app.json.loads(line)
+        except ValueError:
+            counters['skipped'] += 1
+            continue
+
+        point_kind = 'number' if isinstance(point, (int, float)) and not isinstance(point, bool) else type(point).__name__
+        if point_kind not in ('number', 'list', 'dict') or (kind is not None and point_kind != kind):
+            counters['skipped'] += 1
+            continue
+
+        kind = point_kind
+        counters['points'] += 1
+        yield point
+
+# Streaming Anomaly Detection Endpoint
+@app.route('/predict/anomaly-detection/stream', methods=['POST'])
+def predict_anomaly_stream():
+    """Score a long NDJSON series incrementally, streaming per-window results back as NDJSON"""
+    # Fast 503 while the model is still loading
+    if model_loader.is_loading('anomaly_detection'):
+        return model_loading_response('anomaly_detection')
+
+    if not models.get('anomaly_detection'):
+        MODEL_UNAVAILABLE.inc(model='anomaly_detection')
+        return jsonify({'error': 'Anomaly detection model not available'}), 503
+
+    try:
+        window_size = int(request.args.get('window', 60))
+        step = int(request.args.get('step', window_size))
+        time_window = int(request.args.get('time_window', 60))
+    except ValueError:
+        return jsonify({'error': 'window, step and time_window must be integers'}), 400
+
+    if window_size < 1 or step < 1:
+        return jsonify({'error': 'window and step must be positive'}), 400
+
+    # Read the raw body incrementally instead of buffering it (413 above ANOMALY_STREAM_MAX_MB)
+    body = get_input_stream(request.environ, max_content_length=ANOMALY_STREAM_MAX_MB * 1024 * 1024)
+    if isinstance(body, io.RawIOBase):
+        # Buffered readline instead of RawIOBase's byte-at-a-time default
+        body = io.BufferedReader(body, buffer_size=ANOMALY_STREAM_READ_BYTES)
+    model = models['anomaly_detection']
+    counters = {'lines': 0, 'points': 0, 'skipped': 0}
+
+    def generate():
+        start_time = time.time()
+        windows = anomalous = 0
+        summary = {}
+        try:
+            for result in model.score_stream(
+                _ndjson_points(body, counters),
+                window_size=window_size,
+                step=step,
+                time_window=time_window,
+                batch_windows=ANOMALY_STREAM_BATCH_WINDOWS,
+                max_delay=ANOMALY_STREAM_MAX_DELAY_MS / 1000
+            ):
+                windows += 1
+                anomalous += bool(result.get('anomaly_detected'))
+                if 'error' not in result:
+                    # Only windows the forest actually scored count as predictions
+                    MODEL_PREDICTIONS.inc(model='anomaly_detection', backend='IsolationForest')
+                yield app.json.dumps(result) + '\n'
+        except Exception as e:
+            logger.error(f"Streaming anomaly detection error: {e}")
+            logger.error(traceback.format_exc())
+            summary.update({'error': 'Failed to score stream', 'details': str(e)})
+
+        if 'error' in counters:
+            summary.update({'error': 'Stream input rejected', 'details': counters['error']})
+        summary.update({
+            'windows': windows,
+            'anomalous_windows': anomalous,
+            'data_points': counters['points'],
+            'skipped_lines': counters['skipped'],
+            'processing_time': time.time() - start_time,
+            'timestamp': time.time()
+        })
+        yield app.json.dumps({'summary': summary}) + '\n'
+
+    return Response(stream_with_context(generate()), content_type='application/x-ndjson')
+
 # Risk Prediction Endpoint
 @app.route('/predict/risk-prediction', methods=['POST'])
 def predict_risk():
@@ -274,8 +1214,13 @@ def predict_risk():
     start_time = time.time()
     
     try:
+        # Fast 503 while the model is still loading
+        if model_loader.is_loading('risk_prediction'):
+            return model_loading_response('risk_prediction')
+
         # Check if model is available
         if not models.get('risk_prediction'):
+            MODEL_UNAVAILABLE.inc(model='risk_prediction')
             return jsonify({
                 'error': 'Risk prediction model not available',
                 'risk_level': 'medium',
@@ -293,11 +1238,19 @@ def predict_risk():
         prediction_window = data.get('prediction_window', 24)
 
         # Perform risk prediction
-        result = models['risk_prediction'].predict(
-            historical_data, 
-            current_conditions, 
-            prediction_window
-        )
+        result = timed_prediction('risk_prediction', lambda: predict_single(
+            'risk_prediction',
+            {
+                'historical_data': historical_data,
+                'current_conditions': current_conditions,
+                'prediction_window': prediction_window
+            },
+            lambda: models['risk_prediction'].predict(
+                historical_data, 
+                current_conditions, 
+                prediction_window
+            )
+        ))
         
         processing_time = time.time() - start_time
         
@@ -323,6 +1276,190 @@ def predict_risk():
             'confidence': 0.2
         }), 500
 
+# Batch Risk Prediction Endpoint
+@app.route('/predict/risk-prediction/batch', methods=['POST'])
+def predict_risk_batch():
+    """Predict risk levels for many zones in one call"""
+    start_time = time.time()
+    
+    try:
+        # Fast 503 while the model is still loading
+        if model_loader.is_loading('risk_prediction'):
+            return model_loading_response('risk_prediction')
+
+        # Check if model is available
+        if not models.get('risk_prediction'):
+            MODEL_UNAVAILABLE.inc(model='risk_prediction')
+            return jsonify({
+                'error': 'Risk prediction model not available',
+                'note': 'Using fallback values'
+            }), 503
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        entries = data.get('entries', [])
+        prediction_window = data.get('prediction_window', 24)
+
+        if not entries or not isinstance(entries, list):
+            return jsonify({'error': 'No entries array provided'}), 400
+
+        if len(entries) > MAX_BATCH_ENTRIES:
+            return jsonify({'error': f'Too many entries (max {MAX_BATCH_ENTRIES})'}), 400
+
+        if not all(isinstance(entry, dict) for entry in entries):
+            return jsonify({'error': 'Each entry must be an object'}), 400
+
+        # Perform risk prediction for every zone in one model call
+        model_start = time.time()
+        results = models['risk_prediction'].predict_batch(entries, prediction_window)
+        observe_batch('risk_prediction', results, time.time() - model_start)
+
+        zones = []
+        for index, (entry, result) in enumerate(zip(entries, results)):
+            zone = {'index': index, 'zone_id': entry.get('zone_id')}
+            if 'error' in result:
+                zone['error'] = result['error']
+            else:
+                zone.update({
+                    'risk_level': result.get('risk_level', 'medium'),
+                    'risk_score': result.get('risk_score', 0.5),
+                    'confidence': result.get('confidence', 0.8),
+                    'risk_factors': result.get('risk_factors', []),
+                    'predictions': result.get('predictions', []),
+                    'recommendations': result.get('recommendations', []),
+                    'model_used': result.get('model_used')
+                })
+            zones.append(zone)
+        
+        processing_time = time.time() - start_time
+        
+        return jsonify({
+            'results': zones,
+            'total_entries': len(zones),
+            'processing_time': processing_time,
+            'timestamp': time.time()
+        })
+
+    except Exception as e:
+        logger.error(f"Batch risk prediction error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            'error': 'Failed to predict risk batch',
+            'details': str(e)
+        }), 500
+
+# Zone Risk Inputs Endpoint (live feed publisher)
+@app.route('/predict/risk-prediction/zones', methods=['POST'])
+def publish_zone_inputs():
+    """Publish risk inputs for zones; changed zones are recomputed once and pushed to their subscribers"""
+    start_time = time.time()
+
+    if not RISK_FEED_ENABLED:
+        return risk_feed_disabled_response()
+
+    try:
+        # Fast 503 while the model is still loading
+        if model_loader.is_loading('risk_prediction'):
+            return model_loading_response('risk_prediction')
+
+        if not models.get('risk_prediction'):
+            MODEL_UNAVAILABLE.inc(model='risk_prediction')
+            return jsonify({'error': 'Risk prediction model not available'}), 503
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        entries = data.get('entries', [])
+        if not entries or not isinstance(entries, list):
+            return jsonify({'error': 'No entries array provided'}), 400
+
+        if len(entries) > MAX_BATCH_ENTRIES:
+            return jsonify({'error': f'Too many entries (max {MAX_BATCH_ENTRIES})'}), 400
+
+        if not all(isinstance(entry, dict) and entry.get('zone_id') is not None for entry in entries):
+            return jsonify({'error': 'Each entry must be an object with a zone_id'}), 400
+
+        try:
+            zones = risk_feed.update(entries)
+        except FeedFull as e:
+            return jsonify({'error': 'Risk feed is full', 'details': str(e)}), 503
+
+        return jsonify({
+            'zones': zones,
+            'updated': len([state for state in zones.values() if state == 'updated']),
+            'processing_time': time.time() - start_time,
+            'timestamp': time.time()
+        })
+
+    except Exception as e:
+        logger.error(f"Zone input publish error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            'error': 'Failed to publish zone inputs',
+            'details': str(e)
+        }), 500
+
+def disable_risk_feed(reason):
+    """Turn the feed routes off (503) in this process and the workers forked from it"""
+    global RISK_FEED_ENABLED
+    if RISK_FEED_ENABLED:
+        logger.warning(f"⚠️ Live risk feed disabled: {reason}")
+    RISK_FEED_ENABLED = False
+
+def risk_feed_disabled_response():
+    return jsonify({
+        'error': 'Risk feed disabled',
+        'details': 'Set RISK_FEED_ENABLED=True and serve from a single process'
+    }), 503
+
+def _sse_event(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {app.json.dumps(data)}']
+    return '\n'.join(lines) + '\n\n'
+
+# Live Zone Risk Feed (Server-Sent Events)
+@app.route('/stream/risk-prediction', methods=['GET'])
+def stream_zone_risk():
+    """Subscribe to live risk updates for zones (?zones=a,b)"""
+    if not RISK_FEED_ENABLED:
+        return risk_feed_disabled_response()
+
+    zone_ids = [zone.strip() for zone in request.args.get('zones', '').split(',') if zone.strip()]
+    if not zone_ids:
+        return jsonify({'error': 'No zones provided', 'details': 'Pass zone IDs as ?zones=zone_a,zone_b'}), 400
+
+    try:
+        subscription = risk_feed.subscribe(zone_ids)
+    except FeedFull as e:
+        response = jsonify({'error': 'Too many subscribers', 'details': str(e)})
+        response.headers['Retry-After'] = str(int(RISK_FEED_KEEPALIVE))
+        return response, 503
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'  # Client reconnect delay (ms); a reconnect gets fresh snapshots
+            yield _sse_event('subscribed', {'zones': sorted(subscription.zones)})
+            while not subscription.closed:
+                updates = subscription.get(timeout=RISK_FEED_KEEPALIVE)
+                if not updates:
+                    yield ': keepalive\n\n'
+                for update in updates:
+                    yield _sse_event('risk', update, update['id'])
+        finally:
+            risk_feed.unsubscribe(subscription)
+
+    response = Response(stream_with_context(generate()), content_type='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+def _timed_chatbot_response(message, language, context):
+    with phase('inference'):
+        return models['chatbot'].generate_response(message, language, context)
+
 # Chatbot Endpoint
 @app.route('/predict/chatbot', methods=['POST'])
 def chatbot_response():
@@ -330,8 +1467,13 @@ def chatbot_response():
     start_time = time.time()
     
     try:
+        # Fast 503 while the model is still loading
+        if model_loader.is_loading('chatbot'):
+            return model_loading_response('chatbot')
+
         # Check if model is available
         if not models.get('chatbot'):
+            MODEL_UNAVAILABLE.inc(model='chatbot')
             return jsonify({
                 'error': 'Chatbot model not available',
                 'response': 'I apologize, but I cannot process your request right now. Please try again later.',
@@ -351,7 +1493,11 @@ def chatbot_response():
             return jsonify({'error': 'No message provided'}), 400
 
         # Generate chatbot response
-        result = models['chatbot'].generate_response(message, language, context)
+        result = timed_prediction(
+            'chatbot',
+            lambda: _timed_chatbot_response(message, language, context),
+            default_backend='Rule-based'
+        )
         
         processing_time = time.time() - start_time
         
@@ -383,7 +1529,9 @@ def test_models():
     
     # Test each model
     for model_name, model in models.items():
-        if model:
+        if model_loader.is_loading(model_name):
+            results[model_name] = {'status': 'loading'}
+        elif model:
             try:
                 if model_name == 'crowd_detection':
                     # Would need a test image for real testing
@@ -425,9 +1573,11 @@ def internal_error(error):
 def too_large(error):
     return jsonify({'error': 'File too large'}), 413
 
+report_startup_imports()
+
 if __name__ == '__main__':
     try:
-        # Initialize models
+        # Initialize models in the background so the port opens immediately
         initialize_models()
         
         # Start server
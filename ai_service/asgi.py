@@ -0,0 +1,294 @@
+# ASGI entry point for the Smart Tourist Safety AI Service
+#
+# Serves the same routes as the Flask app (app.py), but model calls run in
+# bounded thread pools so slow YOLO/LSTM inference never blocks cheap
+# /health traffic or the chatbot.
+#
+#   uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+import asyncio
+import contextvars
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+
+from app import app as flask_app, initialize_models, logger, STREAMING_INPUT_ROUTES
+
+# Routes answered directly on the event loop (cheap, never queued behind inference)
+INLINE_ROUTES = {'/', '/health', '/ready', '/metrics'}
+
+# Route prefix -> executor pool; anything not listed runs in the 'light' pool
+EXECUTOR_ROUTES = {
+    '/predict/crowd-detection': 'inference',
+    '/predict/risk-prediction': 'inference',
+    '/predict/anomaly-detection': 'light',
+    '/predict/chatbot': 'light'
+}
+
+POOL_SIZES = {
+    'inference': int(os.getenv('ASGI_INFERENCE_WORKERS', 2)),
+    'light': int(os.getenv('ASGI_LIGHT_WORKERS', 4))
+}
+
+# Chunks a streaming response may produce ahead of the client
+STREAM_PREFETCH = int(os.getenv('ASGI_STREAM_PREFETCH', 8))
+
+# Requests allowed to wait for a pool, per worker thread
+QUEUE_FACTOR = int(os.getenv('ASGI_QUEUE_FACTOR', 4))
+
+executors = {}
+pool_slots = {}
+
+
+@asynccontextmanager
+async def lifespan(api):
+    for name, size in POOL_SIZES.items():
+        executors[name] = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f'asgi-{name}')
+        pool_slots[name] = asyncio.Semaphore(size * QUEUE_FACTOR)
+
+    # Load models in the background so the port opens immediately
+    initialize_models()
+    logger.info(f"🚀 ASGI AI Service started (pools: {POOL_SIZES})")
+
+    yield
+
+    for executor in executors.values():
+        executor.shutdown(wait=False)
+
+
+app = FastAPI(title='Smart Tourist Safety AI Service', version='1.0.0', lifespan=lifespan)
+
+
+def _pool_for(path):
+    """Pick the executor pool for a request path"""
+    for prefix, pool in EXECUTOR_ROUTES.items():
+        if path == prefix or path.startswith(prefix + '/'):
+            return pool
+    return 'light'
+
+
+class _StreamedBody(io.RawIOBase):
+    """Blocking reader over an ASGI request body, for Flask code running in a pool thread"""
+
+    def __init__(self, request, loop):
+        self._chunks = request.stream().__aiter__()
+        self._loop = loop
+        self._buffer = b''
+        self._done = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer and not self._done:
+            try:
+                self._buffer = asyncio.run_coroutine_threadsafe(self._chunks.__anext__(), self._loop).result()
+            except StopAsyncIteration:
+                self._done = True
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class _StreamedBodyResponse(StreamingResponse):
+    """
+    Streaming response for a request whose body is still being read
+
+    StreamingResponse listens for client disconnects by consuming receive(),
+    which would swallow the request body chunks _StreamedBody is waiting for.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _build_environ(scope, headers, body):
+    """
+    Build a WSGI environ for the Flask app from an ASGI request
+
+    headers is the raw (name, value) list; repeated headers are joined the way
+    WSGI expects (Cookie with '; ', others with ','). body is either the
+    buffered body (bytes) or a _StreamedBody of unknown length
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': '',
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+
+    if isinstance(body, bytes):
+        environ.update({'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body)})
+    else:
+        environ.update({'wsgi.input': body, 'wsgi.input_terminated': True})
+
+    for name, value in headers:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = 'CONTENT_TYPE' if name == 'CONTENT_TYPE' else f'HTTP_{name}'
+        separator = '; ' if key == 'HTTP_COOKIE' else ','
+        environ[key] = f"{environ[key]}{separator}{value}" if key in environ else value
+
+    return environ
+
+
+def _call_flask(environ):
+    """
+    Run one request through the Flask app
+
+    Returns:
+        tuple: (status, headers, body, app_iter) - body is set for sized
+            responses, app_iter for streaming ones
+    """
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+        return lambda data: None
+
+    app_iter = flask_app(environ, start_response)
+    headers = response['headers']
+
+    if any(name.lower() == 'content-length' for name, _ in headers):
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        return response['status'], headers, body, None
+
+    return response['status'], headers, None, app_iter
+
+
+async def _stream_body(app_iter, context):
+    """
+    Relay a streaming Flask response from a dedicated thread
+
+    One thread drives the whole response, every next() and the final
+    close(), inside the request's context: stream_with_context keeps Flask's
+    request context in context variables, so all steps must run in one
+    context, and never two at once. Long-lived streams (SSE, video) each
+    hold their own thread instead of starving a shared pool.
+
+    When the client disconnects, the consumer only sets a flag. An await in
+    the finally block would itself be cancelled by the disconnect. The thread
+    then closes the response after its current chunk.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+    credits = threading.Semaphore(STREAM_PREFETCH)
+    stopped = threading.Event()
+    done = object()
+
+    def deliver(item):
+        try:
+            loop.call_soon_threadsafe(chunks.put_nowait, item)
+        except RuntimeError:
+            stopped.set()  # Event loop already closed
+
+    def pump():
+        try:
+            iterator = iter(app_iter)
+            while not stopped.is_set():
+                if not credits.acquire(timeout=1.0):
+                    continue
+                if stopped.is_set():
+                    break
+                chunk = next(iterator, done)
+                deliver(chunk)
+                if chunk is done:
+                    break
+        except Exception as e:
+            deliver(e)
+        finally:
+            try:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+            except Exception as e:
+                logger.error(f"Closing streaming response failed: {e}")
+
+    threading.Thread(target=context.run, args=(pump,), name='asgi-stream', daemon=True).start()
+    try:
+        while True:
+            item = await chunks.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            credits.release()
+            yield item
+    finally:
+        stopped.set()
+        credits.release()  # Wake the thread if it is waiting for the client
+
+
+def _raw_headers(headers):
+    """Flask's response headers as ASGI raw headers, keeping repeats (Set-Cookie, Vary)"""
+    return [
+        (name.lower().encode('latin-1'), value.encode('latin-1'))
+        for name, value in headers if name.lower() != 'content-length'
+    ]
+
+
+@app.api_route('/{path:path}', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS', 'HEAD'])
+async def dispatch(request: Request, path: str):
+    """Serve every route through the Flask app, offloading model calls to a bounded pool"""
+    streamed_input = request.url.path in STREAMING_INPUT_ROUTES
+    if streamed_input:
+        body = _StreamedBody(request, asyncio.get_running_loop())
+    else:
+        body = await request.body()
+    environ = _build_environ(request.scope, request.headers.raw, body)
+    # One context per request, shared by the view call and every later streaming step
+    context = contextvars.copy_context()
+
+    if request.url.path in INLINE_ROUTES:
+        status, headers, body, app_iter = context.run(_call_flask, environ)
+    else:
+        pool = _pool_for(request.url.path)
+        async with pool_slots[pool]:
+            loop = asyncio.get_running_loop()
+            status, headers, body, app_iter = await loop.run_in_executor(
+                executors[pool], context.run, _call_flask, environ
+            )
+
+    if app_iter is not None:
+        response_class = _StreamedBodyResponse if streamed_input else StreamingResponse
+        response = response_class(_stream_body(app_iter, context), status_code=status)
+    else:
+        response = Response(content=body, status_code=status)
+    response.raw_headers.extend(_raw_headers(headers))
+    return response
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    host = os.getenv('HOST', 'localhost')
+    port = int(os.getenv('PORT', 8000))
+    uvicorn.run(app, host=host, port=port, log_level=os.getenv('LOG_LEVEL', 'INFO').lower())
@@ -0,0 +1,334 @@
+# Concurrency load-test harness for the AI service
+#
+# Drives app.py in-process through the Flask test client (default) or a
+# server on localhost, with closed-loop clients at increasing concurrency and
+# a weighted mix of endpoints. Prints a latency-vs-throughput curve with
+# error and shed (503) rates per concurrency level. Runs fully offline.
+#
+#   python benchmarks/load_test.py --concurrency 1,4,16,64 --duration 10
+#   python benchmarks/load_test.py --mix chatbot=5,anomaly=3,risk=2,crowd=1 --stub-models
+#   python benchmarks/load_test.py --url http://localhost:8000 --replay payloads.jsonl
+#
+# Replay files are JSON lines, one request each:
+#   {"endpoint": "chatbot", "json": {"message": "Where is the police station?"}}
+#   {"endpoint": "crowd", "image_path": "samples/plaza.jpg"}
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Endpoint name -> (method, path, payload kind)
+ENDPOINTS = {
+    'health': ('GET', '/health', None),
+    'crowd': ('POST', '/predict/crowd-detection', 'image'),
+    'crowd_batch': ('POST', '/predict/crowd-detection/batch', 'images'),
+    'anomaly': ('POST', '/predict/anomaly-detection', 'json'),
+    'risk': ('POST', '/predict/risk-prediction', 'json'),
+    'risk_batch': ('POST', '/predict/risk-prediction/batch', 'json'),
+    'chatbot': ('POST', '/predict/chatbot', 'json')
+}
+
+DEFAULT_MIX = 'health=1,crowd=1,anomaly=3,risk=3,chatbot=4'
+
+CHATBOT_MESSAGES = [
+    'Hello!',
+    'Where is the nearest police station?',
+    'Any safety tips for the night market?',
+    'Necesito ayuda, perdí mi pasaporte',
+    'Où est la station de métro?',
+    'Help! Someone stole my bag'
+]
+
+
+class StubModel:
+    """
+    Stand-in for every model: sleeps for a fixed latency and returns a canned result
+    Isolates the serving stack (routing, admission, batching, JSON) from model cost
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def _result(self):
+        if self.latency:
+            time.sleep(self.latency)
+        return {'model_used': 'Stub', 'response': 'Stub response', 'confidence': 1.0}
+
+    def predict(self, *args, **kwargs):
+        return self._result()
+
+    def predict_batch(self, items, *args, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return [{'model_used': 'Stub', 'confidence': 1.0} for _ in items]
+
+    def generate_response(self, *args, **kwargs):
+        return self._result()
+
+
+def make_image_bytes(width=640, height=480, seed=0):
+    import cv2
+
+    rng = np.random.RandomState(seed)
+    image = rng.randint(0, 255, size=(height, width, 3), dtype=np.uint8)
+    ok, buffer = cv2.imencode('.jpg', image)
+    return buffer.tobytes()
+
+
+def synthetic_payloads(seed=0):
+    """A few realistic payloads per endpoint"""
+    rng = np.random.RandomState(seed)
+    images = [make_image_bytes(seed=i) for i in range(3)]
+    return {
+        'health': [{}],
+        'crowd': [{'image': image} for image in images],
+        'crowd_batch': [{'images': images}],
+        'anomaly': [
+            {'json': {'data': [float(v) for v in rng.normal(10, 2, n)], 'time_window': 60}}
+            for n in (50, 500, 5000)
+        ],
+        'risk': [
+            {'json': {
+                'historical_data': [float(v) for v in rng.uniform(0, 1, 10)],
+                'current_conditions': {'crowd_density': float(rng.uniform()), 'weather_score': 0.7},
+                'prediction_window': 24
+            }}
+            for _ in range(5)
+        ],
+        'risk_batch': [{'json': {'entries': [
+            {'zone_id': f'zone-{i}', 'historical_data': [0.2, 0.4, 0.5], 'current_conditions': {'crowd_density': 0.6}}
+            for i in range(50)
+        ]}}],
+        'chatbot': [{'json': {'message': message, 'language': 'en'}} for message in CHATBOT_MESSAGES]
+    }
+
+
+def load_replay(path):
+    """Payloads per endpoint from a JSON lines replay file"""
+    payloads = {}
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            endpoint = record.get('endpoint')
+            if endpoint not in ENDPOINTS:
+                raise ValueError(f"{path}:{line_number}: unknown endpoint {endpoint!r}")
+
+            payload = {}
+            if 'json' in record:
+                payload['json'] = record['json']
+            image_paths = record.get('image_paths') or ([record['image_path']] if 'image_path' in record else [])
+            images = []
+            for image_path in image_paths:
+                with open(os.path.join(base_dir, image_path), 'rb') as image_file:
+                    images.append(image_file.read())
+            if images:
+                payload['image'] = images[0]
+                payload['images'] = images
+            payloads.setdefault(endpoint, []).append(payload)
+    return payloads
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class TestClientTarget:
+    """In-process target using the Flask test client (one client per thread)"""
+
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self.local = threading.local()
+
+    def request(self, endpoint, payload):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+
+        method, path, kind = ENDPOINTS[endpoint]
+        if method == 'GET':
+            response = client.get(path)
+        elif kind == 'image':
+            response = client.post(path, data={'image': (io.BytesIO(payload['image']), 'frame.jpg')},
+                                   content_type='multipart/form-data')
+        elif kind == 'images':
+            files = [(io.BytesIO(data), f'frame{i}.jpg') for i, data in enumerate(payload['images'])]
+            response = client.post(path, data={'images': files}, content_type='multipart/form-data')
+        else:
+            response = client.post(path, json=payload['json'])
+        return response.status_code
+
+
+class HttpTarget:
+    """Target on localhost (or any URL) using one requests session per thread"""
+
+    def __init__(self, base_url, timeout=60):
+        import requests
+
+        self.requests = requests
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def request(self, endpoint, payload):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = self.requests.Session()
+
+        method, path, kind = ENDPOINTS[endpoint]
+        url = self.base_url + path
+        if method == 'GET':
+            response = session.get(url, timeout=self.timeout)
+        elif kind == 'image':
+            response = session.post(url, files={'image': ('frame.jpg', payload['image'], 'image/jpeg')}, timeout=self.timeout)
+        elif kind == 'images':
+            files = [('images', (f'frame{i}.jpg', data, 'image/jpeg')) for i, data in enumerate(payload['images'])]
+            response = session.post(url, files=files, timeout=self.timeout)
+        else:
+            response = session.post(url, json=payload['json'], timeout=self.timeout)
+        return response.status_code
+
+
+def client_loop(target, mix, payloads, stop_event, samples, seed):
+    """Closed-loop client: send the next request as soon as the previous one returns"""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while not stop_event.is_set():
+        endpoint = rng.choices(names, weights)[0]
+        payload = rng.choice(payloads[endpoint])
+        start = time.perf_counter()
+        try:
+            status = target.request(endpoint, payload)
+        except Exception:
+            status = 0  # Connection error / timeout
+        samples.append((endpoint, status, time.perf_counter() - start))
+
+
+def summarize(samples, elapsed):
+    """Latency percentiles, throughput, error and shed rates for a set of samples"""
+    if not samples:
+        return {'requests': 0, 'throughput_rps': 0.0, 'error_rate': 0.0, 'shed_rate': 0.0,
+                'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+
+    latencies_ms = np.array([latency for _, _, latency in samples]) * 1000
+    statuses = [status for _, status, _ in samples]
+    shed = sum(1 for status in statuses if status == 503)
+    errors = sum(1 for status in statuses if status == 0 or (status >= 400 and status != 503))
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / elapsed, 2),
+        'ok_rps': round((len(samples) - shed - errors) / elapsed, 2),
+        'error_rate': round(errors / len(samples), 4),
+        'shed_rate': round(shed / len(samples), 4),
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies_ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 2)
+    }
+
+
+def run_level(target, mix, payloads, concurrency, duration, seed):
+    stop_event = threading.Event()
+    samples = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        for client in range(concurrency):
+            pool.submit(client_loop, target, mix, payloads, stop_event, samples, seed + client)
+        time.sleep(duration)
+        stop_event.set()
+    elapsed = time.perf_counter() - start
+
+    level = {'concurrency': concurrency, 'duration': round(elapsed, 2), **summarize(samples, elapsed)}
+    level['endpoints'] = {
+        endpoint: summarize([sample for sample in samples if sample[0] == endpoint], elapsed)
+        for endpoint in mix
+    }
+    return level
+
+
+def build_target(args):
+    if args.url:
+        return HttpTarget(args.url)
+
+    import app as service
+
+    if args.stub_models:
+        for name in service.MODEL_FACTORIES:
+            service.models[name] = StubModel(args.stub_latency_ms / 1000)
+    else:
+        service.initialize_models(wait=True)
+    return TestClientTarget(service.app)
+
+
+def print_curve(levels, mix):
+    print(f"\n{'conc':>5}{'rps':>10}{'ok rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}{'shed':>8}")
+    for level in levels:
+        print(f"{level['concurrency']:>5}{level['throughput_rps']:>10}{level['ok_rps']:>10}"
+              f"{level['p50_ms']:>10}{level['p95_ms']:>10}{level['p99_ms']:>10}"
+              f"{level['error_rate']:>9.1%}{level['shed_rate']:>8.1%}")
+
+    print("\np95 ms per endpoint")
+    print(f"{'conc':>5}" + ''.join(f"{endpoint:>13}" for endpoint in mix))
+    for level in levels:
+        row = ''.join(f"{str(level['endpoints'][endpoint]['p95_ms']):>13}" for endpoint in mix)
+        print(f"{level['concurrency']:>5}{row}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the AI service at increasing concurrency')
+    parser.add_argument('--url', help='Target server (default: in-process Flask test client)')
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32', help='Comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Endpoint weights, e.g. chatbot=4,risk=2,crowd=1')
+    parser.add_argument('--replay', help='JSON lines file with payloads to replay (replaces synthetic payloads)')
+    parser.add_argument('--stub-models', action='store_true', help='In-process only: replace every model with a stub')
+    parser.add_argument('--stub-latency-ms', type=float, default=0.0, help='Latency of each stub model call')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the curve to this JSON file')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    payloads = synthetic_payloads(args.seed)
+    if args.replay:
+        replayed = load_replay(args.replay)
+        payloads.update(replayed)
+        mix = {endpoint: weight for endpoint, weight in mix.items() if endpoint in replayed} or \
+            {endpoint: float(len(items)) for endpoint, items in replayed.items()}
+
+    target = build_target(args)
+
+    levels = []
+    for concurrency in [int(value) for value in args.concurrency.split(',')]:
+        print(f"Running {concurrency} client(s) for {args.duration}s...")
+        levels.append(run_level(target, mix, payloads, concurrency, args.duration, args.seed))
+
+    print_curve(levels, mix)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': time.time(), 'mix': mix, 'target': args.url or 'in-process',
+                       'stub_models': args.stub_models, 'levels': levels}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
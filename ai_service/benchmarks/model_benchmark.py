@@ -0,0 +1,725 @@
+# In-process model benchmark suite
+#
+# Imports the model classes directly (no HTTP) and runs each model path on
+# synthetic inputs of growing size: crowd frames of increasing resolution,
+# anomaly series from 10 to 100k points and risk batches. Reports p50/p95/p99
+# latency, throughput and peak traced memory per case, stores the results as
+# a JSON baseline and flags regressions against it on later runs.
+#
+#   python benchmarks/model_benchmark.py --save-baseline
+#   python benchmarks/model_benchmark.py --threshold 0.25
+#   python benchmarks/model_benchmark.py --only crowd --quick
+#   python benchmarks/model_benchmark.py --models crowd_detection --only yolo --crowd-images 'frames/*.jpg'
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_baseline.json')
+
+# Metrics compared against the baseline (higher is worse for all of them)
+REGRESSION_METRICS = ('p50_ms', 'p95_ms', 'peak_memory_mb')
+
+CROWD_RESOLUTIONS = [(320, 240), (640, 480), (1280, 720), (1920, 1080), (3840, 2160)]
+ANOMALY_SIZES = [10, 100, 1000, 10000, 100000]
+RISK_BATCH_SIZES = [1, 10, 100, 1000]
+
+
+class BenchmarkCase:
+    """One benchmarked model path with a fixed synthetic input"""
+
+    def __init__(self, name, model, run, items=1, iterations=20, group=None):
+        self.name = name
+        self.model = model
+        self.run = run  # Zero-argument callable doing one model call
+        self.items = items  # Inputs processed per call (for throughput)
+        self.iterations = iterations
+        self.group = group  # Cases sharing a group are compared against each other
+
+
+def make_image(width, height, seed=0):
+    """Synthetic BGR frame with some structure (blocks + noise) for the detectors"""
+    rng = np.random.RandomState(seed)
+    image = rng.randint(0, 60, size=(height, width, 3), dtype=np.uint8)
+    for _ in range(20):
+        x, y = rng.randint(0, max(1, width - 40)), rng.randint(0, max(1, height - 80))
+        image[y:y + 80, x:x + 40] = rng.randint(80, 255, size=3, dtype=np.uint8)
+    return image
+
+
+def make_crowd_image(width, height, people, head=24, seed=0):
+    """Synthetic dense crowd: dark heads over lighter bodies on a noisy background"""
+    import cv2
+
+    rng = np.random.RandomState(seed)
+    image = cv2.GaussianBlur(rng.normal(140, 12, (height, width)).clip(0, 255).astype(np.uint8), (0, 0), 1.5)
+    cols = max(1, int(np.ceil(np.sqrt(people * width / height))))
+    rows = max(1, int(np.ceil(people / cols)))
+    cell_w, cell_h = width / cols, height / rows
+    for cell in rng.choice(rows * cols, people, replace=False):
+        row, col = divmod(int(cell), cols)
+        x = int((col + 0.5 + rng.uniform(-0.2, 0.2)) * cell_w)
+        y = int((row + 0.5 + rng.uniform(-0.2, 0.2)) * cell_h)
+        cv2.rectangle(image, (x - head, y + head // 2), (x + head, y + 3 * head), int(rng.randint(60, 200)), -1)
+        cv2.ellipse(image, (x, y), (head // 2, int(head * 0.6)), 0, 0, 360, int(rng.randint(30, 80)), -1)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+
+def encode_image(image):
+    import cv2
+
+    ok, buffer = cv2.imencode('.jpg', image)
+    return buffer.tobytes()
+
+
+def make_series(n_points, seed=0):
+    rng = np.random.RandomState(seed)
+    series = np.sin(np.linspace(0, 20, n_points)) + rng.normal(0, 0.1, n_points)
+    return [float(value) for value in series]
+
+
+def make_risk_entries(n_entries, seed=0):
+    rng = np.random.RandomState(seed)
+    return [
+        {
+            'historical_data': [float(value) for value in rng.uniform(0, 1, 10)],
+            'current_conditions': {
+                'crowd_density': float(rng.uniform(0, 1)),
+                'weather_score': float(rng.uniform(0.3, 1)),
+                'is_weekend': bool(rng.randint(0, 2))
+            }
+        }
+        for _ in range(n_entries)
+    ]
+
+
+def load_models(names):
+    """Instantiate the requested models directly"""
+    from models.crowd_detection import CrowdDetectionModel
+    from models.anomaly_detection import AnomalyDetectionModel
+    from models.risk_prediction import RiskPredictionModel
+    from models.chatbot import ChatbotModel
+
+    factories = {
+        'crowd_detection': CrowdDetectionModel,
+        'anomaly_detection': AnomalyDetectionModel,
+        'risk_prediction': RiskPredictionModel,
+        'chatbot': ChatbotModel
+    }
+    loaded = {}
+    for name in names:
+        start = time.perf_counter()
+        loaded[name] = factories[name]()
+        print(f"Loaded {name} in {time.perf_counter() - start:.2f}s")
+    return loaded
+
+
+def load_yolo_detectors(crowd):
+    """
+    YOLO backends available for comparison: the crowd model's ultralytics
+    model and, with onnxruntime and YOLO_ONNX_MODEL_PATH present, the ONNX
+    fp32 and int8 sessions. Returns name -> (detector, backend setting)
+    """
+    detectors = {}
+    if crowd.yolo_model is not None and crowd.yolo_backend == 'ultralytics':
+        detectors['ultralytics'] = (crowd.yolo_model, 'ultralytics')
+
+    model_path = os.getenv('YOLO_ONNX_MODEL_PATH', 'models/yolov8n.onnx')
+    try:
+        from models.onnx_yolo import OnnxYoloDetector
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return detectors
+    if os.path.exists(model_path):
+        for quantize in ('none', 'int8'):
+            detectors['onnx' if quantize == 'none' else 'onnx_int8'] = (OnnxYoloDetector(model_path, quantize=quantize), 'onnx')
+    return detectors
+
+
+def with_yolo_detector(crowd, detector, backend, call):
+    """Run call() with the crowd model's YOLO detector swapped"""
+    previous = crowd.yolo_model, crowd.yolo_backend, crowd.model_loaded
+    crowd.yolo_model, crowd.yolo_backend, crowd.model_loaded = detector, backend, True
+    try:
+        return call()
+    finally:
+        crowd.yolo_model, crowd.yolo_backend, crowd.model_loaded = previous
+
+
+def build_cases(models, quick=False, yolo_detectors=None):
+    """Benchmark cases for every loaded model"""
+    cases = []
+    scale = 0.25 if quick else 1.0
+
+    def iterations(count):
+        return max(3, int(count * scale))
+
+    crowd = models.get('crowd_detection')
+    if crowd is not None:
+        # Cases repeat the same frames; only the result_cache cases may hit the cache
+        result_cache, crowd.result_cache = crowd.result_cache, None
+        resolutions = CROWD_RESOLUTIONS[:3] if quick else CROWD_RESOLUTIONS
+        for width, height in resolutions:
+            frame = encode_image(make_image(width, height))
+            cases.append(BenchmarkCase(
+                f'crowd.predict[{width}x{height}]', 'crowd_detection',
+                lambda frame=frame: crowd.predict(frame),
+                iterations=iterations(20 if width <= 1280 else 8)
+            ))
+        cases.extend(build_cascade_cases(crowd, iterations))
+        cases.extend(build_resolution_tier_cases(crowd, iterations, quick))
+        cases.extend(build_tiling_cases(crowd, iterations))
+        cases.extend(build_density_cases(crowd, iterations))
+        cases.extend(build_yolo_backend_cases(crowd, iterations, yolo_detectors or {}))
+        if result_cache is not None:
+            cases.extend(build_result_cache_cases(crowd, result_cache, iterations))
+        cases.extend(build_video_cases(crowd, iterations))
+        frames = [encode_image(make_image(640, 480, seed)) for seed in range(8)]
+        cases.append(BenchmarkCase(
+            'crowd.predict_batch[8x640x480]', 'crowd_detection',
+            lambda: crowd.predict_batch(frames), items=len(frames), iterations=iterations(10)
+        ))
+
+    anomaly = models.get('anomaly_detection')
+    if anomaly is not None:
+        sizes = ANOMALY_SIZES[:4] if quick else ANOMALY_SIZES
+        for n_points in sizes:
+            series = make_series(n_points)
+            cases.append(BenchmarkCase(
+                f'anomaly.predict[{n_points}]', 'anomaly_detection',
+                lambda series=series: anomaly.predict(series), items=n_points,
+                iterations=iterations(30 if n_points <= 10000 else 10)
+            ))
+        streams = [{'name': f'stream-{i}', 'data': make_series(1000, seed=i)} for i in range(32)]
+        cases.append(BenchmarkCase(
+            'anomaly.predict_batch[32x1000]', 'anomaly_detection',
+            lambda: anomaly.predict_batch(streams), items=len(streams), iterations=iterations(20)
+        ))
+
+    risk = models.get('risk_prediction')
+    if risk is not None:
+        entries = make_risk_entries(1)[0]
+        cases.append(BenchmarkCase(
+            'risk.predict', 'risk_prediction',
+            lambda: risk.predict(entries['historical_data'], entries['current_conditions']),
+            iterations=iterations(50)
+        ))
+        sizes = RISK_BATCH_SIZES[:3] if quick else RISK_BATCH_SIZES
+        for n_entries in sizes:
+            batch = make_risk_entries(n_entries)
+            cases.append(BenchmarkCase(
+                f'risk.predict_batch[{n_entries}]', 'risk_prediction',
+                lambda batch=batch: risk.predict_batch(batch), items=n_entries,
+                iterations=iterations(30 if n_entries <= 100 else 10)
+            ))
+
+    chatbot = models.get('chatbot')
+    if chatbot is not None:
+        messages = ['Hello!', 'Where is the nearest police station?', 'Necesito ayuda urgente', 'Any safety tips for tonight?']
+        cases.append(BenchmarkCase(
+            'chatbot.generate_response', 'chatbot',
+            lambda: [chatbot.generate_response(message) for message in messages],
+            items=len(messages), iterations=iterations(50)
+        ))
+
+    return cases
+
+
+def build_cascade_cases(crowd, iterations):
+    """
+    Haar fallback latency: a cascade loaded per call (the old behaviour) vs the
+    model's pooled cascades, for each detectMultiScale profile
+    """
+    from models.crowd_detection import CascadePool, HAAR_PROFILES, haar_profile_params
+
+    image = make_image(640, 480)
+    height, width = image.shape[:2]
+    pool = crowd.cascade_pool
+
+    def run(profile, per_call_load=False):
+        _, crowd.haar_params = haar_profile_params(profile)
+        crowd.cascade_pool = CascadePool(size=1) if per_call_load else pool
+        try:
+            return crowd._predict_fallback(image, width, height)
+        finally:
+            _, crowd.haar_params = haar_profile_params(crowd.detector_profile)
+            crowd.cascade_pool = pool
+
+    cases = [BenchmarkCase(
+        'crowd.haar[per-call load]', 'crowd_detection',
+        lambda: run('balanced', per_call_load=True), iterations=iterations(10), group='haar_cascade'
+    )]
+    for profile in HAAR_PROFILES:
+        cases.append(BenchmarkCase(
+            f'crowd.haar[pooled,{profile}]', 'crowd_detection',
+            lambda profile=profile: run(profile), iterations=iterations(10), group='haar_cascade'
+        ))
+    return cases
+
+
+def build_resolution_tier_cases(crowd, iterations, quick=False):
+    """
+    crowd.predict on large frames per resolution tier; 'accurate' (full
+    resolution) is the reference of each group
+    """
+    from models.crowd_detection import RESOLUTION_TIERS
+
+    tiers = sorted(RESOLUTION_TIERS, key=lambda tier: RESOLUTION_TIERS[tier] or float('inf'), reverse=True)
+    resolutions = [(1920, 1080)] if quick else [(1920, 1080), (3840, 2160)]
+
+    def run(frame, tier):
+        previous = crowd.resolution_tier
+        crowd.resolution_tier = tier
+        try:
+            return crowd.predict(frame)
+        finally:
+            crowd.resolution_tier = previous
+
+    cases = []
+    for width, height in resolutions:
+        frame = encode_image(make_image(width, height))
+        for tier in tiers:
+            cases.append(BenchmarkCase(
+                f'crowd.tier[{tier},{width}x{height}]', 'crowd_detection',
+                lambda frame=frame, tier=tier: run(frame, tier),
+                iterations=iterations(8), group=f'resolution_tiers[{width}x{height}]'
+            ))
+    return cases
+
+
+def build_tiling_cases(crowd, iterations):
+    """
+    Tile-seam NMS on a dense synthetic crowd and, when YOLO is loaded, a 4K
+    frame run whole vs tiled (tiled_inference group)
+    """
+    from models.crowd_detection import nms
+
+    rng = np.random.default_rng(0)
+    corners = rng.uniform(0, [3780, 2000], size=(500, 2))
+    boxes = np.hstack([corners, corners + rng.uniform([30, 80], [60, 160], size=(500, 2))])
+    scores = rng.uniform(0.5, 1.0, size=500)
+    cases = [BenchmarkCase(
+        'crowd.nms[500]', 'crowd_detection',
+        lambda: nms(boxes, scores, crowd.nms_threshold, crowd.tile_containment_threshold),
+        items=len(boxes), iterations=iterations(30)
+    )]
+
+    if not (crowd.model_loaded and crowd.yolo_model):
+        return cases
+
+    frame = make_image(3840, 2160)
+    height, width = frame.shape[:2]
+
+    def run(tiled):
+        previous = crowd.tiled_inference
+        crowd.tiled_inference = tiled
+        try:
+            return crowd._predict_with_yolo(frame, width, height)
+        finally:
+            crowd.tiled_inference = previous
+
+    for tiled in (False, True):
+        cases.append(BenchmarkCase(
+            f"crowd.yolo[{'tiled' if tiled else 'whole'},3840x2160]", 'crowd_detection',
+            lambda tiled=tiled: run(tiled), iterations=iterations(5), group='tiled_inference'
+        ))
+    return cases
+
+
+def build_density_cases(crowd, iterations):
+    """
+    Detector vs density-map counting on 1080p crowds of growing size; the
+    density map's latency should stay flat as the crowd grows
+    """
+    def run(image, mode):
+        previous = crowd.density_mode
+        crowd.density_mode = mode
+        try:
+            return crowd.predict(image)
+        finally:
+            crowd.density_mode = previous
+
+    cases = []
+    for people in (50, 200, 800):
+        image = make_crowd_image(1920, 1080, people)
+        for mode in ('off', 'always'):
+            cases.append(BenchmarkCase(
+                f"crowd.{'detector' if mode == 'off' else 'density'}[{people} people]", 'crowd_detection',
+                lambda image=image, mode=mode: run(image, mode), iterations=iterations(8), group='density_map'
+            ))
+    return cases
+
+
+def build_yolo_backend_cases(crowd, iterations, detectors):
+    """Per-frame YOLO latency per backend (yolo_backends group, first backend is the reference)"""
+    frame = make_image(1280, 720)
+    height, width = frame.shape[:2]
+    cases = []
+    for name, (detector, backend) in detectors.items():
+        cases.append(BenchmarkCase(
+            f'crowd.yolo[{name}]', 'crowd_detection',
+            lambda detector=detector, backend=backend: with_yolo_detector(
+                crowd, detector, backend, lambda: crowd._predict_with_yolo(frame, width, height)),
+            iterations=iterations(20), group='yolo_backends'
+        ))
+    return cases
+
+
+def build_result_cache_cases(crowd, result_cache, iterations):
+    """
+    A static camera frame without the cache, re-sent byte for byte (exact hit)
+    and re-encoded with sensor noise (perceptual hit); result_cache group
+    """
+    image = make_image(1280, 720)
+    frame = encode_image(image)
+    rng = np.random.RandomState(1)
+    # Distinct noisy copies, so each call is a perceptual and never an exact hit
+    noisy = [encode_image(np.clip(image + rng.randint(-3, 4, image.shape), 0, 255).astype(np.uint8)) for _ in range(64)]
+    calls = iter(range(10 ** 9))
+
+    def run(frame_for_call, cached=True):
+        # Perceptual matching is opt-in; enable it so the perceptual case measures a hit
+        crowd.result_cache, previous = (result_cache if cached else None), crowd.cache_perceptual
+        crowd.cache_perceptual = True
+        try:
+            return crowd.predict(frame_for_call())
+        finally:
+            crowd.result_cache, crowd.cache_perceptual = None, previous
+
+    return [
+        BenchmarkCase('crowd.cache[off]', 'crowd_detection', lambda: run(lambda: frame, cached=False),
+                      iterations=iterations(10), group='result_cache'),
+        BenchmarkCase('crowd.cache[exact]', 'crowd_detection', lambda: run(lambda: frame),
+                      iterations=iterations(50), group='result_cache'),
+        BenchmarkCase('crowd.cache[perceptual]', 'crowd_detection', lambda: run(lambda: noisy[next(calls) % len(noisy)]),
+                      iterations=iterations(40), group='result_cache')
+    ]
+
+
+def make_mjpeg_clip(frames=100, width=640, height=480, moving=(40, 60), noise=4.0, flicker=0.08, seed=0):
+    """
+    MJPEG bytes of a static scene where a block crosses the frame during `moving`;
+    every frame gets sensor noise and a random brightness change of up to `flicker`
+    """
+    import cv2
+
+    rng = np.random.RandomState(seed)
+    base = make_image(width, height)
+    parts = []
+    for index in range(frames):
+        frame = base.copy()
+        if moving[0] <= index < moving[1]:
+            x = 50 + (index - moving[0]) * 25
+            cv2.rectangle(frame, (x, 100), (x + 80, 300), (200, 200, 200), -1)
+        gain = 1 + rng.uniform(-flicker, flicker)
+        frame = np.clip(frame * gain + rng.normal(0, noise, frame.shape), 0, 255).astype(np.uint8)
+        parts.append(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + encode_image(frame) + b'\r\n')
+    return b''.join(parts)
+
+
+def build_video_cases(crowd, iterations):
+    """
+    100-frame MJPEG clip: inference on every frame vs frame skipping with and
+    without the motion gate (video group, items = frames)
+    """
+    import io
+
+    clip = make_mjpeg_clip()
+    settings = [
+        ('every frame', 1, 0.0),
+        ('every 5 + motion', 5, 0.03),
+        ('every 10', 10, 0.0),
+        ('motion only', 0, 0.03)
+    ]
+    return [
+        BenchmarkCase(
+            f'crowd.video[{label}]', 'crowd_detection',
+            lambda every_n=every_n, motion=motion: list(crowd.predict_video(
+                io.BytesIO(clip), every_n=every_n, motion_threshold=motion, fps=25)),
+            items=100, iterations=iterations(3), group='video'
+        )
+        for label, every_n, motion in settings
+    ]
+
+
+def match_boxes(reference, candidate, iou_threshold=0.5):
+    """Greedy one-to-one matches between two (N, 4) xyxy box sets at an IoU threshold"""
+    if len(reference) == 0 or len(candidate) == 0:
+        return 0
+    x1 = np.maximum(reference[:, None, 0], candidate[None, :, 0])
+    y1 = np.maximum(reference[:, None, 1], candidate[None, :, 1])
+    x2 = np.minimum(reference[:, None, 2], candidate[None, :, 2])
+    y2 = np.minimum(reference[:, None, 3], candidate[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = lambda boxes: (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    iou = inter / np.maximum(area(reference)[:, None] + area(candidate)[None, :] - inter, 1e-9)
+
+    matched = 0
+    while iou.size and iou.max() >= iou_threshold:
+        i, j = np.unravel_index(iou.argmax(), iou.shape)
+        matched += 1
+        iou[i, :] = 0
+        iou[:, j] = 0
+    return matched
+
+
+def compare_yolo_accuracy(crowd, detectors, images):
+    """
+    Person detections of each YOLO backend against the first one (IoU >= 0.5)
+
+    Returns:
+        dict: backend -> people found, recall/precision vs the reference and
+              mean absolute count difference per image
+    """
+    names = list(detectors)
+    if len(names) < 2 or not images:
+        return {}
+
+    found = {name: [] for name in names}
+    for image in images:
+        for name in names:
+            detector, _ = detectors[name]
+            boxes, _ = crowd._person_boxes(detector([image])[0])
+            found[name].append(boxes)
+
+    reference = names[0]
+    report = {}
+    for name in names:
+        matched = sum(match_boxes(ref, boxes) for ref, boxes in zip(found[reference], found[name]))
+        reference_total = sum(len(boxes) for boxes in found[reference])
+        total = sum(len(boxes) for boxes in found[name])
+        report[name] = {
+            'people': total,
+            'recall': round(matched / reference_total, 3) if reference_total else None,
+            'precision': round(matched / total, 3) if total else None,
+            'count_mae': round(float(np.mean([abs(len(a) - len(b)) for a, b in zip(found[reference], found[name])])), 2)
+        }
+
+    print(f"\nyolo_backends accuracy vs {reference} ({len(images)} images, IoU >= 0.5)")
+    for name, r in report.items():
+        print(f"  {name:<16}{r['people']:>8} people  recall {r['recall']}  precision {r['precision']}  count MAE {r['count_mae']}")
+    return report
+
+
+def load_crowd_images(pattern, limit=50):
+    """Frames for the YOLO accuracy comparison: files matching a glob, or synthetic crowds"""
+    import cv2
+
+    if pattern:
+        images = [cv2.imread(path) for path in sorted(glob.glob(pattern))[:limit]]
+        return [image for image in images if image is not None]
+    return [make_crowd_image(1280, 720, people, seed=people) for people in (10, 40, 120)]
+
+
+def backend_of(result):
+    """The `model_used` field of a (batch) result, if any"""
+    if isinstance(result, list):
+        result = next((item for item in result if isinstance(item, dict) and 'error' not in item), None)
+    return result.get('model_used') if isinstance(result, dict) else None
+
+
+def run_case(case, warmup=2):
+    """Time one case; peak memory is measured in a separate traced call"""
+    result = None
+    for _ in range(warmup):
+        result = case.run()
+
+    latencies = []
+    total_start = time.perf_counter()
+    for _ in range(case.iterations):
+        start = time.perf_counter()
+        case.run()
+        latencies.append(time.perf_counter() - start)
+    total = time.perf_counter() - total_start
+
+    # tracemalloc slows allocations down, so it stays out of the timed loop
+    tracemalloc.start()
+    case.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'model': case.model,
+        'backend': backend_of(result),
+        'group': case.group,
+        'iterations': case.iterations,
+        'items_per_call': case.items,
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies_ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3),
+        'mean_ms': round(float(latencies_ms.mean()), 3),
+        'throughput_per_s': round(case.items * case.iterations / total, 2) if total > 0 else None,
+        'peak_memory_mb': round(peak / (1024 * 1024), 3)
+    }
+
+
+def environment_info():
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__
+    }
+    try:
+        import cv2
+        info['opencv'] = cv2.__version__
+    except ImportError:
+        pass
+    try:
+        import sklearn
+        info['sklearn'] = sklearn.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def compare_with_baseline(results, baseline, threshold, min_delta_ms=1.0, min_delta_mb=0.1):
+    """
+    Find cases that got slower or hungrier than the baseline
+
+    Args:
+        results (dict): Case name -> metrics for this run
+        baseline (dict): Case name -> metrics from the baseline file
+        threshold (float): Allowed relative increase (0.2 = 20%)
+        min_delta_ms (float): Ignore latency changes smaller than this (timer noise on tiny cases)
+        min_delta_mb (float): Ignore peak memory changes smaller than this
+
+    Returns:
+        list: One dict per regressed metric
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous.get('backend') != current.get('backend'):
+            # Different backend (e.g. YOLO vs OpenCV fallback): not comparable
+            continue
+        for metric in REGRESSION_METRICS:
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            if metric.endswith('_ms') and after - before < min_delta_ms:
+                continue
+            if metric.endswith('_mb') and after - before < min_delta_mb:
+                continue
+            change = (after - before) / before
+            if change > threshold:
+                regressions.append({
+                    'case': name,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'change': round(change, 3)
+                })
+    return regressions
+
+
+def print_table(results, baseline=None):
+    print(f"\n{'case':<34}{'backend':>16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'items/s':>12}{'peak MB':>10}{'vs base':>9}")
+    for name, r in results.items():
+        previous = (baseline or {}).get(name)
+        delta = ''
+        if previous and previous.get('p50_ms'):
+            delta = f"{(r['p50_ms'] - previous['p50_ms']) / previous['p50_ms']:+.0%}"
+        print(f"{name:<34}{str(r['backend']):>16}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['throughput_per_s']:>12}{r['peak_memory_mb']:>10}{delta:>9}")
+
+
+def print_group_speedups(results):
+    """Speedup of each case relative to the first case of its group"""
+    groups = {}
+    for name, r in results.items():
+        if r.get('group'):
+            groups.setdefault(r['group'], []).append((name, r))
+
+    for group, members in groups.items():
+        reference_name, reference = members[0]
+        print(f"\n{group} (speedup vs {reference_name}, p50)")
+        for name, r in members:
+            speedup = reference['p50_ms'] / r['p50_ms'] if r['p50_ms'] else 0.0
+            print(f"  {name:<40}{r['p50_ms']:>10} ms{speedup:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the AI models in-process')
+    parser.add_argument('--models', default='crowd_detection,anomaly_detection,risk_prediction,chatbot',
+                        help='Comma-separated models to benchmark')
+    parser.add_argument('--only', help='Only run cases whose name contains this substring')
+    parser.add_argument('--quick', action='store_true', help='Fewer sizes and iterations')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline')
+    parser.add_argument('--output', help='Also write this run to a JSON file')
+    parser.add_argument('--crowd-images', help='Glob of real frames for the YOLO backend accuracy comparison')
+    parser.add_argument('--threshold', type=float, default=float(os.getenv('BENCHMARK_REGRESSION_THRESHOLD', 0.2)),
+                        help='Relative increase counted as a regression (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    models = load_models([name.strip() for name in args.models.split(',') if name.strip()])
+    crowd = models.get('crowd_detection')
+    yolo_detectors = load_yolo_detectors(crowd) if crowd is not None else {}
+    cases = build_cases(models, quick=args.quick, yolo_detectors=yolo_detectors)
+    if args.only:
+        cases = [case for case in cases if args.only in case.name]
+
+    results = {}
+    for case in cases:
+        print(f"Running {case.name} ({case.iterations} iterations)...")
+        results[case.name] = run_case(case)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+
+    print_table(results, baseline)
+    print_group_speedups(results)
+
+    yolo_accuracy = {}
+    if any(case.group == 'yolo_backends' for case in cases):
+        yolo_accuracy = compare_yolo_accuracy(crowd, yolo_detectors, load_crowd_images(args.crowd_images))
+
+    report = {'timestamp': time.time(), 'environment': environment_info(), 'results': results}
+    if yolo_accuracy:
+        report['yolo_accuracy'] = yolo_accuracy
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        # Keep baseline entries for cases not run this time (--only / --models)
+        merged = dict(baseline)
+        merged.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({**report, 'results': merged}, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    regressions = compare_with_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for r in regressions:
+            print(f"  {r['case']} {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']:+.0%})")
+        return 1
+
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# Serving benchmark: Flask dev server vs the ASGI entry point
+#
+# Starts both servers on localhost in this process (sharing the same loaded
+# models), keeps them busy with slow inference requests and measures how the
+# cheap /health and chatbot requests fare at the same time.
+#
+#   python benchmarks/serving_benchmark.py --duration 10 --heavy-clients 8
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_image_bytes(width=1280, height=720, seed=0):
+    """Synthetic JPEG frame"""
+    import cv2
+
+    rng = np.random.RandomState(seed)
+    image = rng.randint(0, 255, size=(height, width, 3), dtype=np.uint8)
+    ok, buffer = cv2.imencode('.jpg', image)
+    return buffer.tobytes()
+
+
+def start_flask(host, port):
+    from werkzeug.serving import make_server
+    from app import app as flask_app, initialize_models
+
+    initialize_models()
+    server = make_server(host, port, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def start_asgi(host, port):
+    import uvicorn
+    from asgi import app as asgi_app
+
+    class ThreadedServer(uvicorn.Server):
+        def install_signal_handlers(self):
+            pass
+
+    server = ThreadedServer(uvicorn.Config(asgi_app, host=host, port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+    return stop
+
+
+def wait_ready(base_url, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{base_url}/ready', timeout=2).status_code == 200:
+                return True
+        except requests.exceptions.ConnectionError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def heavy_client(base_url, images, stop_event, counter):
+    """Keep the inference endpoints busy"""
+    session = requests.Session()
+    entries = [{'historical_data': [0.2, 0.4, 0.5], 'current_conditions': {'crowd_density': 0.7}}] * 500
+    while not stop_event.is_set():
+        files = [('images', (f'cam{i}.jpg', data, 'image/jpeg')) for i, data in enumerate(images)]
+        session.post(f'{base_url}/predict/crowd-detection/batch', files=files)
+        session.post(f'{base_url}/predict/risk-prediction/batch', json={'entries': entries})
+        counter.append(1)
+
+
+def light_client(base_url, stop_event, latencies):
+    """Measure the latency of cheap requests"""
+    session = requests.Session()
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        session.get(f'{base_url}/health')
+        latencies['health'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        session.post(f'{base_url}/predict/chatbot', json={'message': 'Where is the police station?'})
+        latencies['chatbot'].append(time.perf_counter() - start)
+        time.sleep(0.01)
+
+
+def run_scenario(name, base_url, args, images):
+    stop_event = threading.Event()
+    heavy_done = []
+    latencies = {'health': [], 'chatbot': []}
+
+    with ThreadPoolExecutor(max_workers=args.heavy_clients + args.light_clients) as pool:
+        for _ in range(args.heavy_clients):
+            pool.submit(heavy_client, base_url, images, stop_event, heavy_done)
+        for _ in range(args.light_clients):
+            pool.submit(light_client, base_url, stop_event, latencies)
+        time.sleep(args.duration)
+        stop_event.set()
+
+    report = {'server': name, 'heavy_rounds_per_s': round(len(heavy_done) / args.duration, 2)}
+    for endpoint, samples in latencies.items():
+        samples_ms = np.array(samples) * 1000 if samples else np.array([0.0])
+        report[endpoint] = {
+            'requests': len(samples),
+            'p50_ms': round(float(np.percentile(samples_ms, 50)), 1),
+            'p95_ms': round(float(np.percentile(samples_ms, 95)), 1),
+            'p99_ms': round(float(np.percentile(samples_ms, 99)), 1)
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Flask and ASGI serving paths')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--flask-port', type=int, default=8101)
+    parser.add_argument('--asgi-port', type=int, default=8102)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per scenario')
+    parser.add_argument('--heavy-clients', type=int, default=8)
+    parser.add_argument('--light-clients', type=int, default=4)
+    parser.add_argument('--images', type=int, default=4, help='Images per crowd batch request')
+    args = parser.parse_args()
+
+    images = [make_image_bytes(seed=i) for i in range(args.images)]
+
+    servers = [
+        ('flask', start_flask, args.flask_port),
+        ('asgi', start_asgi, args.asgi_port)
+    ]
+
+    reports = []
+    for name, start, port in servers:
+        base_url = f'http://{args.host}:{port}'
+        stop = start(args.host, port)
+        if not wait_ready(base_url):
+            print(f'{name}: models did not become ready')
+            stop()
+            continue
+        reports.append(run_scenario(name, base_url, args, images))
+        stop()
+
+    print(f"\n{'server':<8}{'heavy/s':>10}{'health p50':>12}{'p95':>8}{'p99':>8}{'chat p50':>10}{'p95':>8}{'p99':>8}")
+    for report in reports:
+        health, chatbot = report['health'], report['chatbot']
+        print(f"{report['server']:<8}{report['heavy_rounds_per_s']:>10}"
+              f"{health['p50_ms']:>12}{health['p95_ms']:>8}{health['p99_ms']:>8}"
+              f"{chatbot['p50_ms']:>10}{chatbot['p95_ms']:>8}{chatbot['p99_ms']:>8}")
+
+
+if __name__ == '__main__':
+    main()
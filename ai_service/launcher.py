@@ -0,0 +1,300 @@
+# Pre-fork multi-worker launcher for the Smart Tourist Safety AI Service
+#
+# Loads every model once in the master process, then forks N workers that
+# share the fitted forests, scalers and weights copy-on-write and accept
+# connections from one shared listening socket.
+#
+#   python launcher.py --workers 4 --max-requests 1000
+#
+# Signals (master):
+#   SIGHUP          graceful reload: reload models, then roll workers one by one
+#   SIGTERM/SIGINT  graceful shutdown
+#
+# Linux/macOS only (requires os.fork).
+
+import argparse
+import gc
+import json
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+
+from app import app, model_loader, logger, disable_risk_feed, report_model_imports, MODEL_FACTORIES
+
+
+def read_memory_mb(pid):
+    """
+    Memory usage of a process in MB
+
+    Returns RSS plus PSS (proportional set size, which splits shared
+    copy-on-write pages between the processes that map them) when available
+    """
+    memory = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'):
+                    memory[key.lower()] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        try:
+            with open(f'/proc/{pid}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        memory['rss'] = round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            pass
+    return memory
+
+
+class Worker:
+    """Child process serving requests from the shared socket"""
+
+    def __init__(self, sock, max_requests, threads):
+        self.sock = sock
+        self.max_requests = max_requests
+        self.threads = threads
+        self.should_exit = False
+        self.handled = 0
+        self._handled_lock = threading.Lock()
+
+    def run(self):
+        from werkzeug.serving import make_server
+
+        # Reset handlers inherited from the master
+        signal.signal(signal.SIGTERM, self._handle_exit)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        # Forked workers would otherwise share the master's random state
+        random.seed()
+        try:
+            import numpy as np
+            np.random.seed()
+        except ImportError:
+            pass
+
+        host, port = self.sock.getsockname()[:2]
+        server = make_server(host, port, self._counted_app, threaded=self.threads > 1, fd=self.sock.fileno())
+        server.timeout = 1.0  # Wake up regularly to check the exit flag
+        # werkzeug makes request threads daemonic; track them so server_close() joins
+        # in-flight requests before the worker exits (the master kills it after --graceful-timeout)
+        server.daemon_threads = False
+        server.block_on_close = True
+
+        logger.info(f"👷 Worker {os.getpid()} serving (max_requests={self.max_requests or 'unlimited'})")
+        while not self.should_exit:
+            server.handle_request()
+            if self.max_requests and self.handled >= self.max_requests:
+                logger.info(f"♻️ Worker {os.getpid()} recycling after {self.handled} requests")
+                break
+
+        if self.threads > 1:
+            logger.info(f"Worker {os.getpid()} waiting for in-flight requests")
+        server.server_close()  # Stops accepting and joins the request threads
+        os._exit(0)
+
+    def _counted_app(self, environ, start_response):
+        with self._handled_lock:
+            self.handled += 1
+        return app(environ, start_response)
+
+    def _handle_exit(self, signum, frame):
+        self.should_exit = True
+
+
+class Launcher:
+    """
+    Master process
+    Owns the listening socket and the loaded models, forks and supervises workers
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.workers = {}  # pid -> start time
+        self.sock = None
+        self.reload_requested = False
+        self.stop_requested = False
+        self.last_report = 0.0
+
+    def _max_requests(self):
+        """Per-worker request limit with jitter so workers do not recycle in lockstep"""
+        if not self.args.max_requests:
+            return 0
+        return self.args.max_requests + random.randint(0, self.args.max_requests_jitter)
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.args.host, self.args.port))
+        sock.listen(self.args.backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def _load_models(self, reload=False):
+        start_time = time.time()
+        model_loader.start(MODEL_FACTORIES, reload=reload)
+        model_loader.wait()
+        logger.info(f"Models loaded in master in {time.time() - start_time:.2f}s")
+        if not reload:
+            report_model_imports()  # Forked workers inherit the report
+
+        # Move everything allocated so far out of the GC's reach so collections
+        # in the workers do not touch (and copy) the shared pages
+        gc.collect()
+        gc.freeze()
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            Worker(self.sock, self._max_requests(), self.args.threads).run()
+        self.workers[pid] = time.time()
+        return pid
+
+    def _reap(self):
+        """Collect exited workers; returns their pids"""
+        exited = []
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid in self.workers:
+                del self.workers[pid]
+                exited.append(pid)
+        return exited
+
+    def _reload(self):
+        """Reload models, then replace workers one at a time"""
+        logger.info("🔄 Graceful reload requested")
+        gc.unfreeze()
+        self._load_models(reload=True)
+
+        for old_pid in list(self.workers):
+            self._spawn()
+            self._stop_worker(old_pid)
+        logger.info("🔄 Graceful reload completed")
+
+    def _stop_worker(self, pid, timeout=None):
+        timeout = self.args.graceful_timeout if timeout is None else timeout
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+            return
+
+        try:
+            deadline = time.time() + timeout
+            while time.time() < deadline:
+                finished, _ = os.waitpid(pid, os.WNOHANG)
+                if finished:
+                    break
+                time.sleep(0.1)
+            else:
+                logger.warning(f"Worker {pid} did not stop in {timeout}s, killing it")
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass  # Already reaped
+        self.workers.pop(pid, None)
+
+    def report_memory(self):
+        """Log (and optionally write) per-worker memory usage"""
+        report = {
+            'timestamp': time.time(),
+            'master': {'pid': os.getpid(), **read_memory_mb(os.getpid())},
+            'workers': [
+                {'pid': pid, 'uptime': round(time.time() - started, 1), **read_memory_mb(pid)}
+                for pid, started in sorted(self.workers.items())
+            ]
+        }
+
+        for worker in report['workers']:
+            logger.info(
+                f"📊 Worker {worker['pid']}: rss={worker.get('rss', '?')}MB pss={worker.get('pss', '?')}MB "
+                f"shared={round(worker.get('shared_clean', 0) + worker.get('shared_dirty', 0), 1)}MB"
+            )
+
+        if self.args.status_file:
+            with open(self.args.status_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        return report
+
+    def run(self):
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("The pre-fork launcher requires os.fork (Linux/macOS)")
+        if self.args.workers > 1:
+            # Each worker would hold its own feed: zones published to one worker never
+            # reach subscribers connected to another
+            disable_risk_feed(
+                f"it keeps its state in one process and {self.args.workers} workers are starting; "
+                "run with --workers 1 to serve it"
+            )
+
+        self._load_models()
+        self.sock = self._bind()
+
+        signal.signal(signal.SIGHUP, lambda signum, frame: setattr(self, 'reload_requested', True))
+        signal.signal(signal.SIGTERM, lambda signum, frame: setattr(self, 'stop_requested', True))
+        signal.signal(signal.SIGINT, lambda signum, frame: setattr(self, 'stop_requested', True))
+
+        for _ in range(self.args.workers):
+            self._spawn()
+        logger.info(f"🚀 AI Service master {os.getpid()} on {self.args.host}:{self.args.port} with {self.args.workers} workers")
+
+        try:
+            while not self.stop_requested:
+                for pid in self._reap():
+                    logger.info(f"Worker {pid} exited, starting a replacement")
+                while len(self.workers) < self.args.workers and not self.stop_requested:
+                    self._spawn()
+
+                if self.reload_requested:
+                    self.reload_requested = False
+                    self._reload()
+
+                if self.args.report_interval and time.time() - self.last_report >= self.args.report_interval:
+                    self.last_report = time.time()
+                    self.report_memory()
+
+                time.sleep(0.5)
+        finally:
+            logger.info("Shutting down workers...")
+            for pid in list(self.workers):
+                self._stop_worker(pid)
+            self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-fork multi-worker launcher for the AI service')
+    parser.add_argument('--host', default=os.getenv('HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WORKERS', os.cpu_count() or 2)))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WORKER_THREADS', 1)),
+                        help='Threads per worker (1 = one request at a time)')
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('WORKER_MAX_REQUESTS', 0)),
+                        help='Recycle a worker after this many requests (0 = never)')
+    parser.add_argument('--max-requests-jitter', type=int, default=int(os.getenv('WORKER_MAX_REQUESTS_JITTER', 50)))
+    parser.add_argument('--graceful-timeout', type=float, default=float(os.getenv('WORKER_GRACEFUL_TIMEOUT', 30)))
+    parser.add_argument('--backlog', type=int, default=2048)
+    parser.add_argument('--report-interval', type=float, default=float(os.getenv('WORKER_REPORT_INTERVAL', 60)),
+                        help='Seconds between per-worker memory reports (0 = off)')
+    parser.add_argument('--status-file', default=os.getenv('WORKER_STATUS_FILE'),
+                        help='Write the per-worker memory report to this JSON file')
+    args = parser.parse_args()
+
+    try:
+        Launcher(args).run()
+    except Exception as e:
+        logger.error(f"Failed to start AI service launcher: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,30 @@
 # AI Models Package for Smart Tourist Safety System
 
-from .crowd_detection import CrowdDetectionModel
-from .anomaly_detection import AnomalyDetectionModel
-from .risk_prediction import RiskPredictionModel
-from .chatbot import ChatbotModel
+# Model classes are imported on first access so that importing the package (or
+# one light model) does not pull in OpenCV, scikit-learn, etc.
+import importlib
+
+_MODEL_MODULES = {
+    'CrowdDetectionModel': '.crowd_detection',
+    'AnomalyDetectionModel': '.anomaly_detection',
+    'RiskPredictionModel': '.risk_prediction',
+    'ChatbotModel': '.chatbot'
+}
 
 __all__ = [
     'CrowdDetectionModel',
-    'AnomalyDetectionModel', 
+    'AnomalyDetectionModel',
     'RiskPredictionModel',
     'ChatbotModel'
 ]
+
+
+def __getattr__(name):
+    if name in _MODEL_MODULES:
+        module = importlib.import_module(_MODEL_MODULES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,5 +1,6 @@
 import numpy as np
-import pandas as pd
+import joblib
+import sklearn
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
@@ -7,10 +8,16 @@ import logging
 import random
 import time
 import os
+from collections import deque
 from datetime import datetime, timedelta
+from utils.artifact_cache import ArtifactCache
+from utils.timing import phase
 
 logger = logging.getLogger(__name__)
 
+# Fields of a per-window result emitted by score_stream (a subset of the predict() contract)
+STREAM_RESULT_FIELDS = ('anomaly_detected', 'anomaly_score', 'average_score', 'confidence', 'patterns', 'data_points_analyzed')
+
 class AnomalyDetectionModel:
     """
     Anomaly Detection Model using Isolation Forest
@@ -23,6 +30,8 @@ class AnomalyDetectionModel:
         self.pca = PCA(n_components=0.95)  # Keep 95% of variance
         self.is_fitted = False
         self.contamination = float(os.getenv('ISOLATION_FOREST_CONTAMINATION', 0.1))
+        self.seed = int(os.getenv('MODEL_SEED', 42))
+        self.artifact_cache = ArtifactCache()
         
         try:
             self._initialize_model()
@@ -33,21 +42,76 @@ class AnomalyDetectionModel:
         """Initialize the Isolation Forest model"""
         self.model = IsolationForest(
             contamination=self.contamination,
-            random_state=42,
+            random_state=self.seed,
             n_estimators=100,
             max_samples='auto',
             n_jobs=-1
         )
         
+        # Reuse the fitted estimators from a previous run when the config matches
+        if self._load_cached_artifacts():
+            logger.info("Anomaly detection model initialized from artifact cache")
+            return
+        
         # Generate and fit with synthetic training data
         self._generate_training_data()
+        self._save_cached_artifacts()
         logger.info("Anomaly detection model initialized successfully")
     
+    def _artifact_config(self):
+        """Config that the fitted estimators depend on (the artifact cache key)"""
+        return {
+            'model': 'isolation_forest',
+            'contamination': self.contamination,
+            'n_estimators': self.model.n_estimators,
+            'pca_n_components': self.pca.n_components,
+            'n_samples': 1000,
+            'seed': self.seed,
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__
+        }
+    
+    def _load_cached_artifacts(self):
+        """Restore scaler, PCA and Isolation Forest from the artifact cache"""
+        artifacts = self.artifact_cache.load(
+            'anomaly_detection',
+            self._artifact_config(),
+            lambda entry_dir: joblib.load(os.path.join(entry_dir, 'estimators.joblib'))
+        )
+        if not artifacts:
+            return False
+        
+        try:
+            scaler, pca, model = artifacts['scaler'], artifacts['pca'], artifacts['model']
+            # Make sure the estimators are actually fitted before trusting them
+            if not hasattr(scaler, 'mean_') or not hasattr(pca, 'components_') or not hasattr(model, 'estimators_'):
+                raise ValueError("cached estimators are not fitted")
+        except Exception as e:
+            logger.warning(f"Ignoring invalid cached anomaly artifacts: {e}")
+            return False
+        
+        self.scaler, self.pca, self.model = scaler, pca, model
+        self.is_fitted = True
+        return True
+    
+    def _save_cached_artifacts(self):
+        """Store the fitted estimators so warm restarts skip training"""
+        if not self.is_fitted:
+            return
+        
+        estimators = {'scaler': self.scaler, 'pca': self.pca, 'model': self.model}
+        self.artifact_cache.save(
+            'anomaly_detection',
+            self._artifact_config(),
+            lambda entry_dir: joblib.dump(estimators, os.path.join(entry_dir, 'estimators.joblib'))
+        )
+    
     def _generate_training_data(self):
         """Generate synthetic training data for the model"""
         try:
             # Generate normal behavior patterns
-            np.random.seed(42)
+            # Local generator: models load concurrently, so the global NumPy state is shared
+            rng = np.random.RandomState(self.seed)
             n_samples = 1000
             
             # Features: [crowd_density, movement_speed, noise_level, time_of_day, day_of_week, weather_score]
@@ -55,12 +119,12 @@ class AnomalyDetectionModel:
             
             for i in range(n_samples):
                 # Normal patterns
-                crowd_density = np.random.beta(2, 5)  # Usually lower density
-                movement_speed = np.random.normal(3.0, 1.0)  # Average walking speed
-                noise_level = np.random.normal(45, 10)  # Normal noise in dB
-                time_of_day = np.random.uniform(6, 22)  # 6 AM to 10 PM
-                day_of_week = np.random.randint(1, 8)  # 1-7 for days
-                weather_score = np.random.beta(3, 2)  # Usually good weather
+                crowd_density = rng.beta(2, 5)  # Usually lower density
+                movement_speed = rng.normal(3.0, 1.0)  # Average walking speed
+                noise_level = rng.normal(45, 10)  # Normal noise in dB
+                time_of_day = rng.uniform(6, 22)  # 6 AM to 10 PM
+                day_of_week = rng.randint(1, 8)  # 1-7 for days
+                weather_score = rng.beta(3, 2)  # Usually good weather
                 
                 # Add some correlation patterns
                 if 10 <= time_of_day <= 16:  # Peak hours
@@ -82,23 +146,23 @@ class AnomalyDetectionModel:
             
             for i in range(n_anomalies):
                 # Create anomalous patterns
-                crowd_density = np.random.choice([
-                    np.random.beta(5, 1),  # Very high density
-                    np.random.beta(1, 10)  # Very low density
+                crowd_density = rng.choice([
+                    rng.beta(5, 1),  # Very high density
+                    rng.beta(1, 10)  # Very low density
                 ])
-                movement_speed = np.random.choice([
-                    np.random.normal(8.0, 1.0),  # Very fast movement
-                    np.random.normal(0.5, 0.2)   # Very slow movement
+                movement_speed = rng.choice([
+                    rng.normal(8.0, 1.0),  # Very fast movement
+                    rng.normal(0.5, 0.2)   # Very slow movement
                 ])
-                noise_level = np.random.choice([
-                    np.random.normal(80, 5),   # Very loud
-                    np.random.normal(20, 3)    # Very quiet
+                noise_level = rng.choice([
+                    rng.normal(80, 5),   # Very loud
+                    rng.normal(20, 3)    # Very quiet
                 ])
-                time_of_day = np.random.uniform(0, 24)
-                day_of_week = np.random.randint(1, 8)
-                weather_score = np.random.choice([
-                    np.random.beta(1, 5),  # Bad weather
-                    np.random.beta(8, 1)   # Perfect weather
+                time_of_day = rng.uniform(0, 24)
+                day_of_week = rng.randint(1, 8)
+                weather_score = rng.choice([
+                    rng.beta(1, 5),  # Bad weather
+                    rng.beta(8, 1)   # Perfect weather
                 ])
                 
                 anomaly_data.append([
@@ -139,47 +203,206 @@ class AnomalyDetectionModel:
                 return self._generate_mock_result()
             
             # Process input data
-            processed_data = self._process_input_data(data, time_window)
+            with phase('features'):
+                processed_data = self._process_input_data(data, time_window)
             
             if len(processed_data) == 0:
                 return self._generate_mock_result()
             
-            # Scale and transform data
-            scaled_data = self.scaler.transform(processed_data)
-            pca_data = self.pca.transform(scaled_data)
+            anomaly_scores = self._score(processed_data)
+            with phase('postprocess'):
+                return self._summarize(processed_data, anomaly_scores, time_window)
             
-            # Predict anomalies
-            anomaly_scores = self.model.decision_function(pca_data)
-            anomaly_predictions = self.model.predict(pca_data)
+        except Exception as e:
+            logger.error(f"Anomaly prediction error: {e}")
+            return self._generate_mock_result()
+    
+    def predict_batch(self, streams, time_window=60):
+        """
+        Predict anomalies for several named streams in one scoring pass
+        
+        Args:
+            streams (list): Dicts with 'name', 'data' and an optional per-stream 'time_window'
+            time_window (int): Default time window in minutes for analysis
             
-            # Analyze results
-            anomaly_detected = -1 in anomaly_predictions
-            avg_anomaly_score = np.mean(anomaly_scores)
-            min_anomaly_score = np.min(anomaly_scores)
+        Returns:
+            list: One result per stream, in input order. A stream without usable
+                data gets an error entry instead of failing the whole batch
+        """
+        results = [None] * len(streams)
+        
+        try:
+            if not self.is_fitted:
+                return [self._generate_mock_result() for _ in streams]
+            
+            # Extract features per stream, then score every row in one pass
+            matrices = []
+            scored = []  # (index, processed_data, time_window)
+            for index, stream in enumerate(streams):
+                window = stream.get('time_window', time_window)
+                data = stream.get('data', [])
+                with phase('features'):
+                    processed_data = self._process_input_data(data, window) if data else []
+                
+                if len(processed_data) == 0:
+                    results[index] = {'error': 'No usable data points in stream'}
+                    continue
+                
+                processed_data = np.asarray(processed_data, dtype=float)
+                if processed_data.ndim != 2 or processed_data.shape[1] != self.scaler.n_features_in_:
+                    results[index] = {'error': f'Expected {self.scaler.n_features_in_} features per data point'}
+                    continue
+                
+                matrices.append(processed_data)
+                scored.append((index, processed_data, window))
             
-            # Calculate confidence based on score distribution
-            confidence = self._calculate_confidence(anomaly_scores)
+            if not matrices:
+                return results
             
-            # Identify patterns
-            patterns = self._identify_patterns(processed_data, anomaly_predictions)
+            anomaly_scores = self._score(np.vstack(matrices))
             
-            # Generate recommendations
-            recommendations = self._generate_recommendations(anomaly_detected, patterns)
+            # Split the scores back per stream
+            split_points = np.cumsum([len(matrix) for matrix in matrices])[:-1]
+            with phase('postprocess'):
+                for (index, processed_data, window), stream_scores in zip(scored, np.split(anomaly_scores, split_points)):
+                    results[index] = self._summarize(processed_data, stream_scores, window)
             
-            return {
-                'anomaly_detected': bool(anomaly_detected),
-                'anomaly_score': float(abs(min_anomaly_score)),  # Use most anomalous score
-                'average_score': float(abs(avg_anomaly_score)),
-                'confidence': float(confidence),
-                'patterns': patterns,
-                'recommendations': recommendations,
-                'data_points_analyzed': len(processed_data),
-                'time_window_minutes': time_window
-            }
+            return results
             
         except Exception as e:
-            logger.error(f"Anomaly prediction error: {e}")
-            return self._generate_mock_result()
+            logger.error(f"Batch anomaly prediction error: {e}")
+            return [result if result is not None else self._generate_mock_result() for result in results]
+    
+    def score_stream(self, points, window_size=60, step=None, time_window=60, batch_windows=16, max_delay=0.25):
+        """
+        Score an unbounded sequence of data points window by window
+        
+        Only the current window and the windows waiting to be scored are held in
+        memory, so the input can be arbitrarily long. Pending windows are scored
+        together in one pass once batch_windows have accumulated or the oldest
+        has waited max_delay seconds (checked as new points arrive).
+        
+        Args:
+            points (iterable): Numbers (a time series), feature lists or feature dicts
+            window_size (int): Points per window
+            step (int): Points between window starts (default window_size, i.e. no overlap)
+            time_window (int): Time window in minutes, as for predict()
+            batch_windows (int): Windows scored per pass
+            max_delay (float): Seconds a window may wait for its batch to fill
+            
+        Yields:
+            dict: Per-window result with 'window', 'start' and 'end' (point
+                positions, end exclusive); a window without usable data gets
+                an 'error' entry
+        """
+        step = step or window_size
+        window = deque(maxlen=window_size)
+        pending = []  # (window index, start, end, partial, feature rows)
+        pending_since = None
+        next_end = window_size
+        window_index = 0
+        count = 0
+        
+        for count, point in enumerate(points, start=1):
+            window.append(point)
+            if count < next_end:
+                continue
+            
+            pending.append(self._stream_window(window_index, count - len(window), count, window, time_window))
+            window_index += 1
+            next_end += step
+            if pending_since is None:
+                pending_since = time.perf_counter()
+            if len(pending) >= batch_windows or time.perf_counter() - pending_since >= max_delay:
+                yield from self._score_stream_windows(pending, time_window)
+                pending, pending_since = [], None
+        
+        # Points not covered by a full window form a final, partial window
+        tail_length = count - (next_end - window_size)
+        if tail_length > 0 and count > next_end - step:
+            tail = list(window)[-tail_length:]
+            pending.append(self._stream_window(window_index, count - tail_length, count, tail, time_window, partial=True))
+        
+        if pending:
+            yield from self._score_stream_windows(pending, time_window)
+    
+    def _stream_window(self, index, start, end, points, time_window, partial=False):
+        """Extract the feature rows of one streamed window"""
+        points = list(points)
+        with phase('features'):
+            if points and isinstance(points[0], (int, float)):
+                rows = [self._timeseries_window_features(points, start, datetime.now())] if len(points) >= 2 else []
+            else:
+                rows = self._process_input_data(points, time_window) if points else []
+        return index, start, end, partial, rows
+    
+    def _score_stream_windows(self, pending, time_window):
+        """Score a group of streamed windows in one pass and yield their results in order"""
+        results = {}
+        matrices = []
+        scored = []
+        for index, _, _, _, rows in pending:
+            rows = np.asarray(rows, dtype=float) if len(rows) else np.empty((0, 0))
+            if len(rows) == 0:
+                results[index] = {'error': 'No usable data points in window'}
+            elif rows.ndim != 2 or rows.shape[1] != self.scaler.n_features_in_:
+                results[index] = {'error': f'Expected {self.scaler.n_features_in_} features per data point'}
+            else:
+                matrices.append(rows)
+                scored.append((index, rows))
+        
+        if matrices:
+            anomaly_scores = self._score(np.vstack(matrices))
+            split_points = np.cumsum([len(matrix) for matrix in matrices])[:-1]
+            with phase('postprocess'):
+                for (index, rows), window_scores in zip(scored, np.split(anomaly_scores, split_points)):
+                    summary = self._summarize(rows, window_scores, time_window)
+                    results[index] = {key: summary[key] for key in STREAM_RESULT_FIELDS}
+        
+        for index, start, end, partial, _ in pending:
+            result = {'window': index, 'start': start, 'end': end, **results[index]}
+            if partial:
+                result['partial'] = True
+            yield result
+    
+    def _score(self, processed_data):
+        """Scale, project and score feature rows (negative scores are anomalous)"""
+        with phase('scaling'):
+            scaled_data = self.scaler.transform(processed_data)
+            pca_data = self.pca.transform(scaled_data)
+        with phase('inference'):
+            return self.model.decision_function(pca_data)
+    
+    def _summarize(self, processed_data, anomaly_scores, time_window):
+        """Turn anomaly scores for one stream into the prediction contract"""
+        # Same rule as IsolationForest.predict, without a second scoring pass
+        anomaly_predictions = np.where(anomaly_scores < 0, -1, 1)
+        
+        # Analyze results
+        anomaly_detected = -1 in anomaly_predictions
+        avg_anomaly_score = np.mean(anomaly_scores)
+        min_anomaly_score = np.min(anomaly_scores)
+        
+        # Calculate confidence based on score distribution
+        confidence = self._calculate_confidence(anomaly_scores)
+        
+        # Identify patterns
+        patterns = self._identify_patterns(processed_data, anomaly_predictions)
+        
+        # Generate recommendations
+        recommendations = self._generate_recommendations(anomaly_detected, patterns)
+        
+        return {
+            'anomaly_detected': bool(anomaly_detected),
+            'anomaly_score': float(abs(min_anomaly_score)),  # Use most anomalous score
+            'average_score': float(abs(avg_anomaly_score)),
+            'confidence': float(confidence),
+            'patterns': patterns,
+            'recommendations': recommendations,
+            'data_points_analyzed': len(processed_data),
+            'time_window_minutes': time_window,
+            'model_used': 'IsolationForest'
+        }
     
     def _process_input_data(self, data, time_window):
         """Process and normalize input data"""
@@ -218,20 +441,7 @@ class AnomalyDetectionModel:
                 if len(window) < 2:
                     continue
                 
-                # Statistical features
-                mean_val = np.mean(window)
-                std_val = np.std(window)
-                trend = np.polyfit(range(len(window)), window, 1)[0] if len(window) > 1 else 0
-                
-                # Simulate additional context features
-                time_of_day = (current_time.hour + i * 0.1) % 24
-                day_of_week = current_time.weekday() + 1
-                weather_score = random.uniform(0.4, 0.9)  # Mock weather
-                
-                features.append([
-                    mean_val, std_val, trend,
-                    time_of_day, day_of_week, weather_score
-                ])
+                features.append(self._timeseries_window_features(window, i, current_time))
             
             return np.array(features)
             
@@ -239,6 +449,23 @@ class AnomalyDetectionModel:
             logger.error(f"Feature extraction error: {e}")
             return []
     
+    def _timeseries_window_features(self, window, offset, current_time):
+        """Feature vector for one window of a time series starting at position offset"""
+        # Statistical features
+        mean_val = np.mean(window)
+        std_val = np.std(window)
+        trend = np.polyfit(range(len(window)), window, 1)[0] if len(window) > 1 else 0
+        
+        # Simulate additional context features
+        time_of_day = (current_time.hour + offset * 0.1) % 24
+        day_of_week = current_time.weekday() + 1
+        weather_score = random.uniform(0.4, 0.9)  # Mock weather
+        
+        return [
+            mean_val, std_val, trend,
+            time_of_day, day_of_week, weather_score
+        ]
+    
     def _extract_features_from_dicts(self, data_dicts):
         """Extract features from dictionary format data"""
         try:
@@ -287,23 +514,25 @@ class AnomalyDetectionModel:
                 return patterns
             
             # Analyze data for common patterns
-            data_df = pd.DataFrame(data)
+            values = np.asarray(data, dtype=float)
+            if values.ndim == 1:
+                values = values.reshape(-1, 1)
             
             # High values pattern
-            for col_idx in range(data_df.shape[1]):
-                col_data = data_df.iloc[:, col_idx]
+            for col_idx in range(values.shape[1]):
+                col_data = values[:, col_idx]
                 if np.any(col_data > np.mean(col_data) + 2 * np.std(col_data)):
                     patterns.append(f'high_values_feature_{col_idx}')
             
             # Low values pattern
-            for col_idx in range(data_df.shape[1]):
-                col_data = data_df.iloc[:, col_idx]
+            for col_idx in range(values.shape[1]):
+                col_data = values[:, col_idx]
                 if np.any(col_data < np.mean(col_data) - 2 * np.std(col_data)):
                     patterns.append(f'low_values_feature_{col_idx}')
             
             # Rapid changes
-            for col_idx in range(data_df.shape[1]):
-                col_data = data_df.iloc[:, col_idx]
+            for col_idx in range(values.shape[1]):
+                col_data = values[:, col_idx]
                 if len(col_data) > 1:
                     changes = np.diff(col_data)
                     if np.any(np.abs(changes) > 2 * np.std(changes)):
@@ -382,6 +611,7 @@ class AnomalyDetectionModel:
             'recommendations': recommendations,
             'data_points_analyzed': random.randint(10, 50),
             'time_window_minutes': 60,
+            'model_used': 'Mock_Data',
             'note': 'Generated mock data due to model unavailability'
         }
     
@@ -6,6 +6,24 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Emergency intent patterns (en/es/fr) and keywords, shared with admission control
+EMERGENCY_PATTERNS = [
+    r'\b(emergency|help|urgent|police|ambulance|fire|danger|attack|theft|lost)\b',
+    r'\b(emergencia|ayuda|policía|ambulancia|fuego|peligro|robo|perdido)\b',
+    r'\b(urgence|aide|police|ambulance|feu|danger|vol|perdu)\b'
+]
+EMERGENCY_KEYWORDS = ['help', 'emergency', 'police', 'urgent', 'danger', 'lost', 'theft', 'attack']
+
+def is_emergency_message(message):
+    """Cheap emergency intent check that does not need a loaded model"""
+    if not isinstance(message, str) or not message:
+        return False
+    lowered = message.lower()
+    return (
+        any(re.search(pattern, message, re.IGNORECASE) for pattern in EMERGENCY_PATTERNS)
+        or any(keyword in lowered for keyword in EMERGENCY_KEYWORDS)
+    )
+
 class ChatbotModel:
     """
     Multilingual Chatbot Model for Tourist Assistance
@@ -44,11 +62,7 @@ class ChatbotModel:
                 }
             },
             'emergency': {
-                'patterns': [
-                    r'\b(emergency|help|urgent|police|ambulance|fire|danger|attack|theft|lost)\b',
-                    r'\b(emergencia|ayuda|policía|ambulancia|fuego|peligro|robo|perdido)\b',
-                    r'\b(urgence|aide|police|ambulance|feu|danger|vol|perdu)\b'
-                ],
+                'patterns': EMERGENCY_PATTERNS,
                 'responses': {
                     'en': [
                         "This is an emergency situation. Please call 911 immediately or go to the nearest police station.",
@@ -254,7 +268,7 @@ class ChatbotModel:
                         return intent
             
             # Additional keyword-based detection
-            emergency_keywords = ['help', 'emergency', 'police', 'urgent', 'danger', 'lost', 'theft', 'attack']
+            emergency_keywords = EMERGENCY_KEYWORDS
             safety_keywords = ['safe', 'safety', 'secure', 'protect', 'avoid', 'tips', 'advice']
             direction_keywords = ['where', 'how', 'direction', 'location', 'find', 'map', 'way']
             
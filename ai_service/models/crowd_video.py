@@ -0,0 +1,202 @@
+import logging
+import time
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Thumbnail size for the motion gate
+MOTION_SIZE = (64, 48)
+# Per-pixel gray-level change counted as motion (after a small blur and gain compensation)
+MOTION_PIXEL_DELTA = 16
+# Video codecs whose packets are plain JPEGs and can be read raw
+MJPEG_FOURCCS = (b'MJPG', b'JPEG')
+
+def iter_jpeg_frames(stream, read_size=64 * 1024, max_frame_bytes=8 * 1024 * 1024):
+    """
+    Split an MJPEG byte stream into encoded JPEG frames
+
+    Frames are found by their SOI (FFD8) and EOI (FFD9) markers, so multipart
+    boundaries and part headers between frames are skipped whatever the
+    framing (multipart/x-mixed-replace or bare concatenated JPEGs).
+
+    Args:
+        stream: Binary file-like object with read()
+        read_size (int): Bytes per read
+        max_frame_bytes (int): Longest accepted frame; larger data raises ValueError
+    """
+    buffer = bytearray()
+    while True:
+        chunk = stream.read(read_size)
+        if chunk:
+            buffer += chunk
+        while True:
+            start = buffer.find(b'\xff\xd8')
+            if start < 0:
+                del buffer[:max(0, len(buffer) - 1)]  # Keep a trailing 0xFF that may start a marker
+                break
+            end = buffer.find(b'\xff\xd9', start + 2)
+            if end < 0:
+                if start:
+                    del buffer[:start]
+                if len(buffer) > max_frame_bytes:
+                    raise ValueError(f'MJPEG frame larger than {max_frame_bytes} bytes')
+                break
+            yield bytes(buffer[start:end + 2])
+            del buffer[:end + 2]
+        if not chunk:
+            return
+
+class EncodedFrame:
+    """One MJPEG frame; decoded lazily, with a cheap 1/8-scale grayscale decode for the motion gate"""
+    
+    def __init__(self, data, index, timestamp):
+        self.data = data
+        self.index = index
+        self.timestamp = timestamp
+        self._image = None
+    
+    def image(self):
+        if self._image is None:
+            self._image = cv2.imdecode(np.frombuffer(self.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return self._image
+    
+    def thumbnail(self):
+        small = cv2.imdecode(np.frombuffer(self.data, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        return None if small is None else _motion_thumbnail(small)
+
+class CapturedFrame:
+    """
+    One cv2.VideoCapture frame; grabbed always, retrieved (converted to BGR) only when needed
+
+    grab() already decodes the picture (inter-frame codecs cannot skip it), so the
+    motion gate samples every 8th pixel of the retrieved frame instead of
+    reducing the whole frame.
+    """
+    
+    def __init__(self, capture, index, timestamp):
+        self.capture = capture
+        self.index = index
+        self.timestamp = timestamp
+        self._image = None
+    
+    def image(self):
+        if self._image is None:
+            ok, image = self.capture.retrieve()
+            self._image = image if ok else None
+        return self._image
+    
+    def thumbnail(self):
+        image = self.image()
+        return None if image is None else _motion_thumbnail(image[::8, ::8])
+
+def _motion_thumbnail(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, MOTION_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.GaussianBlur(small, (5, 5), 0)
+
+def _open_capture(path, raw=False):
+    """
+    cv2.VideoCapture for a path or URL; with raw=True, an MJPEG-coded source is
+    switched to raw packets (plain JPEGs). Returns (capture, raw mode on)
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f'Could not open video source: {path}')
+    fourcc = int(capture.get(cv2.CAP_PROP_FOURCC)).to_bytes(4, 'little').upper()
+    raw = raw and fourcc in MJPEG_FOURCCS and capture.set(cv2.CAP_PROP_FORMAT, -1)
+    return capture, bool(raw)
+
+def iter_video_frames(path):
+    """
+    Frames of a video file or URL read with cv2.VideoCapture
+
+    MJPEG-coded sources are read as raw JPEG packets and yield EncodedFrame, so
+    the motion gate uses the reduced 1/8-scale decode and only inferred frames
+    are decoded in full. Other codecs yield CapturedFrame.
+    """
+    capture, raw = _open_capture(path, raw=True)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0
+        index = 0
+        while capture.grab():
+            position = capture.get(cv2.CAP_PROP_POS_MSEC)
+            timestamp = position / 1000 if position > 0 else (index / fps if fps > 0 else float(index))
+            if not raw:
+                yield CapturedFrame(capture, index, timestamp)
+            else:
+                ok, packet = capture.retrieve()
+                data = packet.tobytes() if ok and packet is not None else b''
+                if index == 0 and not data.startswith(b'\xff\xd8'):
+                    # The backend ignored raw mode; start over with decoded frames
+                    capture.release()
+                    capture, raw = _open_capture(path)
+                    continue
+                yield EncodedFrame(data, index, timestamp)
+            index += 1
+    finally:
+        capture.release()
+
+def iter_stream_frames(stream, fps=None, read_size=64 * 1024, max_frame_bytes=8 * 1024 * 1024):
+    """
+    EncodedFrame per JPEG in an MJPEG byte stream
+
+    Timestamps are index / fps when the frame rate is known, else seconds
+    since the first frame arrived (live streams).
+    """
+    started = None
+    for index, data in enumerate(iter_jpeg_frames(stream, read_size, max_frame_bytes)):
+        if fps:
+            timestamp = index / fps
+        else:
+            now = time.monotonic()
+            started = now if started is None else started
+            timestamp = now - started
+        yield EncodedFrame(data, index, timestamp)
+
+def motion_fraction(thumbnail, reference):
+    """
+    Share of thumbnail pixels that changed by more than MOTION_PIXEL_DELTA gray levels
+
+    The thumbnail is first scaled to the reference's mean brightness, so a global
+    brightness change (auto exposure, light flicker) does not count as motion.
+    """
+    if thumbnail is None or reference is None:
+        return 1.0
+    gain = float(reference.mean()) / max(float(thumbnail.mean()), 1.0)
+    change = cv2.absdiff(thumbnail.astype(np.float32) * gain, reference.astype(np.float32))
+    return float(np.count_nonzero(change > MOTION_PIXEL_DELTA)) / change.size
+
+class TemporalSmoother:
+    """
+    Smooths one scalar series (crowd count or density) over time
+    
+    'ewma': exponentially weighted moving average with weight alpha for each
+    new sample. 'kalman': 1-D Kalman filter with a random-walk state whose
+    process variance grows with the time since the last sample, so sparse
+    samples after a quiet period are trusted more. Both variances are relative
+    to the measurement variance (1.0), so the same settings suit counts and
+    densities.
+    """
+    
+    def __init__(self, method='ewma', alpha=0.3, process_variance=0.05):
+        if method not in ('ewma', 'kalman'):
+            raise ValueError(f"Unknown smoothing '{method}' (expected 'ewma' or 'kalman')")
+        self.method = method
+        self.alpha = alpha
+        self.process_variance = process_variance  # Per second
+        self.value = None
+        self._variance = None
+    
+    def update(self, measurement, dt=1.0):
+        if self.value is None:
+            self.value, self._variance = float(measurement), 1.0
+        elif self.method == 'ewma':
+            self.value += self.alpha * (measurement - self.value)
+        else:
+            variance = self._variance + self.process_variance * max(dt, 0.0)
+            gain = variance / (variance + 1.0)
+            self.value += gain * (measurement - self.value)
+            self._variance = (1 - gain) * variance
+        return self.value
@@ -0,0 +1,143 @@
+import logging
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from models.crowd_detection import nms
+
+logger = logging.getLogger(__name__)
+
+# Detections for one image, as NumPy arrays in original image coordinates
+Detections = namedtuple('Detections', ['xyxy', 'conf', 'cls'])
+
+def quantized_model_path(model_path):
+    """Path of the int8 variant stored next to an ONNX model"""
+    root, ext = os.path.splitext(model_path)
+    return f"{root}.int8{ext or '.onnx'}"
+
+def quantize_model(model_path, output_path=None):
+    """
+    Write a dynamically quantized (int8 weights) copy of an ONNX model
+
+    Args:
+        model_path (str): fp32 ONNX model
+        output_path (str): Destination (default: <model>.int8.onnx)
+
+    Returns:
+        str: Path of the quantized model
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output_path = output_path or quantized_model_path(model_path)
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QUInt8)
+    logger.info(f"Quantized {model_path} -> {output_path}")
+    return output_path
+
+class OnnxYoloDetector:
+    """
+    YOLOv8 detector exported to ONNX, run with ONNX Runtime on the CPU
+    Mirrors the ultralytics predictor: letterbox to the model input size,
+    confidence filter, NMS and boxes scaled back to the original image.
+    Called with one image or a list of images, returns one Detections per image.
+    """
+    
+    def __init__(self, model_path, quantize='none', intra_op_threads=None, inter_op_threads=None,
+                 conf_threshold=0.25, iou_threshold=0.7, max_det=300):
+        import onnxruntime as ort
+        
+        self.quantize = quantize
+        if quantize == 'int8':
+            int8_path = quantized_model_path(model_path)
+            # Quantized once, then reused from disk
+            if not os.path.exists(int8_path) or os.path.getmtime(int8_path) < os.path.getmtime(model_path):
+                quantize_model(model_path, int8_path)
+            model_path = int8_path
+        elif quantize != 'none':
+            raise ValueError(f"Unknown quantization '{quantize}' (expected 'none' or 'int8')")
+        
+        self.model_path = model_path
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # One graph at a time per request: parallelism inside operators, not across them
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads or max(1, (os.cpu_count() or 2) // 2)
+        options.inter_op_num_threads = inter_op_threads or 1
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.threads = {'intra_op': options.intra_op_num_threads, 'inter_op': options.inter_op_num_threads}
+        
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, width = model_input.shape
+        # Exports without dynamic=True have a fixed batch of 1 and a fixed input size
+        self.max_batch = batch if isinstance(batch, int) else None
+        self.input_size = (height if isinstance(height, int) else 640, width if isinstance(width, int) else 640)
+        logger.info(f"ONNX YOLO model loaded from {model_path} (input {self.input_size}, threads {self.threads})")
+    
+    def __call__(self, images):
+        if isinstance(images, np.ndarray):
+            images = [images]
+        detections = []
+        step = self.max_batch or len(images)
+        for start in range(0, len(images), max(step, 1)):
+            chunk = images[start:start + step]
+            letterboxed = [self._letterbox(image) for image in chunk]
+            batch = np.stack([blob for blob, _, _ in letterboxed])
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+            for output, (_, gain, pad), image in zip(outputs, letterboxed, chunk):
+                detections.append(self._postprocess(output, gain, pad, image.shape))
+        return detections
+    
+    def _letterbox(self, image):
+        """Resize keeping the aspect ratio and pad to the input size; returns (NCHW blob, gain, (pad x, pad y))"""
+        height, width = image.shape[:2]
+        target_h, target_w = self.input_size
+        gain = min(target_h / height, target_w / width)
+        new_w, new_h = int(round(width * gain)), int(round(height * gain))
+        if (new_w, new_h) != (width, height):
+            image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        pad_x, pad_y = (target_w - new_w) / 2, (target_h - new_h) / 2
+        top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+        left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+        image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+        # BGR HWC uint8 -> RGB CHW float32 in [0, 1]
+        blob = image[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+        return np.ascontiguousarray(blob), gain, (left, top)
+    
+    def _postprocess(self, output, gain, pad, shape):
+        """(4 + classes, anchors) raw output -> Detections in original image coordinates"""
+        predictions = output.T  # anchors x (cx, cy, w, h, class scores...)
+        scores = predictions[:, 4:]
+        cls = scores.argmax(axis=1)
+        conf = scores[np.arange(len(scores)), cls]
+        mask = conf >= self.conf_threshold
+        boxes, conf, cls = predictions[mask, :4], conf[mask], cls[mask]
+        
+        xyxy = np.empty_like(boxes)
+        xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:] / 2
+        xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:] / 2
+        
+        # Class-aware NMS: offset each class so boxes of different classes never overlap
+        offsets = cls[:, None].astype(np.float32) * 7680
+        keep = nms(xyxy + offsets, conf, self.iou_threshold)[:self.max_det]
+        xyxy, conf, cls = xyxy[keep], conf[keep], cls[keep]
+        
+        xyxy -= np.array([pad[0], pad[1], pad[0], pad[1]], dtype=np.float32)
+        xyxy /= gain
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, shape[1])
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, shape[0])
+        return Detections(xyxy.astype(np.float32), conf.astype(np.float32), cls.astype(np.int64))
+    
+    def info(self):
+        return {
+            'model_path': self.model_path,
+            'quantize': self.quantize,
+            'input_size': list(self.input_size),
+            'max_batch': self.max_batch,
+            'threads': self.threads
+        }
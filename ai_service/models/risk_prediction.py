@@ -1,14 +1,18 @@
 import numpy as np
-import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 import logging
 import random
 import os
 from datetime import datetime, timedelta
 import math
+from utils.artifact_cache import ArtifactCache
+from utils.timing import phase
 
 logger = logging.getLogger(__name__)
 
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
 class RiskPredictionModel:
     """
     Risk Prediction Model using LSTM-like approach
@@ -18,6 +22,10 @@ class RiskPredictionModel:
     def __init__(self):
         self.scaler = MinMaxScaler()
         self.sequence_length = int(os.getenv('LSTM_SEQUENCE_LENGTH', 10))
+        self.seed = int(os.getenv('MODEL_SEED', 42))
+        self.training_sequences = 1000
+        self.training_epochs = 50
+        self.artifact_cache = ArtifactCache()
         self.is_fitted = False
         self.risk_thresholds = {
             'low': 0.3,
@@ -51,8 +59,11 @@ class RiskPredictionModel:
             
             self.model.compile(optimizer='adam', loss='mse', metrics=['mae'])
             
-            # Train with synthetic data
-            self._generate_and_train_model()
+            # Reuse trained weights from a previous run, otherwise train with synthetic data
+            config = self._artifact_config(tf)
+            if not self._load_cached_weights(config):
+                self._generate_and_train_model()
+                self._save_cached_weights(config)
             self.is_fitted = True
             
             logger.info("LSTM risk prediction model initialized successfully")
@@ -82,17 +93,50 @@ class RiskPredictionModel:
             logger.error(f"Failed to initialize statistical model: {e}")
             raise
     
+    def _artifact_config(self, tf):
+        """Config that the trained weights depend on (the artifact cache key)"""
+        return {
+            'model': 'lstm',
+            'architecture': [layer.__class__.__name__ for layer in self.model.layers],
+            'sequence_length': self.sequence_length,
+            'n_features': 6,
+            'n_sequences': self.training_sequences,
+            'epochs': self.training_epochs,
+            'seed': self.seed,
+            'numpy': np.__version__,
+            'tensorflow': tf.__version__
+        }
+    
+    def _load_cached_weights(self, config):
+        """Restore LSTM weights from the artifact cache"""
+        def load_weights(entry_dir):
+            self.model.load_weights(os.path.join(entry_dir, 'lstm.weights.h5'))
+            return True
+        
+        return bool(self.artifact_cache.load('risk_prediction', config, load_weights))
+    
+    def _save_cached_weights(self, config):
+        """Store trained LSTM weights so warm restarts skip training"""
+        self.artifact_cache.save(
+            'risk_prediction',
+            config,
+            lambda entry_dir: self.model.save_weights(os.path.join(entry_dir, 'lstm.weights.h5'))
+        )
+    
     def _generate_and_train_model(self):
         """Generate synthetic training data and train the model"""
         try:
+            import tensorflow as tf
+            tf.random.set_seed(self.seed)
+            
             # Generate synthetic time series data
-            n_sequences = 1000
+            n_sequences = self.training_sequences
             X_train, y_train = self._generate_training_sequences(n_sequences)
             
             # Train the model
             self.model.fit(
                 X_train, y_train,
-                epochs=50,
+                epochs=self.training_epochs,
                 batch_size=32,
                 validation_split=0.2,
                 verbose=0
@@ -108,11 +152,13 @@ class RiskPredictionModel:
         """Generate synthetic training sequences"""
         try:
             X, y = [], []
+            # Local generator: models load concurrently, so the global NumPy state is shared
+            rng = np.random.RandomState(self.seed)
             
             for _ in range(n_sequences):
                 # Generate base time series with trends
-                base_trend = np.random.choice(['increasing', 'decreasing', 'stable'])
-                noise_level = np.random.uniform(0.1, 0.3)
+                base_trend = rng.choice(['increasing', 'decreasing', 'stable'])
+                noise_level = rng.uniform(0.1, 0.3)
                 
                 sequence = []
                 risk_progression = []
@@ -122,27 +168,27 @@ class RiskPredictionModel:
                     
                     # Crowd density with trend
                     if base_trend == 'increasing':
-                        crowd_density = min(1.0, 0.3 + t * 0.05 + np.random.normal(0, noise_level))
+                        crowd_density = min(1.0, 0.3 + t * 0.05 + rng.normal(0, noise_level))
                     elif base_trend == 'decreasing':
-                        crowd_density = max(0.0, 0.8 - t * 0.05 + np.random.normal(0, noise_level))
+                        crowd_density = max(0.0, 0.8 - t * 0.05 + rng.normal(0, noise_level))
                     else:
-                        crowd_density = 0.5 + np.random.normal(0, noise_level)
+                        crowd_density = 0.5 + rng.normal(0, noise_level)
                     
                     # Incident count (related to crowd density)
-                    incident_count = np.random.poisson(crowd_density * 5) / 10.0
+                    incident_count = rng.poisson(crowd_density * 5) / 10.0
                     
                     # Weather score (affects risk)
-                    weather_score = np.random.beta(3, 2)  # Usually good weather
+                    weather_score = rng.beta(3, 2)  # Usually good weather
                     
                     # Time factor (hour of day effect)
                     hour = (t + 8) % 24  # Start at 8 AM
                     time_factor = self._time_risk_factor(hour)
                     
                     # Day type (weekday vs weekend)
-                    day_type = np.random.choice([0.7, 1.0])  # 0.7 for weekday, 1.0 for weekend
+                    day_type = rng.choice([0.7, 1.0])  # 0.7 for weekday, 1.0 for weekend
                     
                     # External events
-                    external_events = np.random.choice([0.0, 0.5, 1.0], p=[0.8, 0.15, 0.05])
+                    external_events = rng.choice([0.0, 0.5, 1.0], p=[0.8, 0.15, 0.05])
                     
                     features = [
                         crowd_density, incident_count, weather_score,
@@ -211,8 +257,9 @@ class RiskPredictionModel:
                 return self._generate_mock_result(prediction_window)
             
             # Process inputs
-            processed_historical = self._process_historical_data(historical_data)
-            processed_current = self._process_current_conditions(current_conditions)
+            with phase('features'):
+                processed_historical = self._process_historical_data(historical_data)
+                processed_current = self._process_current_conditions(current_conditions)
             
             if hasattr(self, 'model') and hasattr(self.model, 'predict'):
                 return self._predict_with_lstm(processed_historical, processed_current, prediction_window)
@@ -223,6 +270,89 @@ class RiskPredictionModel:
             logger.error(f"Risk prediction error: {e}")
             return self._generate_mock_result(prediction_window)
     
+    def predict_batch(self, entries, prediction_window=24):
+        """
+        Predict risk levels for many zones in one pass
+        
+        Args:
+            entries (list): Dicts with 'historical_data', 'current_conditions' and
+                an optional per-entry 'prediction_window'
+            prediction_window (int): Default hours to predict ahead
+            
+        Returns:
+            list: Risk prediction results, in input order. A malformed entry gets
+                an error entry instead of failing the whole batch
+        """
+        results = [None] * len(entries)
+        valid = []  # (index, entry, prediction window)
+        for index, entry in enumerate(entries):
+            error = self._entry_error(entry)
+            if error:
+                results[index] = {'error': error}
+            else:
+                valid.append((index, entry, entry.get('prediction_window', prediction_window)))
+        
+        try:
+            if not valid:
+                return results
+            
+            windows = [window for _, _, window in valid]
+            if not self.is_fitted:
+                predictions = [self._generate_mock_result(window) for window in windows]
+            else:
+                # Process inputs into one (N, sequence_length) history matrix
+                with phase('features'):
+                    processed_historical = np.vstack([
+                        self._process_historical_data(entry.get('historical_data', []))
+                        for _, entry, _ in valid
+                    ])
+                    processed_current = [
+                        self._process_current_conditions(entry.get('current_conditions', {}))
+                        for _, entry, _ in valid
+                    ]
+                
+                if hasattr(self, 'model') and hasattr(self.model, 'predict'):
+                    predictions = self._predict_batch_with_lstm(processed_historical, processed_current, windows)
+                else:
+                    predictions = self._predict_batch_statistical(processed_historical, processed_current, windows)
+            
+            for (index, _, _), prediction in zip(valid, predictions):
+                results[index] = prediction
+            return results
+                
+        except Exception as e:
+            logger.error(f"Batch risk prediction error: {e}")
+            for index, _, window in valid:
+                if results[index] is None:
+                    results[index] = self._generate_mock_result(window)
+            return results
+    
+    def _entry_error(self, entry):
+        """Why a batch entry cannot be scored, or None when it is usable"""
+        if not isinstance(entry, dict):
+            return 'Entry must be an object'
+        
+        window = entry.get('prediction_window')
+        if window is not None and (not _is_number(window) or window <= 0):
+            return 'prediction_window must be a positive number'
+        
+        historical_data = entry.get('historical_data')
+        if historical_data is not None:
+            if not isinstance(historical_data, list):
+                return 'historical_data must be a list of numbers'
+            if not all(_is_number(value) for value in historical_data):
+                return 'historical_data must only contain numbers'
+        
+        current_conditions = entry.get('current_conditions')
+        if current_conditions is not None:
+            if not isinstance(current_conditions, dict):
+                return 'current_conditions must be an object'
+            for key in ('crowd_density', 'incident_count', 'weather_score', 'temperature', 'humidity'):
+                if key in current_conditions and not _is_number(current_conditions[key]):
+                    return f'current_conditions.{key} must be a number'
+        
+        return None
+    
     def _process_historical_data(self, historical_data):
         """Process and normalize historical data"""
         try:
@@ -287,135 +417,158 @@ class RiskPredictionModel:
     
     def _predict_with_lstm(self, historical_data, current_conditions, prediction_window):
         """Make predictions using LSTM model"""
+        return self._predict_batch_with_lstm(
+            np.atleast_2d(historical_data), [current_conditions], [prediction_window]
+        )[0]
+    
+    def _build_lstm_sequence(self, historical_data, current_conditions, hour):
+        """Build the (sequence_length, 6) LSTM input for one zone"""
+        current_features = [
+            current_conditions['crowd_density'],
+            current_conditions['incident_count'],
+            current_conditions['weather_score'],
+            current_conditions['time_factor'],
+            current_conditions['day_type'],
+            current_conditions['external_events']
+        ]
+        
+        # Create sequence for prediction
+        input_sequence = []
+        for i in range(self.sequence_length):
+            if i < len(historical_data):
+                # Use historical risk score as base and estimate other features
+                risk = historical_data[i]
+                estimated_features = [
+                    risk * 0.8,  # Estimated crowd density from risk
+                    risk * 0.5,  # Estimated incidents
+                    0.7,  # Default weather
+                    self._time_risk_factor((hour - self.sequence_length + i) % 24),
+                    current_conditions['day_type'],
+                    0.0  # No external events in history
+                ]
+                input_sequence.append(estimated_features)
+            else:
+                input_sequence.append(current_features)
+        
+        return input_sequence
+    
+    def _predict_batch_with_lstm(self, historical_data, current_conditions, prediction_windows):
+        """Make predictions for many zones with a single LSTM call"""
         try:
-            # Prepare input sequence
-            current_features = [
-                current_conditions['crowd_density'],
-                current_conditions['incident_count'],
-                current_conditions['weather_score'],
-                current_conditions['time_factor'],
-                current_conditions['day_type'],
-                current_conditions['external_events']
-            ]
-            
-            # Create sequence for prediction
-            input_sequence = []
-            for i in range(self.sequence_length):
-                if i < len(historical_data):
-                    # Use historical risk score as base and estimate other features
-                    risk = historical_data[i]
-                    estimated_features = [
-                        risk * 0.8,  # Estimated crowd density from risk
-                        risk * 0.5,  # Estimated incidents
-                        0.7,  # Default weather
-                        self._time_risk_factor((datetime.now().hour - self.sequence_length + i) % 24),
-                        current_conditions['day_type'],
-                        0.0  # No external events in history
-                    ]
-                    input_sequence.append(estimated_features)
-                else:
-                    input_sequence.append(current_features)
+            hour = datetime.now().hour
             
-            # Reshape for LSTM input
-            input_array = np.array(input_sequence).reshape(1, self.sequence_length, 6)
+            # Stack every zone into one (N, sequence_length, 6) tensor
+            with phase('features'):
+                input_array = np.array([
+                    self._build_lstm_sequence(history, conditions, hour)
+                    for history, conditions in zip(historical_data, current_conditions)
+                ]).reshape(len(current_conditions), self.sequence_length, 6)
             
             # Make prediction
-            risk_prediction = float(self.model.predict(input_array)[0][0])
-            
-            # Generate predictions for different time horizons
-            predictions = []
-            base_risk = risk_prediction
-            
-            for h in [1, 4, 12, 24]:
-                if h <= prediction_window:
-                    # Add some variation based on time
-                    time_variation = math.sin(h * math.pi / 12) * 0.1  # Daily cycle
-                    predicted_risk = base_risk + time_variation + np.random.normal(0, 0.05)
-                    predicted_risk = max(0, min(1, predicted_risk))
-                    
-                    predictions.append({
-                        'time': f'+{h}h',
-                        'risk_score': round(predicted_risk, 3),
-                        'risk_level': self._get_risk_level(predicted_risk)
-                    })
-            
-            # Determine overall risk level and factors
-            risk_level = self._get_risk_level(risk_prediction)
-            risk_factors = self._identify_risk_factors(current_conditions, risk_prediction)
-            recommendations = self._generate_risk_recommendations(risk_level, risk_factors)
-            
-            return {
-                'risk_level': risk_level,
-                'risk_score': round(risk_prediction, 3),
-                'confidence': 0.85,
-                'risk_factors': risk_factors,
-                'predictions': predictions,
-                'recommendations': recommendations,
-                'model_used': 'LSTM'
-            }
+            with phase('inference'):
+                risk_predictions = self.model.predict(input_array, verbose=0)[:, 0].astype(float)
+                
+                # Generate predictions for different time horizons (daily cycle plus noise)
+                horizons = np.array([1, 4, 12, 24])
+                time_variation = np.sin(horizons * math.pi / 12) * 0.1
+                horizon_risks = (
+                    risk_predictions[:, None] + time_variation[None, :]
+                    + np.random.normal(0, 0.05, size=(len(risk_predictions), len(horizons)))
+                )
+                horizon_risks = np.clip(horizon_risks, 0, 1)
+            
+            with phase('postprocess'):
+                return [
+                    self._build_result(risk, conditions, horizons, row_risks, window, 0.85, 'LSTM')
+                    for risk, conditions, row_risks, window
+                    in zip(risk_predictions, current_conditions, horizon_risks, prediction_windows)
+                ]
             
         except Exception as e:
             logger.error(f"LSTM prediction error: {e}")
-            return self._predict_statistical(historical_data, current_conditions, prediction_window)
+            return self._predict_batch_statistical(historical_data, current_conditions, prediction_windows)
     
     def _predict_statistical(self, historical_data, current_conditions, prediction_window):
         """Make predictions using statistical methods"""
+        return self._predict_batch_statistical(
+            np.atleast_2d(historical_data), [current_conditions], [prediction_window]
+        )[0]
+    
+    def _predict_batch_statistical(self, historical_data, current_conditions, prediction_windows):
+        """Make predictions for many zones using vectorized statistical methods"""
         try:
-            # Calculate trend from historical data
-            if len(historical_data) >= 3:
-                trend = np.polyfit(range(len(historical_data)), historical_data, 1)[0]
-            else:
-                trend = 0
-            
-            # Calculate base risk from current conditions
-            base_risk = (
-                current_conditions['crowd_density'] * 0.4 +
-                current_conditions['incident_count'] * 0.3 +
-                (1 - current_conditions['weather_score']) * 0.1 +
-                current_conditions['time_factor'] * 0.1 +
-                (current_conditions['day_type'] - 0.7) * 0.05 +
-                current_conditions['external_events'] * 0.05
-            )
+            with phase('inference'):
+                historical_data = np.asarray(historical_data, dtype=float)
             
-            # Apply trend
-            predicted_risk = base_risk + trend * 0.2
-            predicted_risk = max(0, min(1, predicted_risk))
-            
-            # Generate time-based predictions
-            predictions = []
-            for h in [1, 4, 12, 24]:
-                if h <= prediction_window:
-                    # Time decay and variation
-                    time_factor = math.exp(-h * 0.05)  # Decay over time
-                    hourly_variation = math.sin((datetime.now().hour + h) * math.pi / 12) * 0.1
-                    
-                    future_risk = predicted_risk * time_factor + hourly_variation
-                    future_risk = max(0, min(1, future_risk))
-                    
-                    predictions.append({
-                        'time': f'+{h}h',
-                        'risk_score': round(future_risk, 3),
-                        'risk_level': self._get_risk_level(future_risk)
-                    })
-            
-            # Analysis
-            risk_level = self._get_risk_level(predicted_risk)
-            risk_factors = self._identify_risk_factors(current_conditions, predicted_risk)
-            recommendations = self._generate_risk_recommendations(risk_level, risk_factors)
-            
-            return {
-                'risk_level': risk_level,
-                'risk_score': round(predicted_risk, 3),
-                'confidence': 0.75,
-                'risk_factors': risk_factors,
-                'predictions': predictions,
-                'recommendations': recommendations,
-                'model_used': 'Statistical'
-            }
+                # Calculate trend from historical data (least-squares slope of every row at once)
+                n_points = historical_data.shape[1]
+                if n_points >= 3:
+                    trends = np.polyfit(np.arange(n_points), historical_data.T, 1)[0]
+                else:
+                    trends = np.zeros(len(historical_data))
+            
+                # Calculate base risk from current conditions
+                conditions = {
+                    key: np.array([c[key] for c in current_conditions], dtype=float)
+                    for key in ('crowd_density', 'incident_count', 'weather_score',
+                                'time_factor', 'day_type', 'external_events')
+                }
+                base_risk = (
+                    conditions['crowd_density'] * 0.4 +
+                    conditions['incident_count'] * 0.3 +
+                    (1 - conditions['weather_score']) * 0.1 +
+                    conditions['time_factor'] * 0.1 +
+                    (conditions['day_type'] - 0.7) * 0.05 +
+                    conditions['external_events'] * 0.05
+                )
+            
+                # Apply trend
+                predicted_risks = np.clip(base_risk + trends * 0.2, 0, 1)
+            
+                # Generate time-based predictions (time decay and hourly variation)
+                horizons = np.array([1, 4, 12, 24])
+                time_decay = np.exp(-horizons * 0.05)
+                hourly_variation = np.sin((datetime.now().hour + horizons) * math.pi / 12) * 0.1
+                horizon_risks = np.clip(predicted_risks[:, None] * time_decay[None, :] + hourly_variation[None, :], 0, 1)
+            
+            with phase('postprocess'):
+                return [
+                    self._build_result(risk, conditions, horizons, row_risks, window, 0.75, 'Statistical')
+                    for risk, conditions, row_risks, window
+                    in zip(predicted_risks, current_conditions, horizon_risks, prediction_windows)
+                ]
             
         except Exception as e:
             logger.error(f"Statistical prediction error: {e}")
-            return self._generate_mock_result(prediction_window)
+            return [self._generate_mock_result(window) for window in prediction_windows]
+    
+    def _build_result(self, risk_score, current_conditions, horizons, horizon_risks, prediction_window, confidence, model_used):
+        """Assemble the prediction contract for one zone"""
+        risk_score = float(risk_score)
+        
+        predictions = []
+        for h, predicted_risk in zip(horizons, horizon_risks):
+            if h <= prediction_window:
+                predictions.append({
+                    'time': f'+{int(h)}h',
+                    'risk_score': round(float(predicted_risk), 3),
+                    'risk_level': self._get_risk_level(predicted_risk)
+                })
+        
+        # Analysis
+        risk_level = self._get_risk_level(risk_score)
+        risk_factors = self._identify_risk_factors(current_conditions, risk_score)
+        recommendations = self._generate_risk_recommendations(risk_level, risk_factors)
+        
+        return {
+            'risk_level': risk_level,
+            'risk_score': round(risk_score, 3),
+            'confidence': confidence,
+            'risk_factors': risk_factors,
+            'predictions': predictions,
+            'recommendations': recommendations,
+            'model_used': model_used
+        }
     
     def _get_risk_level(self, risk_score):
         """Convert risk score to risk level"""
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+# Tests import the service modules the way app.py does (models.*, utils.*)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def service():
+    """The Flask app module with every enabled model loaded"""
+    import app as appmod
+
+    appmod.initialize_models(wait=True)
+    return appmod
+
+
+@pytest.fixture
+def client(service):
+    return service.app.test_client()
+
+
+@pytest.fixture
+def make_jpeg():
+    """Encode a random BGR frame as JPEG bytes"""
+    def make(width=320, height=240, seed=0):
+        rng = np.random.RandomState(seed)
+        image = rng.randint(0, 255, size=(height, width, 3), dtype=np.uint8)
+        ok, buffer = cv2.imencode('.jpg', image)
+        return buffer.tobytes()
+    return make
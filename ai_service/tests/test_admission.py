@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from utils.admission import (
+    PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_NORMAL, AdmissionLimiter, AdmissionRejected
+)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not reached'
+        time.sleep(0.005)
+
+
+def test_admits_up_to_the_concurrency_limit():
+    limiter = AdmissionLimiter('test', max_concurrent=2, max_queue=0)
+    limiter.acquire()
+    limiter.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire()
+    assert rejected.value.reason == 'queue_full'
+    limiter.release(0.1)
+    limiter.acquire()
+    assert limiter.stats()['admitted'] == 3
+
+
+def test_critical_requests_bypass_the_limit():
+    limiter = AdmissionLimiter('test', max_concurrent=1, max_queue=0)
+    limiter.acquire()
+    limiter.acquire(PRIORITY_CRITICAL)
+    assert limiter.stats()['active'] == 2
+
+
+def test_queue_timeout():
+    limiter = AdmissionLimiter('test', max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    limiter.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire()
+    assert rejected.value.reason == 'timeout'
+    assert limiter.stats()['queued'] == 0
+
+
+def test_higher_priority_waiter_is_served_first():
+    limiter = AdmissionLimiter('test', max_concurrent=1, max_queue=4, queue_timeout=5)
+    limiter.acquire()
+    order = []
+
+    def waiter(name, priority):
+        limiter.acquire(priority)
+        order.append(name)
+        limiter.release(0.01)
+
+    normal = threading.Thread(target=waiter, args=('normal', PRIORITY_NORMAL))
+    normal.start()
+    wait_for(lambda: limiter.stats()['queued'] == 1)
+    high = threading.Thread(target=waiter, args=('high', PRIORITY_HIGH))
+    high.start()
+    wait_for(lambda: limiter.stats()['queued'] == 2)
+
+    limiter.release(0.01)
+    normal.join(5)
+    high.join(5)
+    assert order == ['high', 'normal']
+
+
+def test_retry_after_follows_service_time_and_backlog():
+    limiter = AdmissionLimiter('test', max_concurrent=2, max_queue=0, max_retry_after=60)
+    assert limiter.retry_after() == 1  # Floor of one second, even with nothing running
+
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release(4.0)
+    limiter.acquire()
+    limiter.acquire()
+    # Two running requests of ~4 s, served two at a time
+    assert limiter.retry_after() == 4
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire()
+    assert rejected.value.retry_after == 4
+
+    limiter.release(1000.0)
+    limiter.acquire()
+    assert limiter.retry_after() == 60  # Capped
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip('fastapi')
+
+import asgi
+
+
+async def call_asgi(method, path, query='', body_chunks=(), headers=(), disconnect_when=None):
+    """
+    Drive the ASGI app like a server would; returns (status, headers, body)
+
+    The request body is sent in chunks, and receive() then blocks until the
+    response is complete, or until disconnect_when(body so far) is true for
+    endless responses.
+    """
+    messages = [{'type': 'http.request', 'body': chunk, 'more_body': True} for chunk in body_chunks]
+    messages.append({'type': 'http.request', 'body': b'', 'more_body': False})
+    finished = asyncio.Event()
+    response = {'body': b''}
+
+    async def receive():
+        if messages:
+            await asyncio.sleep(0.01)  # Let the app read the body incrementally
+            return messages.pop(0)
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {name.decode(): value.decode() for name, value in message['headers']}
+        elif message['type'] == 'http.response.body':
+            response['body'] += message.get('body', b'')
+            if not message.get('more_body') or (disconnect_when and disconnect_when(response['body'])):
+                finished.set()
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'root_path': '', 'query_string': query.encode(),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+        'client': ('127.0.0.1', 5000), 'server': ('testserver', 80)
+    }
+    async with asgi.lifespan(asgi.app):
+        await asyncio.wait_for(asgi.app(scope, receive, send), timeout=30)
+    return response['status'], response['headers'], response['body']
+
+
+@pytest.fixture
+def run(service):
+    return lambda coroutine: asyncio.run(coroutine)
+
+
+def test_anomaly_stream_through_asgi(run):
+    chunks = [''.join(f'{value}\n' for value in range(start, start + 5)).encode() for start in range(0, 25, 5)]
+    status, headers, body = run(call_asgi(
+        'POST', '/predict/anomaly-detection/stream', 'window=10', chunks,
+        [('Content-Type', 'application/x-ndjson')]
+    ))
+    assert status == 200
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert [line['window'] for line in lines[:-1]] == [0, 1, 2]
+    assert lines[-1]['summary']['data_points'] == 25
+
+
+def test_sized_response_through_asgi(run):
+    status, _, body = run(call_asgi(
+        'POST', '/predict/anomaly-detection', body_chunks=[json.dumps({'data': [1, 2, 3]}).encode()],
+        headers=[('Content-Type', 'application/json')]
+    ))
+    assert status == 200
+    assert 'anomaly_detected' in json.loads(body)
+
+
+def test_risk_feed_sse_through_asgi(run, service, monkeypatch):
+    monkeypatch.setattr(service, 'RISK_FEED_KEEPALIVE', 0.1)
+    feed = service.risk_feed
+    feed.update([{'zone_id': 'asgi_zone', 'historical_data': [0.3, 0.4], 'current_conditions': {'crowd_density': 0.9}}])
+
+    status, headers, body = run(call_asgi(
+        'GET', '/stream/risk-prediction', 'zones=asgi_zone',
+        disconnect_when=lambda body: b'event: risk' in body
+    ))
+    assert status == 200
+    assert headers['content-type'].startswith('text/event-stream')
+    events = body.decode()
+    assert 'event: subscribed' in events
+    assert '"reason": "snapshot"' in events and '"zone_id": "asgi_zone"' in events
+    # After the disconnect the stream thread closes the generator (at its next keepalive),
+    # which unsubscribes inside the request context
+    deadline = time.monotonic() + 5
+    while feed.stats()['subscribers'] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert feed.stats()['subscribers'] == 0
+
+
+def test_mjpeg_video_stream_through_asgi(run, make_jpeg):
+    frames = [make_jpeg(seed=0)] * 4
+    chunks = [b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame + b'\r\n' for frame in frames]
+    status, headers, body = run(call_asgi(
+        'POST', '/predict/crowd-detection/video', 'fps=10&every_n=2', chunks,
+        [('Content-Type', 'multipart/x-mixed-replace; boundary=frame')]
+    ))
+    assert status == 200
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert [line['trigger'] for line in lines[:-1]] == ['first', 'interval']
+    assert [line['frame'] for line in lines[:-1]] == [0, 2]
+    assert lines[-1]['summary']['frames'] == 4
+
+
+def test_repeated_request_headers_reach_flask():
+    headers = [(b'cookie', b'a=1'), (b'cookie', b'b=2'),
+               (b'x-forwarded-for', b'10.0.0.1'), (b'x-forwarded-for', b'10.0.0.2')]
+    scope = {'method': 'GET', 'path': '/health', 'query_string': b'', 'headers': headers}
+    environ = asgi._build_environ(scope, headers, b'')
+    assert environ['HTTP_COOKIE'] == 'a=1; b=2'
+    assert environ['HTTP_X_FORWARDED_FOR'] == '10.0.0.1,10.0.0.2'
+
+
+def test_repeated_response_headers_are_kept():
+    raw = asgi._raw_headers([('Set-Cookie', 'a=1'), ('Set-Cookie', 'b=2'), ('Content-Length', '3')])
+    assert raw == [(b'set-cookie', b'a=1'), (b'set-cookie', b'b=2')]
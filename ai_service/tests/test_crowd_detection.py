@@ -0,0 +1,214 @@
+import cv2
+import numpy as np
+import pytest
+
+from models.crowd_detection import (CascadePool, CrowdDetectionModel, choose_tile_size,
+                                    default_cascade_pool_size, dhash, haar_profile_params, nms,
+                                    tile_grid)
+from models.onnx_yolo import Detections
+from utils.result_cache import ResultCache
+
+
+@pytest.fixture(scope='module')
+def crowd():
+    model = CrowdDetectionModel()
+    model.result_cache = None
+    return model
+
+
+def frame(width=320, height=240, seed=0):
+    return np.random.RandomState(seed).randint(0, 255, size=(height, width, 3), dtype=np.uint8)
+
+
+def dense_crowd(width=1920, height=1080, people=800, head=24):
+    """Dark head-sized blobs on a grid over a light background"""
+    image = np.full((height, width), 170, dtype=np.uint8)
+    cols = int(np.ceil(np.sqrt(people * width / height)))
+    rows = int(np.ceil(people / cols))
+    for index in range(people):
+        row, col = divmod(index, cols)
+        center = (int((col + 0.5) * width / cols), int((row + 0.5) * height / rows))
+        cv2.ellipse(image, center, (head // 2, int(head * 0.6)), 0, 0, 360, 50, -1)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+
+def detector_result(count, width=1920, height=1080):
+    return {'crowd_count': count, 'detected_objects': [], 'model_used': 'OpenCV_Fallback',
+            'image_dimensions': {'width': width, 'height': height}}
+
+
+def test_cascade_pool_covers_every_crowd_admission_slot(monkeypatch):
+    monkeypatch.setenv('ADMISSION_CROWD_DETECTION_CONCURRENCY', '3')
+    monkeypatch.setenv('ADMISSION_CROWD_VIDEO_CONCURRENCY', '2')
+    assert default_cascade_pool_size() == 5
+
+
+def test_cascade_pool_lends_each_classifier_once():
+    pool = CascadePool(size=1, wait_timeout=0.05)
+    with pool.acquire() as cascade:
+        assert not cascade.empty()
+        with pytest.raises(Exception):
+            with pool.acquire():
+                pass
+    with pool.acquire() as again:
+        assert again is cascade
+    assert pool.stats() == {'size': 1, 'loaded': 1, 'idle': 1}
+
+
+def test_exhausted_pool_returns_a_labelled_degraded_result(crowd, monkeypatch):
+    pool = CascadePool(size=1, wait_timeout=0.05)
+    monkeypatch.setattr(crowd, 'cascade_pool', pool)
+    with pool.acquire():
+        result = crowd._predict_fallback(frame(), 320, 240)
+    assert result['model_used'] == 'OpenCV_Heuristic'
+    assert result['degraded'] == 'cascade_pool_timeout'
+    assert result['detected_objects'] == []
+
+    result = crowd._predict_fallback(frame(), 320, 240)
+    assert result['model_used'] == 'OpenCV_Fallback'
+    assert 'degraded' not in result
+
+
+def test_missing_cascade_is_labelled_degraded(crowd, monkeypatch):
+    monkeypatch.setattr(crowd, 'cascade_pool', CascadePool(path='/nonexistent/cascade.xml'))
+    result = crowd._predict_fallback(frame(), 320, 240)
+    assert result['degraded'] == 'cascade_unavailable'
+
+
+def test_full_resolution_by_default(crowd, monkeypatch):
+    assert crowd.resolution_tier == 'accurate'
+    image = np.zeros((2160, 3840, 3), dtype=np.uint8)
+    resized, scale = crowd._resize_for_inference(image)
+    assert resized is image and scale == 1.0
+
+
+def test_opt_in_tier_downscales(crowd, monkeypatch):
+    monkeypatch.setattr(crowd, 'resolution_tier', 'balanced')
+    resized, scale = crowd._resize_for_inference(np.zeros((2160, 3840, 3), dtype=np.uint8))
+    assert resized.shape[:2] == (720, 1280)
+    assert scale == pytest.approx(3.0)
+
+
+def test_tile_grid_covers_the_frame_edge_to_edge():
+    corners = tile_grid(1920, 1080, 640, overlap=0.2)
+    xs, ys = sorted({x for x, _ in corners}), sorted({y for _, y in corners})
+    assert xs[0] == 0 and xs[-1] + 640 == 1920
+    assert ys[0] == 0 and ys[-1] + 640 == 1080
+    assert len(corners) == len(xs) * len(ys)
+    assert tile_grid(320, 240, 640) == [(0, 0)]
+
+
+def test_choose_tile_size_respects_the_tile_budget():
+    assert choose_tile_size(1920, 1080, max_tiles=16) == 640
+    size = choose_tile_size(3840, 2160, max_tiles=16)
+    assert size > 640 and size % 32 == 0
+    assert len(tile_grid(3840, 2160, size)) <= 16
+
+
+def test_nms_drops_overlaps_and_seam_fragments():
+    boxes = [[0, 0, 100, 100], [5, 5, 105, 105], [200, 200, 300, 300], [210, 210, 250, 250]]
+    scores = [0.9, 0.8, 0.7, 0.6]
+    assert nms(boxes, scores, 0.5).tolist() == [0, 2, 3]
+    assert nms(boxes, scores, 0.5, containment_threshold=0.8).tolist() == [0, 2]
+    assert nms([], [], 0.5).size == 0
+
+
+def test_4k_frame_is_tiled_at_full_resolution(crowd, monkeypatch):
+    tile_shapes = []
+
+    def yolo(tiles):
+        tile_shapes.extend(tile.shape[:2] for tile in tiles)
+        return [Detections(np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32),
+                           np.empty(0, dtype=np.int64)) for _ in tiles]
+
+    monkeypatch.setattr(crowd, 'model_loaded', True)
+    monkeypatch.setattr(crowd, 'yolo_model', yolo)
+    monkeypatch.setattr(crowd, 'tiled_inference', True)
+    monkeypatch.setattr(crowd, 'density_mode', 'off')
+    monkeypatch.setattr(crowd, 'resolution_tier', 'balanced')
+    result = crowd._predict_image(np.zeros((2160, 3840, 3), dtype=np.uint8))
+    assert result['tiles']['count'] > 1
+    assert len(tile_shapes) == result['tiles']['count']
+    size = result['tiles']['size']
+    assert all(shape == (size, size) for shape in tile_shapes)
+    assert size == choose_tile_size(3840, 2160, crowd.tile_overlap, crowd.tile_max_tiles)
+
+
+def test_auto_density_switches_only_when_the_detector_saturates(crowd, monkeypatch):
+    monkeypatch.setattr(crowd, 'density_mode', 'auto')
+    sparse = detector_result(1)
+    assert crowd._count_saturated(dense_crowd(), sparse) is sparse
+
+    result = crowd._count_saturated(dense_crowd(), detector_result(crowd.density_saturation))
+    assert result['model_used'] == 'DensityMap'
+    assert result['detector_count'] == crowd.density_saturation
+
+
+def test_estimate_mode_switches_on_the_density_map_count(crowd, monkeypatch):
+    monkeypatch.setattr(crowd, 'density_mode', 'estimate')
+    # The Haar fallback finds one person in a dense crowd; the density map still takes over
+    result = crowd._count_saturated(dense_crowd(), detector_result(1))
+    assert result['model_used'] == 'DensityMap'
+    assert result['crowd_count'] >= crowd.density_saturation
+    assert result['detector'] == 'OpenCV_Fallback' and result['detector_count'] == 1
+
+    sparse = detector_result(3)
+    assert crowd._count_saturated(dense_crowd(people=20), sparse) is sparse
+
+    monkeypatch.setattr(crowd, 'density_mode', 'off')
+    assert crowd._count_saturated(dense_crowd(), detector_result(500))['model_used'] == 'OpenCV_Fallback'
+
+
+def test_crowd_density_normalisation(crowd):
+    boxes = np.array([[0, 0, 10, 20]] * 50, dtype=np.float32)
+    yolo = crowd._yolo_result(boxes, np.full(50, 0.9, dtype=np.float32), 1920, 1080)
+    assert yolo['crowd_density'] == round(crowd._crowd_density(50, 1920, 1080), 3)
+
+    image = dense_crowd(people=200)
+    density = crowd._predict_density(image, 1920, 1080)
+    assert density['crowd_density'] == round(crowd._crowd_density(density['crowd_count'], 1920, 1080), 3)
+
+    # The Haar fallback keeps its conservative 0.1 weighting
+    haar = crowd._predict_fallback(image, 1920, 1080)
+    assert haar['crowd_density'] == round(min(haar['crowd_count'] / (1920 * 1080 / 10000) * 0.1, 1.0), 3)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def test_dhash_is_stable_under_noise_and_changes_with_the_scene():
+    image = cv2.GaussianBlur(frame(640, 480), (0, 0), 8)
+    noisy = np.clip(image + np.random.RandomState(1).randint(-3, 4, image.shape), 0, 255).astype(np.uint8)
+    assert dhash(image) == dhash(image.copy())
+    assert dhash(image) < 2 ** 64
+    assert hamming(dhash(image), dhash(noisy)) <= 3
+    assert hamming(dhash(image), dhash(image[:, ::-1])) > 3
+
+
+def test_cache_serves_exact_repeats_and_only_opt_in_perceptual_hits(crowd, monkeypatch):
+    assert crowd.cache_perceptual is False
+    image = cv2.GaussianBlur(frame(320, 240), (0, 0), 4)
+    noisy = np.clip(image + np.random.RandomState(1).randint(-2, 3, image.shape), 0, 255).astype(np.uint8)
+    encoded, encoded_noisy = cv2.imencode('.png', image)[1].tobytes(), cv2.imencode('.png', noisy)[1].tobytes()
+    monkeypatch.setattr(crowd, 'result_cache', ResultCache())
+
+    assert crowd.predict(encoded)['cached'] is False
+    repeat = crowd.predict(encoded)
+    assert repeat['cached'] is True and repeat['cache_match'] == 'exact'
+    assert crowd.predict(encoded_noisy)['cached'] is False
+
+    monkeypatch.setattr(crowd, 'cache_perceptual', True)
+    monkeypatch.setattr(crowd, 'result_cache', ResultCache())
+    crowd.predict(encoded)
+    assert crowd.predict(encoded_noisy)['cache_match'] == 'perceptual'
+
+
+@pytest.mark.parametrize('setting, profile', [('fast', 'fast'), ('accurate', 'accurate'), ('bogus', 'balanced'), ('', 'balanced')])
+def test_detector_profile_and_params_resolve_together(monkeypatch, setting, profile):
+    monkeypatch.setenv('CROWD_DETECTOR_PROFILE', setting)
+    resolved, params = haar_profile_params()
+    assert resolved == profile
+    assert params['scaleFactor'] == haar_profile_params(profile)[1]['scaleFactor']
+    model = CrowdDetectionModel()
+    assert model.detector_profile == profile and model.haar_params == params
@@ -0,0 +1,102 @@
+import io
+
+import cv2
+import numpy as np
+import pytest
+
+from models.crowd_detection import CrowdDetectionModel
+from models.crowd_video import (CapturedFrame, EncodedFrame, TemporalSmoother, iter_jpeg_frames,
+                                iter_video_frames, motion_fraction)
+
+
+def scene(index=0, width=320, height=240, gain=1.0, moving=False, seed=0):
+    """Static textured scene with sensor noise; optionally a block that moves with index"""
+    rng = np.random.RandomState(seed)
+    image = cv2.GaussianBlur(rng.randint(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 6)
+    if moving:
+        x = 20 + index * 12
+        cv2.rectangle(image, (x, 60), (x + 40, 180), (230, 230, 230), -1)
+    noise = np.random.RandomState(seed + index + 1).normal(0, 3, image.shape)
+    return np.clip(image * gain + noise, 0, 255).astype(np.uint8)
+
+
+def jpeg(image):
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+
+def test_iter_jpeg_frames_splits_multipart_streams_across_reads():
+    frames = [jpeg(scene(index)) for index in range(3)]
+    body = b''.join(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame + b'\r\n' for frame in frames)
+    assert list(iter_jpeg_frames(io.BytesIO(body), read_size=7)) == frames
+    assert list(iter_jpeg_frames(io.BytesIO(b''.join(frames) + b'trailing'), read_size=1000)) == frames
+
+
+def test_iter_jpeg_frames_rejects_oversized_frames():
+    with pytest.raises(ValueError):
+        list(iter_jpeg_frames(io.BytesIO(b'\xff\xd8' + b'\x00' * 5000), read_size=1024, max_frame_bytes=4096))
+
+
+def test_motion_ignores_noise_and_brightness_changes():
+    reference = EncodedFrame(jpeg(scene(0)), 0, 0.0).thumbnail()
+    assert motion_fraction(EncodedFrame(jpeg(scene(1)), 1, 0.04).thumbnail(), reference) < 0.01
+    assert motion_fraction(EncodedFrame(jpeg(scene(2, gain=1.08)), 2, 0.08).thumbnail(), reference) < 0.01
+    assert motion_fraction(EncodedFrame(jpeg(scene(3, moving=True)), 3, 0.12).thumbnail(), reference) >= 0.03
+    assert motion_fraction(reference, None) == 1.0
+
+
+def test_ewma_smoothing():
+    smoother = TemporalSmoother('ewma', alpha=0.5)
+    assert smoother.update(10) == 10
+    assert smoother.update(20) == 15
+    assert smoother.update(20) == 17.5
+
+
+def test_kalman_trusts_samples_more_after_a_long_gap():
+    soon, late = TemporalSmoother('kalman'), TemporalSmoother('kalman')
+    for smoother in (soon, late):
+        for _ in range(5):
+            smoother.update(10, dt=0.1)
+    assert 10 < soon.update(20, dt=0.1) < late.update(20, dt=60)
+
+
+def test_unknown_smoothing_is_rejected():
+    with pytest.raises(ValueError):
+        TemporalSmoother('median')
+
+
+def write_clip(path, fourcc, frames=6):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*fourcc), 25, (320, 240))
+    if not writer.isOpened():
+        pytest.skip(f'No {fourcc} video writer in this OpenCV build')
+    for index in range(frames):
+        writer.write(scene(index))
+    writer.release()
+    return str(path)
+
+
+def test_mjpeg_video_files_are_read_as_raw_jpegs(tmp_path):
+    frames = list(iter_video_frames(write_clip(tmp_path / 'clip.avi', 'MJPG')))
+    assert len(frames) == 6
+    assert all(isinstance(frame, EncodedFrame) for frame in frames)
+    assert frames[0].thumbnail().shape == (48, 64)
+    assert frames[0].image().shape == (240, 320, 3)
+
+
+def test_other_codecs_are_decoded_by_the_capture(tmp_path):
+    frames = iter_video_frames(write_clip(tmp_path / 'clip.mp4', 'mp4v'))
+    first = next(frames)
+    assert isinstance(first, CapturedFrame)
+    assert first.thumbnail().shape == (48, 64)
+    assert first.image().shape == (240, 320, 3)
+    frames.close()
+
+
+def test_motion_gate_stays_quiet_on_a_static_clip(monkeypatch):
+    model = CrowdDetectionModel()
+    monkeypatch.setattr(model, '_predict_image', lambda image: {'crowd_count': 4, 'crowd_density': 0.1, 'model_used': 'test'})
+    clip = b''.join(jpeg(scene(index, gain=1 + 0.08 * np.sin(index), moving=10 <= index < 15)) for index in range(30))
+    stats = {}
+    samples = list(model.predict_video(io.BytesIO(clip), every_n=0, fps=25, stats=stats))
+    motion_frames = [sample['frame'] for sample in samples if sample['trigger'] == 'motion']
+    assert motion_frames and all(10 <= frame <= 15 for frame in motion_frames)
+    assert stats['frames'] == 30
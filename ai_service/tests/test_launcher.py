@@ -0,0 +1,42 @@
+import argparse
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='the launcher forks')
+
+
+def launcher_args(**overrides):
+    values = {
+        'host': 'localhost', 'port': 0, 'workers': 1, 'threads': 1, 'max_requests': 0,
+        'max_requests_jitter': 0, 'graceful_timeout': 1, 'backlog': 16, 'report_interval': 0,
+        'status_file': None
+    }
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+def test_several_workers_turn_the_risk_feed_off(service, monkeypatch):
+    import launcher
+
+    monkeypatch.setattr(service, 'RISK_FEED_ENABLED', True)
+    monkeypatch.setattr(launcher.Launcher, '_load_models', lambda self, reload=False: None)
+
+    def stop_before_binding(self):
+        raise SystemExit
+
+    monkeypatch.setattr(launcher.Launcher, '_bind', stop_before_binding)
+    with pytest.raises(SystemExit):
+        launcher.Launcher(launcher_args(workers=1)).run()
+    assert service.RISK_FEED_ENABLED is True
+    with pytest.raises(SystemExit):
+        launcher.Launcher(launcher_args(workers=2)).run()
+    assert service.RISK_FEED_ENABLED is False
+
+
+def test_feed_routes_answer_503_when_disabled(client, service, monkeypatch):
+    monkeypatch.setattr(service, 'RISK_FEED_ENABLED', False)
+    assert client.get('/stream/risk-prediction?zones=a').status_code == 503
+    response = client.post('/predict/risk-prediction/zones', json={'entries': [{'zone_id': 'a'}]})
+    assert response.status_code == 503
+    assert 'risk_feed' not in client.get('/health').get_json()
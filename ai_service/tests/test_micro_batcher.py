@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from utils.micro_batcher import MicroBatcher
+
+
+def submit_concurrently(batcher, items):
+    results = [None] * len(items)
+    errors = [None] * len(items)
+    barrier = threading.Barrier(len(items))
+
+    def call(index):
+        barrier.wait()
+        try:
+            results[index] = batcher.submit(items[index], timeout=5)
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(len(items))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_results_fan_out_in_order():
+    batcher = MicroBatcher('test', lambda items: [item * 2 for item in items])
+    results, errors = submit_concurrently(batcher, list(range(16)))
+    assert results == [item * 2 for item in range(16)]
+    assert errors == [None] * 16
+    assert batcher.stats()['items'] == 16
+
+
+def test_concurrent_submissions_are_coalesced():
+    sizes = []
+
+    def batch_fn(items):
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher('test', batch_fn, min_window=0.005, max_window=0.05, max_batch_size=32)
+    batcher._arrival_gap = 0.001  # Dense traffic, so the first item waits for company
+    submit_concurrently(batcher, list(range(8)))
+    assert sum(sizes) == 8
+    assert max(sizes) > 1
+
+
+def test_item_error_only_reaches_its_caller():
+    def batch_fn(items):
+        return [{'error': 'bad item'} if item < 0 else {'value': item} for item in items]
+
+    batcher = MicroBatcher('test', batch_fn)
+    results, errors = submit_concurrently(batcher, [1, -1, 2])
+    assert results == [{'value': 1}, {'error': 'bad item'}, {'value': 2}]
+    assert errors == [None] * 3
+
+
+def test_batch_failure_reaches_every_caller_and_batcher_recovers():
+    calls = []
+
+    def batch_fn(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise RuntimeError('model crashed')
+        return items
+
+    batcher = MicroBatcher('test', batch_fn)
+    with pytest.raises(RuntimeError):
+        batcher.submit('a', timeout=5)
+    assert batcher.submit('b', timeout=5) == 'b'
+
+
+def test_result_count_mismatch_is_an_error():
+    batcher = MicroBatcher('test', lambda items: items[:-1])
+    with pytest.raises(ValueError):
+        batcher.submit('a', timeout=5)
+
+
+def test_sparse_traffic_does_not_wait():
+    batcher = MicroBatcher('test', lambda items: items, max_window=0.01)
+    assert batcher.current_window() == 0.0
+    batcher._arrival_gap = 0.5
+    assert batcher.current_window() == 0.0
+    batcher._arrival_gap = 0.001
+    assert batcher.min_window <= batcher.current_window() <= batcher.max_window
+
+
+def test_aimd_batch_limit():
+    batcher = MicroBatcher('test', lambda items: items, max_batch_size=8, latency_budget=0.1)
+    assert batcher.batch_limit == 2
+
+    # Additive increase while batches fill within the budget, up to max_batch_size
+    for _ in range(10):
+        batcher._adapt_batch_limit(batcher.batch_limit, 0.01)
+    assert batcher.batch_limit == 8
+
+    # Partial batches leave the limit alone
+    batcher._adapt_batch_limit(3, 0.01)
+    assert batcher.batch_limit == 8
+
+    # Multiplicative decrease when a batch overruns the budget, never below 1
+    batcher._adapt_batch_limit(8, 0.2)
+    assert batcher.batch_limit == 4
+    for _ in range(5):
+        batcher._adapt_batch_limit(1, 0.2)
+    assert batcher.batch_limit == 1
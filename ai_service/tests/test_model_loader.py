@@ -0,0 +1,59 @@
+import pytest
+
+from utils.model_loader import STATE_FAILED, STATE_READY, ModelLoader
+
+
+def failing_factory():
+    raise RuntimeError('weights missing')
+
+
+@pytest.fixture
+def loader():
+    registry = {}
+    loader = ModelLoader(registry, max_workers=2)
+    yield loader
+    loader.shutdown()
+
+
+def test_not_ready_before_start(loader):
+    assert not loader.is_ready()
+
+
+def test_ready_when_all_models_load(loader):
+    loader.start({'a': object, 'b': object})
+    assert loader.wait(timeout=5)
+    assert loader.is_ready()
+    assert loader.state('a') == STATE_READY
+    assert loader.failed() == []
+
+
+def test_failed_required_model_is_not_ready(loader):
+    loader.start({'a': object, 'b': failing_factory})
+    assert loader.wait(timeout=5)
+    assert loader.state('b') == STATE_FAILED
+    assert loader.failed() == ['b']
+    assert loader.registry['b'] is None
+    assert not loader.is_ready()
+    assert not loader.is_ready(required=['a', 'b'])
+    assert loader.is_ready(required=['a'])
+
+
+def test_ready_endpoint_returns_503_when_required_model_failed(monkeypatch):
+    import app as appmod
+
+    loader = ModelLoader({}, max_workers=2)
+    loader.start({'chatbot': object, 'crowd_detection': failing_factory})
+    loader.wait(timeout=5)
+    monkeypatch.setattr(appmod, 'model_loader', loader)
+    client = appmod.app.test_client()
+
+    monkeypatch.setattr(appmod, 'REQUIRED_MODELS', ['chatbot', 'crowd_detection'])
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['failed'] == ['crowd_detection']
+
+    monkeypatch.setattr(appmod, 'REQUIRED_MODELS', ['chatbot'])
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['ready'] is True
+    loader.shutdown()
@@ -0,0 +1,54 @@
+from utils.result_cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_exact_hits_and_misses_are_counted():
+    cache = ResultCache(max_entries=4, ttl=10)
+    cache.put('a', {'crowd_count': 3})
+    assert cache.get('a') == {'crowd_count': 3}
+    assert cache.get('b') is None
+    cache.record_miss()
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    assert stats['hit_rate'] == 0.5 and stats['size'] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    cache = ResultCache(ttl=30, clock=clock)
+    cache.put('a', 1, group='720p', perceptual_hash=0)
+    clock.now = 29.9
+    assert cache.get('a') == 1
+    clock.now = 30.0
+    assert cache.get('a') is None
+    assert cache.get_similar('720p', 0) is None
+    assert cache.stats()['expired'] == 1 and cache.stats()['size'] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')  # 'b' is now the least recently used
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_similar_lookup_respects_group_and_hamming_tolerance():
+    cache = ResultCache(hamming_tolerance=3)
+    cache.put('a', 'frame a', group='720p', perceptual_hash=0b1111)
+    assert cache.get_similar('720p', 0b1000) == 'frame a'  # 3 bits apart
+    assert cache.get_similar('720p', 0b10000) is None  # 5 bits apart
+    assert cache.get_similar('1080p', 0b1111) is None
+    cache.put('b', 'frame b', group='720p', perceptual_hash=0b1110)
+    assert cache.get_similar('720p', 0b1111) == 'frame b'  # Most recent match wins
+    assert cache.stats()['perceptual_hits'] == 2
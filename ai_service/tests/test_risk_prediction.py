@@ -0,0 +1,54 @@
+import pytest
+
+from models.risk_prediction import RiskPredictionModel
+
+
+@pytest.fixture(scope='module')
+def model():
+    return RiskPredictionModel()
+
+
+def entry(**overrides):
+    values = {
+        'historical_data': [0.2, 0.3, 0.4, 0.5, 0.6],
+        'current_conditions': {'crowd_density': 0.7, 'incident_count': 2}
+    }
+    values.update(overrides)
+    return values
+
+
+def test_batch_matches_input_order(model):
+    results = model.predict_batch([entry(), entry(prediction_window=6)])
+    assert len(results) == 2
+    assert all('risk_score' in result for result in results)
+    assert [p['time'] for p in results[1]['predictions']] == ['+1h', '+4h']
+
+
+@pytest.mark.parametrize('bad_entry, message', [
+    (entry(prediction_window='soon'), 'prediction_window'),
+    (entry(prediction_window=0), 'prediction_window'),
+    (entry(historical_data=[0.2, 'high']), 'historical_data'),
+    (entry(historical_data='0.2,0.3'), 'historical_data'),
+    (entry(current_conditions={'crowd_density': 'dense'}), 'crowd_density'),
+    (entry(current_conditions=[0.5]), 'current_conditions'),
+    ('zone-a', 'object')
+])
+def test_malformed_entry_gets_its_own_error(model, bad_entry, message):
+    results = model.predict_batch([entry(), bad_entry, entry()])
+    assert message in results[1]['error']
+    for result in (results[0], results[2]):
+        assert 'error' not in result
+        assert result['model_used'] != 'Mock_Data'
+
+
+def test_batch_endpoint_reports_per_entry_errors(monkeypatch, model):
+    import app as appmod
+
+    monkeypatch.setitem(appmod.models, 'risk_prediction', model)
+    response = appmod.app.test_client().post('/predict/risk-prediction/batch', json={
+        'entries': [entry(zone_id='a'), entry(zone_id='b', prediction_window='x')]
+    })
+    assert response.status_code == 200
+    zones = response.get_json()['results']
+    assert 'risk_score' in zones[0]
+    assert zones[1]['zone_id'] == 'b' and 'prediction_window' in zones[1]['error']
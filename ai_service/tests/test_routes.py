@@ -0,0 +1,88 @@
+import io
+import json
+
+from utils.admission import AdmissionLimiter
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line.strip()]
+
+
+def test_crowd_batch_keeps_upload_order_and_isolates_bad_images(client, make_jpeg):
+    response = client.post('/predict/crowd-detection/batch', data={
+        'images': [
+            (io.BytesIO(make_jpeg(seed=1)), 'a.jpg'),
+            (io.BytesIO(b'not an image'), 'b.jpg'),
+            (io.BytesIO(make_jpeg(seed=2)), 'c.jpg')
+        ]
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['filename'] for result in results] == ['a.jpg', 'b.jpg', 'c.jpg']
+    assert 'error' in results[1]
+    assert 'crowd_count' in results[0] and 'crowd_count' in results[2]
+
+
+def test_large_uploads_stay_in_memory(service):
+    upload = (io.BytesIO(b'\xff' * (2 * 1024 * 1024)), 'frame.jpg')
+    with service.app.test_request_context('/predict/crowd-detection', method='POST', data={'image': upload},
+                                          content_type='multipart/form-data'):
+        assert isinstance(service.request.files['image'].stream, io.BytesIO)
+
+
+def test_anomaly_batch_isolates_empty_streams(client):
+    response = client.post('/predict/anomaly-detection/batch', json={'streams': [
+        {'name': 'a', 'data': [float(value % 7) for value in range(40)]},
+        {'name': 'b', 'data': []}
+    ]})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert 'anomaly_score' in results[0]
+    assert results[1]['name'] == 'b' and 'error' in results[1]
+
+
+def test_anomaly_stream_returns_windows_and_summary(client):
+    body = ''.join(f'{value}\n' for value in range(25))
+    response = client.post('/predict/anomaly-detection/stream?window=10',
+                           data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    lines = ndjson(response)
+    windows, summary = lines[:-1], lines[-1]['summary']
+    assert [window['window'] for window in windows] == [0, 1, 2]
+    assert windows[-1]['partial'] is True
+    assert summary['windows'] == 3 and summary['data_points'] == 25
+
+
+def test_stream_counts_only_scored_windows_as_predictions(client, service, monkeypatch):
+    def score_stream(points, **options):
+        list(points)
+        yield {'window': 0, 'anomaly_score': 0.1, 'anomaly_detected': False}
+        yield {'window': 1, 'error': 'Window too short'}
+
+    monkeypatch.setattr(service.models['anomaly_detection'], 'score_stream', score_stream)
+    key = ('anomaly_detection', 'IsolationForest')
+    before = service.MODEL_PREDICTIONS._values.get(key, 0.0)
+    response = client.post('/predict/anomaly-detection/stream', data='1\n2\n3\n', content_type='application/x-ndjson')
+    assert ndjson(response)[-1]['summary']['windows'] == 2
+    assert service.MODEL_PREDICTIONS._values.get(key, 0.0) - before == 1
+
+
+def test_json_typed_stream_body_is_left_to_the_view(client):
+    # With timings on, the before_request parse must not consume a streaming route's body
+    body = ''.join(f'{value}\n' for value in range(25))
+    response = client.post('/predict/anomaly-detection/stream?window=10&timings=1',
+                           data=body, content_type='application/json')
+    assert response.status_code == 200
+    assert ndjson(response)[-1]['summary']['data_points'] == 25
+
+
+def test_full_admission_group_sheds_with_retry_after(client, service, monkeypatch):
+    limiter = AdmissionLimiter('anomaly_detection', max_concurrent=1, max_queue=0)
+    limiter.acquire()
+    monkeypatch.setitem(service.admission_limiters, 'anomaly_detection', limiter)
+
+    response = client.post('/predict/anomaly-detection', json={'data': [1, 2, 3]})
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    # Unlimited routes still answer
+    assert client.get('/health').status_code == 200
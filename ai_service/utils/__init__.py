@@ -0,0 +1,7 @@
+# Serving utilities for the Smart Tourist Safety AI Service
+
+from .model_loader import ModelLoader
+
+__all__ = [
+    'ModelLoader'
+]
@@ -0,0 +1,138 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+# Priority classes (lower value is served first)
+PRIORITY_CRITICAL = 0  # Never queued or shed (emergency chatbot intents)
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_CRITICAL: 'critical',
+    PRIORITY_HIGH: 'high',
+    PRIORITY_NORMAL: 'normal'
+}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, limiter, reason, retry_after):
+        super().__init__(f"{limiter} overloaded ({reason})")
+        self.limiter = limiter
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Concurrency limit with a bounded, prioritized wait queue for one endpoint group
+
+    Up to max_concurrent requests run at once and up to max_queue wait for a
+    slot (highest priority first, FIFO within a priority). Anything beyond
+    that, or a waiter that does not get a slot within queue_timeout, is
+    rejected with a Retry-After estimated from the service-time EWMA.
+    """
+
+    def __init__(self, name, max_concurrent, max_queue, queue_timeout=2.0,
+                 smoothing=0.2, max_retry_after=60):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.smoothing = smoothing
+        self.max_retry_after = max_retry_after
+
+        self._active = 0
+        self._waiting = []  # Heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._service_time = None  # EWMA of time spent holding a slot
+        self._condition = threading.Condition()
+
+        self._admitted = 0
+        self._rejected = {}
+
+    def acquire(self, priority=PRIORITY_NORMAL):
+        """
+        Take a slot, waiting in the queue if needed
+
+        Args:
+            priority (int): One of the PRIORITY_* classes
+
+        Raises:
+            AdmissionRejected: When the queue is full or the wait times out
+        """
+        with self._condition:
+            if priority == PRIORITY_CRITICAL or (self._active < self.max_concurrent and not self._waiting):
+                self._admit()
+                return
+
+            if len(self._waiting) >= self.max_queue:
+                raise self._reject('queue_full')
+
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self._active >= self.max_concurrent or self._waiting[0] != ticket:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject('timeout')
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                # The next waiter may be able to go now
+                self._condition.notify_all()
+
+            self._admit()
+
+    def release(self, service_time):
+        """Free a slot and fold its service time into the EWMA"""
+        with self._condition:
+            self._active -= 1
+            if self._service_time is None:
+                self._service_time = service_time
+            else:
+                self._service_time = (1 - self.smoothing) * self._service_time + self.smoothing * service_time
+            self._condition.notify_all()
+
+    def retry_after(self):
+        """
+        Seconds a rejected client should wait
+
+        Estimated as the time needed to drain everything in front of it:
+        (running + queued) requests served max_concurrent at a time.
+        """
+        with self._condition:
+            return self._retry_after()
+
+    def _retry_after(self):
+        service_time = self._service_time if self._service_time is not None else 1.0
+        backlog = self._active + len(self._waiting)
+        estimate = service_time * backlog / self.max_concurrent
+        return int(min(self.max_retry_after, max(1, math.ceil(estimate))))
+
+    def _admit(self):
+        self._active += 1
+        self._admitted += 1
+
+    def _reject(self, reason):
+        self._rejected[reason] = self._rejected.get(reason, 0) + 1
+        return AdmissionRejected(self.name, reason, self._retry_after())
+
+    def stats(self):
+        """Snapshot of the limiter state"""
+        with self._condition:
+            return {
+                'active': self._active,
+                'queued': len(self._waiting),
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'admitted': self._admitted,
+                'rejected': dict(self._rejected),
+                'service_time_ms': round(self._service_time * 1000, 3) if self._service_time is not None else None,
+                'retry_after': self._retry_after()
+            }
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+CACHE_FORMAT_VERSION = 1
+
+
+class ArtifactCache:
+    """
+    On-disk cache of fitted model artifacts
+    Entries are keyed by a hash of the model config (hyperparameters, seed and
+    library versions), so any change produces a new key and stale entries are
+    never loaded. Every file is checksummed to detect corrupt artifacts.
+    """
+
+    def __init__(self, cache_dir=None, enabled=None):
+        default_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.model_cache')
+        self.cache_dir = cache_dir or os.getenv('MODEL_CACHE_DIR', default_dir)
+        if enabled is None:
+            enabled = os.getenv('MODEL_CACHE_ENABLED', 'True').lower() == 'true'
+        self.enabled = enabled
+
+    @staticmethod
+    def make_key(config):
+        """Stable hash of a JSON-serializable model config"""
+        payload = json.dumps({'format': CACHE_FORMAT_VERSION, 'config': config}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def _entry_dir(self, name, key):
+        return os.path.join(self.cache_dir, f"{name}-{key}")
+
+    @staticmethod
+    def _file_checksum(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def load(self, name, config, loader):
+        """
+        Load a cached artifact
+
+        Args:
+            name (str): Artifact name (e.g. 'anomaly_detection')
+            config (dict): Model config the artifact was built from
+            loader (callable): Called with the entry directory, returns the loaded object
+
+        Returns:
+            The loaded object, or None on a miss or a corrupt entry
+        """
+        if not self.enabled:
+            return None
+
+        key = self.make_key(config)
+        entry_dir = self._entry_dir(name, key)
+        manifest_path = os.path.join(entry_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            logger.info(f"No cached artifact for {name} ({key})")
+            return None
+
+        start_time = time.time()
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+            if manifest.get('key') != key:
+                raise ValueError("manifest key mismatch")
+
+            for filename, checksum in manifest.get('files', {}).items():
+                if self._file_checksum(os.path.join(entry_dir, filename)) != checksum:
+                    raise ValueError(f"checksum mismatch for {filename}")
+
+            artifact = loader(entry_dir)
+            logger.info(f"Loaded cached {name} artifact ({key}) in {(time.time() - start_time) * 1000:.1f}ms")
+            return artifact
+
+        except Exception as e:
+            logger.warning(f"Cached {name} artifact ({key}) is corrupt, rebuilding: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+    def save(self, name, config, writer):
+        """
+        Store an artifact and drop stale entries with the same name
+
+        Args:
+            name (str): Artifact name
+            config (dict): Model config the artifact was built from
+            writer (callable): Called with a directory to write the artifact files into
+        """
+        if not self.enabled:
+            return False
+
+        key = self.make_key(config)
+        entry_dir = self._entry_dir(name, key)
+        tmp_dir = os.path.join(self.cache_dir, f".tmp-{name}-{uuid.uuid4().hex}")
+
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            writer(tmp_dir)
+
+            files = {
+                filename: self._file_checksum(os.path.join(tmp_dir, filename))
+                for filename in sorted(os.listdir(tmp_dir))
+            }
+            manifest = {
+                'name': name,
+                'key': key,
+                'config': config,
+                'files': files,
+                'created_at': time.time()
+            }
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True, default=str)
+
+            # Publish atomically so a concurrent reader never sees a partial entry
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            self._prune_stale(name, key)
+
+            logger.info(f"Cached {name} artifact ({key})")
+            return True
+
+        except Exception as e:
+            logger.warning(f"Failed to cache {name} artifact: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+    def _prune_stale(self, name, current_key):
+        """Remove entries for the same artifact built from an older config"""
+        prefix = f"{name}-"
+        for entry in os.listdir(self.cache_dir):
+            if entry.startswith(prefix) and entry != f"{name}-{current_key}":
+                shutil.rmtree(os.path.join(self.cache_dir, entry), ignore_errors=True)
@@ -0,0 +1,93 @@
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+
+
+class ImportTimer:
+    """
+    Import-time recorder in the spirit of `python -X importtime`
+    Wraps builtins.__import__ and records self and cumulative time for every
+    module imported for the first time while installed.
+    """
+
+    def __init__(self):
+        self.records = []  # (module, self seconds, cumulative seconds)
+        self._original_import = builtins.__import__
+        self._installed = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self):
+        if not self._installed:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+            self._installed = True
+        return self
+
+    def uninstall(self):
+        # Imports already inside _import keep working through _original_import
+        if self._installed and builtins.__import__ == self._import:
+            builtins.__import__ = self._original_import
+        self._installed = False
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        fullname = name
+        if level > 0:
+            try:
+                fullname = importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__'))
+            except (ImportError, ValueError):
+                pass
+        if fullname in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)  # Time spent in nested imports
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            with self._lock:
+                self.records.append((fullname, cumulative - nested, cumulative))
+
+    def summary(self, top=10, since=0):
+        """
+        Import time per top-level package (sum of self times, so nothing is counted twice)
+
+        Args:
+            top (int): Number of packages to list
+            since (int): Skip the first `since` recorded imports
+
+        Returns:
+            dict: total seconds, module count, the slowest packages and the
+                  modules with the largest cumulative (self + nested) time
+        """
+        with self._lock:
+            records = self.records[since:]
+
+        by_package = {}
+        for module, self_time, _ in records:
+            package = module.split('.')[0]
+            entry = by_package.setdefault(package, {'seconds': 0.0, 'modules': 0})
+            entry['seconds'] += self_time
+            entry['modules'] += 1
+
+        slowest = sorted(by_package.items(), key=lambda item: item[1]['seconds'], reverse=True)[:top]
+        return {
+            'total_seconds': round(sum(entry['seconds'] for entry in by_package.values()), 3),
+            'modules': sum(entry['modules'] for entry in by_package.values()),
+            'packages': {name: {'seconds': round(entry['seconds'], 3), 'modules': entry['modules']} for name, entry in slowest},
+            'cumulative': {module: round(cumulative, 3) for module, _, cumulative in sorted(records, key=lambda record: record[2], reverse=True)[:top]}
+        }
+
+    def format_summary(self, top=10, since=0):
+        summary = self.summary(top, since)
+        parts = ', '.join(f"{name} {entry['seconds'] * 1000:.0f}ms" for name, entry in summary['packages'].items())
+        return f"{summary['total_seconds'] * 1000:.0f}ms across {summary['modules']} modules ({parts})"
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Adaptive micro-batching scheduler for one model
+    Coalesces single-item calls that arrive within a short window into one
+    batched model call and fans the results back out to the waiting callers.
+
+    The collection window follows the observed arrival rate (no waiting when
+    traffic is sparse, up to max_window when it is dense), and the batch size
+    limit grows while batches fill up and halves when a batch overruns the
+    latency budget.
+    """
+
+    def __init__(self, name, batch_fn, min_window=0.002, max_window=0.010,
+                 max_batch_size=32, latency_budget=0.100, smoothing=0.2):
+        self.name = name
+        self.batch_fn = batch_fn  # Called with a list of items, returns a list of results in order
+        self.min_window = min_window
+        self.max_window = max_window
+        self.max_batch_size = max_batch_size
+        self.latency_budget = latency_budget
+        self.smoothing = smoothing
+
+        self.batch_limit = max(1, max_batch_size // 4)
+        self._arrival_gap = None  # EWMA of the time between submissions
+        self._batch_time = None  # EWMA of batch service time
+        self._last_arrival = None
+
+        self._pending = []
+        self._condition = threading.Condition()
+        self._worker = None
+
+        self._batches = 0
+        self._items = 0
+
+    def submit(self, item, timeout=None):
+        """
+        Queue one item and wait for its result
+
+        Args:
+            item: Single input accepted by batch_fn
+            timeout (float): Seconds to wait for the result
+
+        Returns:
+            The result for this item
+        """
+        future = Future()
+        with self._condition:
+            now = time.monotonic()
+            if self._last_arrival is not None:
+                self._arrival_gap = self._ewma(self._arrival_gap, now - self._last_arrival)
+            self._last_arrival = now
+
+            self._pending.append((item, future, now))
+            self._ensure_worker()
+            self._condition.notify()
+
+        return future.result(timeout=timeout)
+
+    def _ewma(self, current, sample):
+        return sample if current is None else (1 - self.smoothing) * current + self.smoothing * sample
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name=f'micro-batcher-{self.name}', daemon=True)
+            self._worker.start()
+
+    def current_window(self):
+        """How long to hold the first queued item while waiting for company"""
+        gap = self._arrival_gap
+        if gap is None or gap > self.max_window:
+            # Sparse traffic: another request is unlikely to arrive in time
+            return 0.0
+        return min(self.max_window, max(self.min_window, gap * (self.batch_limit - 1)))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+
+                deadline = self._pending[0][2] + self.current_window()
+                while len(self._pending) < self.batch_limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                batch = self._pending[:self.batch_limit]
+                del self._pending[:self.batch_limit]
+
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        """Run one batched call and resolve every waiting future"""
+        items = [item for item, _, _ in batch]
+        start_time = time.monotonic()
+
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise ValueError(f"batch returned {len(results)} results for {len(items)} items")
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            logger.error(f"Micro-batch for {self.name} failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+        elapsed = time.monotonic() - start_time
+        with self._condition:
+            self._batch_time = self._ewma(self._batch_time, elapsed)
+            self._batches += 1
+            self._items += len(items)
+            self._adapt_batch_limit(len(items), elapsed)
+
+    def _adapt_batch_limit(self, batch_size, elapsed):
+        """AIMD: grow while batches fill within budget, halve when over budget"""
+        if elapsed > self.latency_budget:
+            self.batch_limit = max(1, self.batch_limit // 2)
+        elif batch_size >= self.batch_limit and self.batch_limit < self.max_batch_size:
+            self.batch_limit += 1
+
+    def stats(self):
+        """Snapshot of the scheduler state"""
+        with self._condition:
+            return {
+                'batches': self._batches,
+                'items': self._items,
+                'average_batch_size': round(self._items / self._batches, 2) if self._batches else 0.0,
+                'batch_limit': self.batch_limit,
+                'window_ms': round(self.current_window() * 1000, 3),
+                'arrival_gap_ms': round(self._arrival_gap * 1000, 3) if self._arrival_gap is not None else None,
+                'batch_time_ms': round(self._batch_time * 1000, 3) if self._batch_time is not None else None,
+                'queued': len(self._pending)
+            }
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+logger = logging.getLogger(__name__)
+
+# Model load states reported by the readiness endpoint
+STATE_LOADING = 'loading'
+STATE_READY = 'ready'
+STATE_FAILED = 'failed'
+
+
+class ModelLoader:
+    """
+    Concurrent model loader
+    Builds each AI model in a worker pool so the HTTP server can start
+    immediately, and tracks per-model state and load timings
+    """
+
+    def __init__(self, registry, max_workers=4):
+        self.registry = registry  # Shared dict that loaded model instances are published into
+        self.max_workers = max_workers
+        self._status = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._idle_callbacks = []
+
+    def start(self, factories, reload=False):
+        """
+        Start loading models in the background
+
+        Args:
+            factories (dict): Mapping of model name to a zero-argument callable building the model
+            reload (bool): Rebuild models that are already loaded
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, min(self.max_workers, len(factories))),
+                    thread_name_prefix='model-loader'
+                )
+
+            for name, factory in factories.items():
+                state = self._status.get(name, {}).get('state')
+                if state == STATE_LOADING or (state == STATE_READY and not reload):
+                    continue
+
+                # Keep the name visible (as unavailable) until the model is ready;
+                # on reload the old instance keeps serving until its replacement is built
+                if state != STATE_READY:
+                    self.registry[name] = None
+                self._status[name] = {
+                    'state': STATE_LOADING,
+                    'started_at': time.time(),
+                    'load_time': None,
+                    'error': None
+                }
+                self._futures[name] = self._executor.submit(self._load, name, factory)
+
+    def _load(self, name, factory):
+        """Build one model and publish it into the registry"""
+        start_time = time.time()
+        try:
+            instance = factory()
+        except Exception as e:
+            elapsed = time.time() - start_time
+            logger.error(f"❌ Failed to initialize {name} after {elapsed:.2f}s: {e}")
+            with self._lock:
+                self.registry[name] = None
+                self._status[name].update({
+                    'state': STATE_FAILED,
+                    'load_time': round(elapsed, 3),
+                    'error': str(e)
+                })
+            self._notify_if_idle()
+            return None
+
+        elapsed = time.time() - start_time
+        with self._lock:
+            self.registry[name] = instance
+            self._status[name].update({
+                'state': STATE_READY,
+                'load_time': round(elapsed, 3)
+            })
+        logger.info(f"✅ {name} model initialized in {elapsed:.2f}s")
+        self._notify_if_idle()
+        return instance
+
+    def on_idle(self, callback):
+        """Call callback (once) when no model is left loading"""
+        with self._lock:
+            self._idle_callbacks.append(callback)
+        self._notify_if_idle()
+
+    def _notify_if_idle(self):
+        with self._lock:
+            if any(s['state'] == STATE_LOADING for s in self._status.values()):
+                return
+            callbacks, self._idle_callbacks = self._idle_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Model loader idle callback failed: {e}")
+
+    def wait(self, timeout=None):
+        """Block until every submitted model has finished loading (or failed)"""
+        with self._lock:
+            futures = list(self._futures.values())
+        done, not_done = wait_futures(futures, timeout=timeout)
+        return len(not_done) == 0
+
+    def state(self, name):
+        """Get the load state of a model, or None if it was never submitted"""
+        with self._lock:
+            status = self._status.get(name)
+            return status['state'] if status else None
+
+    def is_loading(self, name):
+        """True while a model is loading and no previous instance can serve"""
+        return self.state(name) == STATE_LOADING and self.registry.get(name) is None
+
+    def is_ready(self, required=None):
+        """
+        True once loading has started, no model is still loading and none of
+        the required models (default: all submitted models) failed to load
+        """
+        with self._lock:
+            if not self._status or any(s['state'] == STATE_LOADING for s in self._status.values()):
+                return False
+            names = self._status if required is None else required
+            return all(self._status.get(name, {}).get('state') == STATE_READY for name in names)
+
+    def failed(self):
+        """Names of the models whose last load failed"""
+        with self._lock:
+            return [name for name, status in self._status.items() if status['state'] == STATE_FAILED]
+
+    def status(self):
+        """Snapshot of per-model state and timings"""
+        now = time.time()
+        with self._lock:
+            snapshot = {}
+            for name, status in self._status.items():
+                entry = dict(status)
+                if entry['state'] == STATE_LOADING:
+                    entry['elapsed'] = round(now - entry['started_at'], 3)
+                snapshot[name] = entry
+            return snapshot
+
+    def shutdown(self, wait_for_loads=False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait_for_loads)
@@ -0,0 +1,228 @@
+import cProfile
+import glob
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+MODE_CPROFILE = 'cprofile'
+MODE_SAMPLE = 'sample'
+PROFILE_MODES = (MODE_CPROFILE, MODE_SAMPLE)
+
+OVERFLOW_STACK = '[other]'
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame, max_depth=128):
+    """Collapsed stack (root first, frames joined by ';') as used by flame graph tools"""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9]+', '_', value).strip('_') or 'root'
+
+
+class ProfileStore:
+    """
+    Rotating directory of profile outputs
+    Each profile is a group of files sharing one basename (profile data plus a
+    JSON sidecar with the endpoint, status and timings); only the newest
+    max_profiles groups are kept.
+    """
+
+    def __init__(self, directory, max_profiles=50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def basename(self, endpoint, duration):
+        stamp = time.strftime('%Y%m%d-%H%M%S') + f'-{int(time.time() * 1000) % 1000:03d}'
+        return f"{stamp}_{_slug(endpoint)}_{duration * 1000:.0f}ms"
+
+    def write(self, basename, files, metadata):
+        """
+        Write one profile
+
+        Args:
+            basename (str): Shared file name prefix from basename()
+            files (dict): Extension -> bytes or str content
+            metadata (dict): Written to <basename>.json
+
+        Returns:
+            list: Paths written
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            paths = []
+            for extension, content in files.items():
+                path = os.path.join(self.directory, basename + extension)
+                mode = 'wb' if isinstance(content, bytes) else 'w'
+                with open(path, mode, **({} if mode == 'wb' else {'encoding': 'utf-8'})) as f:
+                    f.write(content)
+                paths.append(path)
+
+            metadata = {**metadata, 'files': [os.path.basename(path) for path in paths]}
+            meta_path = os.path.join(self.directory, basename + '.json')
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2)
+            paths.append(meta_path)
+
+            self._rotate()
+            return paths
+
+    def _rotate(self):
+        sidecars = sorted(glob.glob(os.path.join(self.directory, '*.json')))
+        for meta_path in sidecars[:max(0, len(sidecars) - self.max_profiles)]:
+            for path in glob.glob(meta_path[:-len('.json')] + '.*'):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Could not remove old profile {path}: {e}")
+
+
+class CProfileSession:
+    """Deterministic profile of the calling thread"""
+
+    mode = MODE_CPROFILE
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def outputs(self, top=60):
+        """.prof (pstats, e.g. for snakeviz) and a readable .txt summary"""
+        summary = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=summary)
+        stats.sort_stats('cumulative').print_stats(top)
+
+        # Same format as Stats.dump_stats, without a round trip through a temp file
+        return {'.prof': marshal.dumps(stats.stats), '.txt': summary.getvalue()}
+
+
+class SamplingSession:
+    """Low-overhead sampling profile of one thread (collapsed stacks)"""
+
+    mode = MODE_SAMPLE
+
+    def __init__(self, interval=0.001, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def outputs(self):
+        """.folded collapsed stacks (flamegraph.pl / speedscope)"""
+        folded = '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+        return {'.folded': folded + '\n'}
+
+
+class ContinuousSampler:
+    """
+    Always-on low-rate sampler aggregating collapsed stacks per endpoint
+
+    Request threads register the endpoint they are serving; a background
+    thread samples their stacks at a fixed rate and counts them per endpoint.
+    Unique stacks per endpoint are capped so memory stays bounded.
+    """
+
+    def __init__(self, interval, max_stacks_per_endpoint=5000):
+        self.interval = interval
+        self.max_stacks_per_endpoint = max_stacks_per_endpoint
+        self._active = {}  # thread id -> endpoint
+        self._stacks = {}  # endpoint -> Counter of collapsed stacks
+        self._samples = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='continuous-sampler', daemon=True)
+            self._thread.start()
+
+    def register(self, endpoint, thread_id=None):
+        self.start()  # Restarts the sampler in forked workers
+        self._active[thread_id if thread_id is not None else threading.get_ident()] = endpoint
+
+    def unregister(self, thread_id=None):
+        self._active.pop(thread_id if thread_id is not None else threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self._active:
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, endpoint in list(self._active.items()):
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    stacks = self._stacks.setdefault(endpoint, Counter())
+                    stack = collapse_stack(frame)
+                    if stack not in stacks and len(stacks) >= self.max_stacks_per_endpoint:
+                        stack = OVERFLOW_STACK
+                    stacks[stack] += 1
+                    self._samples += 1
+
+    def folded(self, endpoint=None):
+        """Collapsed stacks with the endpoint as root frame, optionally for one endpoint"""
+        with self._lock:
+            lines = [
+                f'{name};{stack} {count}'
+                for name, stacks in sorted(self._stacks.items())
+                if endpoint is None or name == endpoint
+                for stack, count in stacks.most_common()
+            ]
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def stats(self):
+        with self._lock:
+            return {
+                'interval_ms': round(self.interval * 1000, 3),
+                'samples': self._samples,
+                'endpoints': {name: sum(stacks.values()) for name, stacks in self._stacks.items()},
+                'active_threads': len(self._active)
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._samples = 0
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+
+# How a lookup was answered
+MATCH_EXACT = 'exact'
+MATCH_PERCEPTUAL = 'perceptual'
+
+
+class ResultCache:
+    """
+    Bounded LRU/TTL cache of model results
+
+    Entries are keyed by an exact content hash. An entry can also carry a
+    perceptual hash (an int) within a group (e.g. model settings + image size);
+    get_similar() then returns the most recently used entry of the same group
+    whose perceptual hash is within hamming_tolerance bits.
+    """
+
+    def __init__(self, max_entries=512, ttl=60.0, hamming_tolerance=3, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hamming_tolerance = hamming_tolerance
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires at, group, perceptual hash), LRU first
+        self._stats = {'hits': 0, 'perceptual_hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+        self._lock = threading.Lock()
+
+    def _live(self, key, entry, now):
+        """Drop an expired entry (caller holds the lock); True if it is still valid"""
+        if entry[1] > now:
+            return True
+        del self._entries[key]
+        self._stats['expired'] += 1
+        return False
+
+    def get(self, key):
+        """Value stored under an exact key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._live(key, entry, self.clock()):
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0]
+            return None
+
+    def get_similar(self, group, perceptual_hash):
+        """Value of the most recent entry of a group within the Hamming tolerance, or None"""
+        with self._lock:
+            now = self.clock()
+            for key in reversed(list(self._entries)):
+                entry = self._entries[key]
+                if entry[2] != group or entry[3] is None or not self._live(key, entry, now):
+                    continue
+                if bin(entry[3] ^ perceptual_hash).count('1') <= self.hamming_tolerance:
+                    self._entries.move_to_end(key)
+                    self._stats['perceptual_hits'] += 1
+                    return entry[0]
+            return None
+
+    def record_miss(self):
+        with self._lock:
+            self._stats['misses'] += 1
+
+    def put(self, key, value, group=None, perceptual_hash=None):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, self.clock() + self.ttl, group, perceptual_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['perceptual_hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': round((self._stats['hits'] + self._stats['perceptual_hits']) / lookups, 3) if lookups else None,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hamming_tolerance': self.hamming_tolerance
+            }
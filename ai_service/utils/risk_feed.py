@@ -0,0 +1,224 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Why an update was pushed
+REASON_SNAPSHOT = 'snapshot'  # Current state sent when a client subscribes
+REASON_INPUTS = 'inputs'      # The zone's inputs changed
+REASON_DRIFT = 'drift'        # Periodic refresh moved the score past the delta threshold
+
+
+class FeedFull(Exception):
+    """Raised when a subscription or zone limit is reached"""
+
+
+class Subscription:
+    """
+    One client's view of the feed
+
+    Holds at most one pending update per zone: if the client falls behind,
+    newer updates replace older ones instead of queueing without bound.
+    """
+
+    def __init__(self, zones):
+        self.zones = frozenset(zones)
+        self._pending = OrderedDict()  # zone id -> latest unsent update
+        self._condition = threading.Condition()
+        self.closed = False
+
+    def push(self, zone_id, update):
+        with self._condition:
+            self._pending.pop(zone_id, None)
+            self._pending[zone_id] = update
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Wait for updates; returns a (possibly empty) list of updates in push order"""
+        with self._condition:
+            if not self._pending and not self.closed:
+                self._condition.wait(timeout)
+            updates = list(self._pending.values())
+            self._pending.clear()
+            return updates
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+
+class RiskFeed:
+    """
+    Shared live risk scores for subscribed zones
+
+    Zone inputs are published to the feed; each change is recomputed once,
+    in one batch call for all changed zones, and fanned out to every
+    subscriber of the zone. A background refresh recomputes subscribed zones
+    periodically (scores depend on the time of day) and only pushes when the
+    score moved by at least delta or the risk level changed.
+    """
+
+    def __init__(self, compute, delta=0.05, refresh_interval=60.0, max_zones=10000, max_subscribers=256):
+        self.compute = compute  # list of input entries -> list of results, in order
+        self.delta = delta
+        self.refresh_interval = refresh_interval
+        self.max_zones = max_zones
+        self.max_subscribers = max_subscribers
+        self._zones = {}  # zone id -> {'inputs', 'digest', 'result', 'pushed_score', 'pushed_level'}
+        self._subscriptions = set()
+        self._sequence = 0
+        self._stats = {'recomputes': 0, 'zones_recomputed': 0, 'pushed': 0, 'suppressed': 0, 'unchanged_inputs': 0}
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()  # One model call at a time
+        self._thread = None
+
+    def start(self):
+        if self.refresh_interval > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='risk-feed-refresh', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Risk feed refresh failed: {e}")
+
+    @staticmethod
+    def _digest(inputs):
+        return hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def update(self, entries):
+        """
+        Publish new inputs for zones and push the recomputed scores
+
+        Args:
+            entries (list): Dicts with 'zone_id' plus the risk model inputs
+                ('historical_data', 'current_conditions', 'prediction_window')
+
+        Returns:
+            dict: zone id -> 'updated' or 'unchanged'
+        """
+        changed = {}
+        outcome = {}
+        with self._lock:
+            for entry in entries:
+                zone_id = str(entry['zone_id'])
+                inputs = {key: value for key, value in entry.items() if key != 'zone_id'}
+                digest = self._digest(inputs)
+                state = self._zones.get(zone_id)
+                if state is not None and state['digest'] == digest:
+                    self._stats['unchanged_inputs'] += 1
+                    outcome[zone_id] = 'unchanged'
+                    continue
+                if state is None:
+                    if len(self._zones) >= self.max_zones:
+                        raise FeedFull(f'Zone limit reached ({self.max_zones})')
+                    state = self._zones[zone_id] = {'result': None, 'pushed_score': None, 'pushed_level': None}
+                # Recorded before computing so a concurrent identical update is not recomputed twice
+                state.update({'inputs': inputs, 'digest': digest})
+                changed[zone_id] = (inputs, digest)
+                outcome[zone_id] = 'updated'
+
+        if changed:
+            self._recompute(changed, REASON_INPUTS)
+        return outcome
+
+    def refresh(self):
+        """Recompute every zone that has subscribers, pushing only significant moves"""
+        with self._lock:
+            subscribed = set().union(*(subscription.zones for subscription in self._subscriptions)) if self._subscriptions else set()
+            zones = {
+                zone_id: (state['inputs'], state['digest'])
+                for zone_id, state in self._zones.items()
+                if zone_id in subscribed
+            }
+        if zones:
+            self._recompute(zones, REASON_DRIFT)
+
+    def _recompute(self, zones, reason):
+        zone_ids = list(zones)
+        try:
+            with self._compute_lock:
+                results = self.compute([zones[zone_id][0] for zone_id in zone_ids])
+        except Exception:
+            with self._lock:
+                # Forget the digests so resending the same inputs retries
+                for zone_id in zone_ids:
+                    state = self._zones.get(zone_id)
+                    if state is not None and state['digest'] == zones[zone_id][1]:
+                        state['digest'] = None
+            raise
+
+        with self._lock:
+            self._stats['recomputes'] += 1
+            self._stats['zones_recomputed'] += len(zone_ids)
+            for zone_id, result in zip(zone_ids, results):
+                state = self._zones.get(zone_id)
+                if state is None or state['digest'] != zones[zone_id][1]:
+                    continue  # Inputs changed again while computing; that update pushes its own result
+                state['result'] = result
+
+                if reason == REASON_DRIFT and not self._significant(state, result):
+                    self._stats['suppressed'] += 1
+                    continue
+                self._publish(zone_id, state, result, reason)
+
+    def _significant(self, state, result):
+        score = result.get('risk_score')
+        if state['pushed_score'] is None or score is None:
+            return True
+        return abs(score - state['pushed_score']) >= self.delta or result.get('risk_level') != state['pushed_level']
+
+    def _publish(self, zone_id, state, result, reason):
+        """Fan an update out to the zone's subscribers (caller holds the lock)"""
+        self._sequence += 1
+        update = {'id': self._sequence, 'zone_id': zone_id, 'reason': reason, 'timestamp': time.time(), **result}
+        state['pushed_score'] = result.get('risk_score')
+        state['pushed_level'] = result.get('risk_level')
+        for subscription in self._subscriptions:
+            if zone_id in subscription.zones:
+                subscription.push(zone_id, update)
+                self._stats['pushed'] += 1
+
+    def subscribe(self, zone_ids):
+        """Subscribe to zones; the current score of each known zone is queued right away"""
+        with self._lock:
+            if len(self._subscriptions) >= self.max_subscribers:
+                raise FeedFull(f'Subscriber limit reached ({self.max_subscribers})')
+            subscription = Subscription(zone_ids)
+            self._subscriptions.add(subscription)
+            for zone_id in subscription.zones:
+                state = self._zones.get(zone_id)
+                if state is not None and state.get('result') is not None:
+                    self._sequence += 1
+                    subscription.push(zone_id, {
+                        'id': self._sequence,
+                        'zone_id': zone_id,
+                        'reason': REASON_SNAPSHOT,
+                        'timestamp': time.time(),
+                        **state['result']
+                    })
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'zones': len(self._zones),
+                'subscribers': len(self._subscriptions),
+                'delta': self.delta,
+                'refresh_interval': self.refresh_interval
+            }
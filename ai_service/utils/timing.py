@@ -0,0 +1,73 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+# Phase names in pipeline order (used to order the `timings` object)
+PHASES = (
+    'queue',           # Waiting for an admission slot
+    'parse',           # Request body / JSON / multipart parsing
+    'decode',          # Image decode
+    'features',        # Feature extraction from raw inputs
+    'scaling',         # Scaler / PCA transforms
+    'inference',       # Model forward pass / scoring
+    'postprocess',     # Patterns, recommendations, result assembly
+    'serialize'        # JSON serialization of the response
+)
+
+_current = contextvars.ContextVar('phase_timings', default=None)
+
+
+class PhaseTimings:
+    """Accumulated wall time per phase for one request"""
+
+    def __init__(self):
+        self.phases = {}
+        self.started = time.perf_counter()
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def as_dict(self):
+        """Phase durations in milliseconds, in pipeline order, plus the total so far"""
+        ordered = sorted(self.phases.items(), key=lambda item: PHASES.index(item[0]) if item[0] in PHASES else len(PHASES))
+        timings = {name: round(seconds * 1000, 3) for name, seconds in ordered}
+        timings['total'] = round((time.perf_counter() - self.started) * 1000, 3)
+        return timings
+
+
+def start_timing():
+    """Start collecting phase timings for the current context; returns a reset token"""
+    return _current.set(PhaseTimings())
+
+
+def stop_timing(token):
+    """Stop collecting and return the collected timings"""
+    timings = _current.get()
+    _current.reset(token)
+    return timings
+
+
+def current_timings():
+    """Timings being collected in this context, or None"""
+    return _current.get()
+
+
+@contextmanager
+def phase(name):
+    """
+    Attribute the wall time of a block to a phase
+
+    A no-op (one context variable lookup) when no timing is active, so model
+    code can be instrumented unconditionally. Nested phases are counted in
+    both the inner and the outer phase.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)